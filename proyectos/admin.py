@@ -1,5 +1,21 @@
-from django.contrib import admin
-from .models import Proyecto, Tarea
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+
+from rrhh.models import Recurso
+from sistema_recursos.admin_rendimiento import FiltroTexto, PaginadorEstimado
+from . import conflictos
+from .calendario import calendario
+from .models import Feriado, Proyecto, Tarea
+from .reprogramacion import ConflictoAgenda, ErrorReprogramacion, reprogramar
+from .signals import tareas_actualizadas
+
+# Tope de tareas por acción masiva (con "seleccionar todas" podrían ser millones)
+MAX_TAREAS_POR_ACCION = 5000
 
 # 1. Configuración del Admin de PROYECTOS
 @admin.register(Proyecto)
@@ -8,30 +24,135 @@ class ProyectoAdmin(admin.ModelAdmin):
     list_filter = ('unidad_negocio', 'centro_costo') # Filtros laterales
     search_fields = ('nombre', 'centro_costo')
 
+
+class FiltroResponsable(FiltroTexto):
+    """Responsable por nombre o email (list_filter listaría a todo el personal)"""
+    title = 'responsable'
+    parameter_name = 'responsable'
+
+    def filtrar(self, queryset, valor):
+        return queryset.filter(Q(asignado_a__nombre__icontains=valor) | Q(asignado_a__email__iexact=valor))
+
+
+class AccionesTareaForm(ActionForm):
+    """Datos extra de las acciones masivas, junto al selector de acción de la lista"""
+    dias = forms.IntegerField(required=False, label='Días hábiles')
+    responsable = forms.ModelChoiceField(
+        queryset=Recurso.objects.filter(activo=True), required=False,
+        widget=AutocompleteSelect(Tarea._meta.get_field('asignado_a'), admin.site),
+    )
+    forzar = forms.BooleanField(required=False, label='Ignorar cruces')
+
+
 # 2. Configuración del Admin de TAREAS
 @admin.register(Tarea)
 class TareaAdmin(admin.ModelAdmin):
     # A. LIST_DISPLAY: Usamos funciones para "traer" el dato del Proyecto
     list_display = ('nombre', 'ver_unidad_negocio', 'ver_centro_costo', 'proyecto', 'asignado_a', 'fecha_inicio', 'fecha_fin', 'progreso')
+    # Proyecto y responsable vienen en la misma consulta de la lista (sin una consulta por fila)
+    list_select_related = ('proyecto', 'asignado_a__perfil')
     
-    # B. LIST_FILTER
- 
-    list_filter = ('proyecto__unidad_negocio', 'proyecto__centro_costo', 'asignado_a')
+    # B. LIST_FILTER: el responsable se escribe (una lista con todo el personal no escala)
+    list_filter = ('proyecto__unidad_negocio', 'proyecto__centro_costo', FiltroResponsable)
     
     # C. SEARCH_FIELDS: buscar por el CC del proyecto
-    search_fields = ('nombre', 'proyecto__centro_costo')
+    search_fields = ('nombre', 'proyecto__centro_costo', 'id_externo')
     
     list_editable = ('fecha_inicio', 'fecha_fin', 'progreso')
 
     # Esto crea el selector de doble cuadro (Izquierda: Disponibles | Derecha: Seleccionados)
     filter_horizontal = ('requisitos',)
 
+    # Los FK se buscan escribiendo en vez de cargar todos los proyectos/recursos/tareas en un <select>
+    autocomplete_fields = ('proyecto', 'asignado_a', 'predecesora')
+
+    # Tablas grandes: conteo estimado y sin el segundo COUNT(*) del total sin filtrar
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
+    action_form = AccionesTareaForm
+    actions = ['desplazar_fechas', 'reasignar']
+
     # D. DEFINICIÓN DE LAS FUNCIONES PARA VER DATOS DEL PADRE
-    @admin.display(description='Unidad de Negocio')
+    @admin.display(description='Unidad de Negocio', ordering='proyecto__unidad_negocio')
     def ver_unidad_negocio(self, obj):
         # "obj" es la Tarea. 
         return obj.proyecto.unidad_negocio
 
-    @admin.display(description='Centro de Costo')
+    @admin.display(description='Centro de Costo', ordering='proyecto__centro_costo')
     def ver_centro_costo(self, obj):
-        return obj.proyecto.centro_costo
\ No newline at end of file
+        return obj.proyecto.centro_costo
+
+    # E. ACCIONES MASIVAS (bulk_update + señal tareas_actualizadas, como el Gantt)
+    def _dato(self, request, campo):
+        """Valor limpio de un campo de AccionesTareaForm (None si falta o es inválido, con mensaje)"""
+        try:
+            valor = self.action_form.base_fields[campo].clean(request.POST.get(campo) or None)
+        except ValidationError as e:
+            valor = None
+            messages.error(request, f"{self.action_form.base_fields[campo].label or campo}: {' '.join(e.messages)}")
+        else:
+            if valor is None:
+                messages.error(request, f"Indique {self.action_form.base_fields[campo].label or campo}.")
+        return valor
+
+    def _demasiadas(self, request, queryset):
+        if queryset.count() > MAX_TAREAS_POR_ACCION:
+            messages.error(request, f"Seleccione como máximo {MAX_TAREAS_POR_ACCION} tareas por acción.")
+            return True
+        return False
+
+    @admin.action(description='Desplazar fechas (días hábiles, empuja sucesoras)', permissions=['change'])
+    def desplazar_fechas(self, request, queryset):
+        dias = self._dato(request, 'dias')
+        if dias == 0:
+            messages.warning(request, "Desplazar 0 días no cambia nada.")
+        if not dias or self._demasiadas(request, queryset):
+            return
+        # En días hábiles: cada tarea conserva los días hábiles que dura (ver calendario.py)
+        filas = list(queryset.values_list('id', 'fecha_inicio', 'fecha_fin'))
+        inicios, fines = [f[1] for f in filas], [f[2] for f in filas]
+        nuevos_inicios, nuevos_fines = calendario.mover(inicios, fines, calendario.sumar(inicios, dias))
+        cambios = [
+            {'id': f[0], 'start': inicio, 'end': fin}
+            for f, inicio, fin in zip(filas, nuevos_inicios.tolist(), nuevos_fines.tolist())
+        ]
+        verificar = conflictos.verificacion_activa() and not request.POST.get('forzar')
+        try:
+            movidas = reprogramar(cambios, verificar_conflictos=verificar)
+        except ConflictoAgenda as e:
+            messages.error(request, f"{e} ({len(e.verificacion)} tareas). "
+                                    "Marque 'Ignorar cruces' para desplazar igual.")
+            return
+        except ErrorReprogramacion as e:
+            messages.error(request, str(e))
+            return
+        messages.success(request, f"{len(cambios)} tareas desplazadas {dias} días hábiles "
+                                  f"({len(movidas) - len(cambios)} sucesoras empujadas).")
+
+    @admin.action(description='Reasignar al responsable indicado', permissions=['change'])
+    def reasignar(self, request, queryset):
+        recurso = self._dato(request, 'responsable')
+        if recurso is None or self._demasiadas(request, queryset):
+            return
+        with transaction.atomic():
+            tareas = list(queryset.select_for_update().exclude(asignado_a=recurso))
+            for tarea in tareas:
+                tarea.asignado_a = recurso
+            if conflictos.verificacion_activa() and not request.POST.get('forzar'):
+                verificacion = conflictos.verificar(tareas)
+                if verificacion:
+                    messages.error(request, f"No se reasignó: a {recurso.nombre} se le cruzarían "
+                                            f"{len(verificacion)} tareas. Marque 'Ignorar cruces' para reasignar igual.")
+                    return
+            Tarea.objects.bulk_update(tareas, ['asignado_a'], batch_size=1000)
+            tareas_actualizadas.send(sender=Tarea, tareas=tareas)
+        messages.success(request, f"{len(tareas)} tareas reasignadas a {recurso.nombre}.")
+
+
+# 3. Feriados del calendario laboral (los nacionales se cargan con: python manage.py cargar_feriados)
+@admin.register(Feriado)
+class FeriadoAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'nombre')
+    date_hierarchy = 'fecha'
+    search_fields = ('nombre',)
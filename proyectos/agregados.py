@@ -0,0 +1,140 @@
+from collections import defaultdict
+from datetime import date
+
+from django.db.models import Case, Count, F, Max, Min, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from .models import Proyecto, Tarea
+
+# Campos de la tarea que alimentan los agregados de su proyecto (se recuerdan al cargarla, ver signals.py)
+CAMPOS = ('proyecto_id', 'progreso', 'fecha_inicio', 'fecha_fin')
+
+
+def _a_fecha(valor):
+    if valor is None or isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+def _valores(datos):
+    """(proyecto, progreso, inicio, fin) normalizados, o None si falta algún campo (p.ej. cargada con only())"""
+    if any(datos.get(campo) is None for campo in CAMPOS):
+        return None
+    return datos['proyecto_id'], int(datos['progreso']), _a_fecha(datos['fecha_inicio']), _a_fecha(datos['fecha_fin'])
+
+
+class _Cambios:
+    """Deltas acumulados de un proyecto: se aplican con un solo UPDATE"""
+
+    def __init__(self):
+        self.conteos = [0, 0, 0]  # total, suma de progreso, completadas
+        self.inicios_nuevos, self.fines_nuevos = [], []
+        self.inicios_quitados, self.fines_quitados = [], []
+        self.recalcular = False
+
+    def sumar(self, valores, signo):
+        _, progreso, inicio, fin = valores
+        self.conteos[0] += signo
+        self.conteos[1] += signo * progreso
+        self.conteos[2] += signo * (progreso == 100)
+        if signo > 0:
+            self.inicios_nuevos.append(inicio)
+            self.fines_nuevos.append(fin)
+        else:
+            self.inicios_quitados.append(inicio)
+            self.fines_quitados.append(fin)
+
+
+def _limite(campo, nuevos, quitados, es_minimo):
+    """
+    Nueva primera/última fecha sin releer las tareas mientras se pueda: si lo quitado no tocaba
+    el límite actual, basta compararlo con lo agregado; si lo tocaba, se recalcula con una subconsulta.
+    """
+    funcion, extremo, comparar = (Least, min, 'lt') if es_minimo else (Greatest, max, 'gt')
+    actual = F(campo)
+    if nuevos:
+        nuevo = Value(extremo(nuevos))
+        actual = funcion(Coalesce(F(campo), nuevo), nuevo)
+    if not quitados:
+        return actual
+
+    recalculado = Subquery(
+        Tarea.objects.filter(proyecto_id=OuterRef('pk')).order_by().values('proyecto_id')
+        .annotate(limite=(Min if es_minimo else Max)('fecha_inicio' if es_minimo else 'fecha_fin'))
+        .values('limite')
+    )
+    return Case(When(**{f'{campo}__{comparar}': extremo(quitados), 'then': actual}), default=recalculado)
+
+
+def registrar(cambios_por_proyecto, anterior, actual):
+    """Acumula el paso de una tarea de 'anterior' a 'actual' (dicts con CAMPOS, cualquiera puede ser None)"""
+    viejo = _valores(anterior) if anterior else None
+    nuevo = _valores(actual) if actual else None
+    if viejo == nuevo:
+        return
+
+    # Snapshot incompleto: no sabemos qué restar, así que ese proyecto se recalcula entero
+    if anterior and viejo is None:
+        pid = anterior.get('proyecto_id') or (actual or {}).get('proyecto_id')
+        if pid:
+            cambios_por_proyecto[pid].recalcular = True
+    elif viejo:
+        cambios_por_proyecto[viejo[0]].sumar(viejo, -1)
+
+    if nuevo:
+        cambios_por_proyecto[nuevo[0]].sumar(nuevo, 1)
+
+
+def aplicar(cambios_por_proyecto):
+    """Un UPDATE por proyecto afectado, con expresiones F() para no pisar escrituras concurrentes"""
+    completos = []
+    for pid, c in cambios_por_proyecto.items():
+        if c.recalcular:
+            completos.append(pid)
+            continue
+        total, suma, completadas = c.conteos
+        Proyecto.objects.filter(id=pid).update(
+            total_tareas=F('total_tareas') + total,
+            suma_progreso=F('suma_progreso') + suma,
+            tareas_completadas=F('tareas_completadas') + completadas,
+            primera_fecha=_limite('primera_fecha', c.inicios_nuevos, c.inicios_quitados, es_minimo=True),
+            ultima_fecha=_limite('ultima_fecha', c.fines_nuevos, c.fines_quitados, es_minimo=False),
+        )
+    if completos:
+        recalcular(completos)
+
+
+def nuevos_cambios():
+    return defaultdict(_Cambios)
+
+
+def recalcular(proyectos_ids=None):
+    """
+    Reconstruye los agregados desde las tareas con una consulta agrupada.
+    Devuelve la cantidad de proyectos actualizados.
+    """
+    proyectos = Proyecto.objects.all()
+    if proyectos_ids is not None:
+        proyectos = proyectos.filter(id__in=proyectos_ids)
+
+    calculados = proyectos.annotate(
+        a_total=Count('tareas'),
+        a_suma=Sum('tareas__progreso'),
+        a_completadas=Count('tareas', filter=Q(tareas__progreso=100)),
+        a_primera=Min('tareas__fecha_inicio'),
+        a_ultima=Max('tareas__fecha_fin'),
+    ).order_by().values_list('id', 'a_total', 'a_suma', 'a_completadas', 'a_primera', 'a_ultima')
+
+    actualizados = []
+    for pid, total, suma, completadas, primera, ultima in calculados.iterator(chunk_size=2000):
+        actualizados.append(Proyecto(
+            id=pid, total_tareas=total, suma_progreso=suma or 0, tareas_completadas=completadas,
+            primera_fecha=primera, ultima_fecha=ultima,
+        ))
+
+    Proyecto.objects.bulk_update(
+        actualizados,
+        ['total_tareas', 'suma_progreso', 'tareas_completadas', 'primera_fecha', 'ultima_fecha'],
+        batch_size=1000,
+    )
+    return len(actualizados)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ProyectosConfig(AppConfig):
     name = 'proyectos'
+
+    def ready(self):
+        # Conecta los receptores de señales (índice de ocupación, etc.)
+        from . import signals  # noqa: F401
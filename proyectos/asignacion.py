@@ -0,0 +1,157 @@
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+
+from .models import Tarea
+from .ocupacion import indice
+from .signals import tareas_actualizadas
+from rrhh.matriz import matriz
+from rrhh.models import Recurso
+
+# Tope de tareas por propuesta: la página tiene que responder en forma interactiva
+LIMITE_TAREAS = 1000
+
+
+class ErrorAsignacion(Exception):
+    """Asignación masiva inválida (formato, tarea inexistente, etc.)"""
+
+
+def tareas_sin_asignar(proyecto_id=None, desde=None, hasta=None):
+    """Tareas abiertas sin responsable de un proyecto y/o que se cruzan con una ventana de fechas"""
+    tareas = Tarea.objects.filter(asignado_a__isnull=True, progreso__lt=100)
+    if proyecto_id:
+        tareas = tareas.filter(proyecto_id=proyecto_id)
+    if desde:
+        tareas = tareas.filter(fecha_fin__gte=desde)
+    if hasta:
+        tareas = tareas.filter(fecha_inicio__lte=hasta)
+    return tareas.select_related('proyecto').order_by('fecha_inicio', 'id')
+
+
+def _requisitos_por_tarea(tareas_ids):
+    """{tarea_id: tupla ordenada de conocimientos} con UNA consulta a la tabla intermedia"""
+    requisitos = defaultdict(list)
+    filas = Tarea.requisitos.through.objects.filter(tarea_id__in=tareas_ids).values_list('tarea_id', 'conocimiento_id')
+    for tarea_id, conocimiento_id in filas:
+        requisitos[tarea_id].append(conocimiento_id)
+    return {tid: tuple(sorted(cids)) for tid, cids in requisitos.items()}
+
+
+def _se_cruza(intervalos, inicio, fin):
+    return any(i <= fin and f >= inicio for i, f in intervalos)
+
+
+def proponer(tareas, recursos_ids=None, match_minimo=0):
+    """
+    Propuesta de asignación masiva, voraz con control de intervalos:
+    1. El match de cada tarea contra todos los recursos activos sale de la matriz de habilidades
+       (un cálculo vectorizado por cada combinación distinta de requisitos, no por tarea).
+    2. Primero se resuelven las tareas más difíciles de cubrir: las que tienen menos recursos
+       con su mejor match posible, luego las de mejor match y las que empiezan antes.
+    3. Cada tarea toma al recurso de mayor match que esté libre en sus fechas, según el índice
+       de ocupación MÁS lo ya propuesto en esta misma corrida (nadie queda con fechas cruzadas).
+
+    tareas: lista de Tarea (sin responsable). Devuelve (propuesta, sin_candidato):
+      propuesta: lista de dicts {tarea, recurso_id, match}
+      sin_candidato: lista de tareas que no encontraron a nadie libre con match >= match_minimo
+    """
+    tareas = list(tareas)[:LIMITE_TAREAS]
+    requisitos = _requisitos_por_tarea([t.id for t in tareas])
+
+    # 1. Un vector de puntajes por combinación de requisitos, con los recursos ordenados por match
+    por_combinacion = {}
+    for combinacion in {requisitos.get(t.id, ()) for t in tareas}:
+        ids, puntajes = matriz.puntajes(list(combinacion), recursos_ids=recursos_ids, solo_activos=True)
+        orden = np.lexsort((ids, -puntajes))
+        ids, puntajes = ids[orden], puntajes[orden]
+        mejor = int(puntajes[0]) if len(puntajes) else 0
+        por_combinacion[combinacion] = (ids.tolist(), puntajes.tolist(), mejor, int((puntajes == mejor).sum()))
+
+    # 2. Orden de resolución
+    def dificultad(tarea):
+        _, _, mejor, empatados = por_combinacion[requisitos.get(tarea.id, ())]
+        return (empatados, -mejor, tarea.fecha_inicio, tarea.id)
+
+    # 3. Voraz: el mejor candidato libre para cada tarea
+    propuestos = defaultdict(list)  # recurso_id -> [(inicio, fin)] asignados en esta propuesta
+    propuesta, sin_candidato = [], []
+    for tarea in sorted(tareas, key=dificultad):
+        ids, puntajes, _, _ = por_combinacion[requisitos.get(tarea.id, ())]
+        elegido = None
+        for recurso_id, match in zip(ids, puntajes):
+            if match < match_minimo:
+                break
+            if _se_cruza(propuestos.get(recurso_id, ()), tarea.fecha_inicio, tarea.fecha_fin):
+                continue
+            if indice.ocupado(recurso_id, tarea.fecha_inicio, tarea.fecha_fin):
+                continue
+            elegido = (recurso_id, match)
+            break
+
+        if elegido is None:
+            sin_candidato.append(tarea)
+            continue
+        propuestos[elegido[0]].append((tarea.fecha_inicio, tarea.fecha_fin))
+        propuesta.append({'tarea': tarea, 'recurso_id': elegido[0], 'match': elegido[1]})
+
+    # Para mostrar: nombres de los recursos elegidos en una consulta
+    nombres = dict(Recurso.objects.filter(id__in=propuestos.keys()).values_list('id', 'nombre'))
+    for item in propuesta:
+        item['recurso'] = nombres.get(item['recurso_id'], '')
+    propuesta.sort(key=lambda x: (x['tarea'].fecha_inicio, x['tarea'].id))
+    return propuesta, sin_candidato
+
+
+def aplicar(pares):
+    """
+    Guarda una propuesta (lista de (tarea_id, recurso_id)) con un solo bulk_update.
+    Se vuelve a verificar todo dentro de la transacción: la tarea sigue sin responsable y el
+    recurso sigue libre (ni tareas existentes ni otra tarea de esta misma propuesta encima).
+    Los recursos quedan bloqueados (select_for_update) y la ocupación se lee de la base de datos,
+    no del índice en memoria: dos aplicaciones simultáneas no pueden darle fechas cruzadas a nadie.
+    Devuelve (asignadas, omitidas): las tareas guardadas y los ids que se saltaron por conflicto.
+    """
+    try:
+        pares = [(int(t), int(r)) for t, r in pares]
+    except (TypeError, ValueError):
+        raise ErrorAsignacion("Formato de asignación inválido.")
+    if len({t for t, _ in pares}) != len(pares):
+        raise ErrorAsignacion("Una tarea aparece más de una vez en la propuesta.")
+
+    with transaction.atomic():
+        tareas = Tarea.objects.select_for_update().in_bulk([t for t, _ in pares])
+        faltantes = {t for t, _ in pares} - set(tareas)
+        if faltantes:
+            raise ErrorAsignacion(f"Tarea no encontrada: {', '.join(map(str, sorted(faltantes)))}")
+        validos = set(Recurso.objects.select_for_update().filter(
+            id__in={r for _, r in pares}, activo=True
+        ).order_by('id').values_list('id', flat=True))
+
+        # Tareas abiertas de esos recursos en el rango de la propuesta, en una consulta
+        # (con los recursos ya bloqueados, nadie más puede asignarles tareas hasta el commit)
+        ocupados = defaultdict(list)
+        if validos:
+            existentes = Tarea.objects.filter(
+                asignado_a_id__in=validos, progreso__lt=100,
+                fecha_inicio__lte=max(t.fecha_fin for t in tareas.values()),
+                fecha_fin__gte=min(t.fecha_inicio for t in tareas.values()),
+            ).exclude(id__in=tareas.keys()).values_list('asignado_a_id', 'fecha_inicio', 'fecha_fin')
+            for recurso_id, inicio, fin in existentes:
+                ocupados[recurso_id].append((inicio, fin))
+
+        asignadas, omitidas = [], []
+        for tarea_id, recurso_id in sorted(pares, key=lambda p: (tareas[p[0]].fecha_inicio, p[0])):
+            tarea = tareas[tarea_id]
+            if (tarea.asignado_a_id is not None or recurso_id not in validos
+                    or _se_cruza(ocupados[recurso_id], tarea.fecha_inicio, tarea.fecha_fin)):
+                omitidas.append(tarea_id)
+                continue
+            tarea.asignado_a_id = recurso_id
+            ocupados[recurso_id].append((tarea.fecha_inicio, tarea.fecha_fin))
+            asignadas.append(tarea)
+
+        Tarea.objects.bulk_update(asignadas, ['asignado_a'], batch_size=1000)
+        tareas_actualizadas.send(sender=Tarea, tareas=asignadas)
+
+    return asignadas, omitidas
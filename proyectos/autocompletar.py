@@ -0,0 +1,177 @@
+import heapq
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.core.cache import cache
+
+# Cada cuántos segundos se revisa si otro proceso modificó el catálogo
+INTERVALO_VERIFICACION = 1.0
+
+LIMITE_POR_DEFECTO = 10
+LIMITE_MAXIMO = 50
+
+# Similitud mínima (trigramas en común / trigramas de la búsqueda) para el respaldo difuso
+SIMILITUD_MINIMA = 0.4
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y con los espacios colapsados: 'José  Muñoz' -> 'jose munoz'"""
+    texto = unicodedata.normalize('NFKD', str(texto).casefold())
+    return ' '.join(''.join(c for c in texto if not unicodedata.combining(c)).split())
+
+
+def _trigramas(texto):
+    texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _recursos():
+    from rrhh.models import Recurso
+    filas = Recurso.objects.values_list('id', 'nombre', 'email', 'perfil__nombre', 'activo')
+    return [
+        (rid, nombre, f"{nombre} {email or ''} {perfil}", {'detalle': perfil, 'activo': activo})
+        for rid, nombre, email, perfil, activo in filas
+    ]
+
+
+def _proyectos():
+    from .models import Proyecto
+    filas = Proyecto.objects.values_list('id', 'nombre', 'centro_costo')
+    return [(pid, nombre, f"{nombre} {centro}", {'detalle': centro}) for pid, nombre, centro in filas]
+
+
+def _conocimientos():
+    from rrhh.models import Conocimiento
+    filas = Conocimiento.objects.values_list('id', 'nombre', 'categoria')
+    return [(cid, nombre, f"{nombre} {categoria}", {'detalle': categoria}) for cid, nombre, categoria in filas]
+
+
+CATALOGOS = {'recurso': _recursos, 'proyecto': _proyectos, 'conocimiento': _conocimientos}
+
+
+class _Catalogo:
+    """
+    Índice de un modelo: palabras ordenadas (búsqueda por prefijo con bisect) y trigramas
+    (respaldo para errores de tipeo o texto en medio de una palabra). Las entradas se guardan
+    ordenadas por nombre, así el número de entrada ya es el orden alfabético.
+    """
+
+    def __init__(self, filas):
+        filas.sort(key=lambda f: (normalizar(f[1]), f[0]))
+        self.entradas = [{'id': fid, 'nombre': nombre, **extra} for fid, nombre, _, extra in filas]
+        self.nombres = [normalizar(f[1]) for f in filas]
+        self.indices = {e['id']: i for i, e in enumerate(self.entradas)}
+
+        palabras = []
+        trigramas = defaultdict(set)
+        for i, (_, _, texto, _) in enumerate(filas):
+            normalizado = normalizar(texto)
+            for palabra in set(normalizado.split()):
+                palabras.append((palabra, i))
+            for trigrama in _trigramas(normalizado):
+                trigramas[trigrama].add(i)
+        palabras.sort()
+        self.palabras = [p for p, _ in palabras]
+        self.posiciones = [i for _, i in palabras]
+        self.trigramas = dict(trigramas)
+
+    def _con_prefijo(self, prefijo):
+        """Entradas con alguna palabra que empieza con 'prefijo'"""
+        encontradas = set()
+        k = bisect_left(self.palabras, prefijo)
+        while k < len(self.palabras) and self.palabras[k].startswith(prefijo):
+            encontradas.add(self.posiciones[k])
+            k += 1
+        return encontradas
+
+    def buscar(self, consulta, limite, filtro=None):
+        consulta = normalizar(consulta)
+        if not consulta:
+            return []
+
+        # 1. Todas las palabras de la consulta deben ser prefijo de alguna palabra de la entrada
+        candidatas = None
+        for palabra in sorted(set(consulta.split()), key=len, reverse=True):
+            encontradas = self._con_prefijo(palabra)
+            candidatas = encontradas if candidatas is None else candidatas & encontradas
+            if not candidatas:
+                break
+        if filtro:
+            candidatas = {i for i in candidatas if filtro(self.entradas[i])}
+        # Primero las que empiezan igual que la consulta, luego alfabético (= número de entrada)
+        elegidas = heapq.nsmallest(limite, candidatas, key=lambda i: (not self.nombres[i].startswith(consulta), i))
+
+        # 2. Si faltan, las más parecidas por trigramas
+        if len(elegidas) < limite:
+            buscados = _trigramas(consulta)
+            conteo = defaultdict(int)
+            for trigrama in buscados:
+                for i in self.trigramas.get(trigrama, ()):
+                    conteo[i] += 1
+            minimo = SIMILITUD_MINIMA * len(buscados)
+            parecidas = [
+                i for i, n in conteo.items()
+                if n >= minimo and i not in candidatas and (not filtro or filtro(self.entradas[i]))
+            ]
+            elegidas += heapq.nsmallest(limite - len(elegidas), parecidas, key=lambda i: (-conteo[i], i))
+
+        return [self.entradas[i] for i in elegidas]
+
+    def por_id(self, ids):
+        return [self.entradas[self.indices[i]] for i in ids if i in self.indices]
+
+
+class Autocompletar:
+    """
+    Índices en memoria de Recurso, Proyecto y Conocimiento para los buscadores de las pantallas.
+    Se construyen al primer uso y se invalidan con las señales de cada modelo (ver signals.py);
+    la versión en el cache avisa a los demás procesos.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._catalogos = {}
+        self._versiones = {}
+        self._verificados = {}
+
+    @staticmethod
+    def _clave_version(tipo):
+        return f'autocompletar:{tipo}:version'
+
+    def _catalogo(self, tipo):
+        ahora = time.monotonic()
+        catalogo = self._catalogos.get(tipo)
+        if catalogo is not None and ahora - self._verificados.get(tipo, 0) < INTERVALO_VERIFICACION:
+            return catalogo
+        version = cache.get(self._clave_version(tipo))
+        with self._lock:
+            catalogo = self._catalogos.get(tipo)
+            if catalogo is None or version != self._versiones.get(tipo):
+                catalogo = self._catalogos[tipo] = _Catalogo(CATALOGOS[tipo]())
+                self._versiones[tipo] = version
+            self._verificados[tipo] = ahora
+        return catalogo
+
+    def buscar(self, tipo, consulta, limite=LIMITE_POR_DEFECTO, filtro=None):
+        """Hasta 'limite' entradas {'id', 'nombre', 'detalle', ...} que coinciden con la consulta"""
+        return self._catalogo(tipo).buscar(consulta, limite, filtro)
+
+    def por_id(self, tipo, ids):
+        """Entradas de los ids dados (para mostrar lo ya seleccionado en un filtro)"""
+        return self._catalogo(tipo).por_id(ids)
+
+    def invalidar(self, *tipos):
+        """Reconstruye en el próximo uso los catálogos indicados (todos si no se indica ninguno)"""
+        with self._lock:
+            for tipo in tipos or CATALOGOS:
+                self._catalogos.pop(tipo, None)
+                try:
+                    cache.incr(self._clave_version(tipo))
+                except ValueError:
+                    cache.set(self._clave_version(tipo), 1, None)
+
+
+autocompletar = Autocompletar()
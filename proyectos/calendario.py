@@ -0,0 +1,241 @@
+"""
+Calendario laboral: semana laboral (settings.CALENDARIO['SEMANA_LABORAL']) más los feriados de la
+tabla Feriado, como un np.busdaycalendar. Todas las cuentas de días hábiles pasan por aquí y aceptan
+tanto una fecha como arreglos: busday_count/busday_offset resuelven miles de tareas de una vez.
+
+Las ausencias de cada recurso (rrhh.Ausencia) no son parte del calendario común: las consultan
+quienes las necesitan (huecos, capacidad, disponibilidad) con ausencias().
+"""
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+CONFIGURACION = {
+    'SEMANA_LABORAL': '1111100',  # lunes a viernes
+}
+
+CLAVE_VERSION = 'calendario:version'
+
+# Cada cuántos segundos se revisa si otro proceso modificó los feriados
+INTERVALO_VERIFICACION = 1.0
+
+# datetime64[D] cuenta días desde 1970-01-01; los ordinales (date.toordinal) desde el año 1
+_EPOCA = date(1970, 1, 1).toordinal()
+
+
+def configuracion():
+    return {**CONFIGURACION, **getattr(settings, 'CALENDARIO', {})}
+
+
+def a_dias(fechas):
+    """date, lista de date o arreglo de ordinales enteros -> datetime64[D]"""
+    if isinstance(fechas, np.ndarray) and fechas.dtype.kind in 'iu':
+        return (fechas.astype(np.int64) - _EPOCA).astype('datetime64[D]')
+    return np.asarray(fechas, dtype='datetime64[D]')
+
+
+def a_ordinales(dias):
+    """datetime64[D] -> ordinales enteros (date.toordinal)"""
+    return np.asarray(dias, dtype='datetime64[D]').astype(np.int64) + _EPOCA
+
+
+def _salida(resultado):
+    # Con una fecha suelta se devuelve date/int de Python; con arreglos, el arreglo
+    return resultado.item() if np.ndim(resultado) == 0 else resultado
+
+
+class Calendario:
+    """
+    Feriados y semana laboral cargados una vez por proceso. Los cambios en Feriado (señales, o el
+    comando cargar_feriados) suben una versión compartida en el cache que obliga a recargar.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._calendario = None
+        self._origen = None
+        self._version = None
+        self._verificado = 0.0
+
+    # --- CONSTRUCCIÓN Y MANTENIMIENTO ---
+
+    def _cargar(self):
+        from .models import Feriado
+
+        feriados = list(Feriado.objects.values_list('fecha', flat=True))
+        self._calendario = np.busdaycalendar(
+            weekmask=configuracion()['SEMANA_LABORAL'], holidays=np.array(feriados, dtype='datetime64[D]')
+        )
+        # Primer día hábil desde el 3 de enero de 2000: el cero de la numeración de días hábiles
+        self._origen = np.busday_offset('2000-01-03', 0, roll='forward', busdaycal=self._calendario)
+
+    def _asegurar(self):
+        ahora = time.monotonic()
+        if self._calendario is not None and ahora - self._verificado < INTERVALO_VERIFICACION:
+            return
+        version = cache.get(CLAVE_VERSION)
+        with self._lock:
+            if self._calendario is None or version != self._version:
+                self._cargar()
+                self._version = version
+            self._verificado = ahora
+
+    def invalidar(self):
+        """Recarga los feriados en el próximo uso, en este y en los demás procesos"""
+        with self._lock:
+            self._calendario = None
+            try:
+                cache.incr(CLAVE_VERSION)
+            except ValueError:
+                cache.set(CLAVE_VERSION, 1, None)
+
+    def version(self):
+        """Cambia cada vez que cambian los feriados: para las claves de cache que dependen del calendario"""
+        with self._lock:
+            self._asegurar()
+            return self._version or 0
+
+    def busdaycalendar(self):
+        with self._lock:
+            self._asegurar()
+            return self._calendario
+
+    # --- CUENTAS (fechas sueltas o arreglos) ---
+
+    def dias_habiles(self, desde, hasta):
+        """Días hábiles entre desde y hasta, ambos incluidos (0 si hasta < desde)"""
+        desde, hasta = a_dias(desde), a_dias(hasta) + np.timedelta64(1, 'D')
+        cuenta = np.busday_count(desde, np.maximum(hasta, desde), busdaycal=self.busdaycalendar())
+        return _salida(cuenta)
+
+    def sumar(self, fechas, dias):
+        """El día hábil que está 'dias' días hábiles después (si fecha no es hábil, se cuenta desde el siguiente)"""
+        return _salida(np.busday_offset(a_dias(fechas), dias, roll='forward', busdaycal=self.busdaycalendar()))
+
+    def siguiente_habil(self, fechas):
+        """La misma fecha si es hábil, si no el próximo día hábil"""
+        return self.sumar(fechas, 0)
+
+    def es_habil(self, fechas):
+        return _salida(np.is_busday(a_dias(fechas), busdaycal=self.busdaycalendar()))
+
+    def mover(self, inicios, fines, nuevos_inicios):
+        """
+        (inicio, fin) de tareas que pasan a empezar en nuevos_inicios (o el día hábil siguiente)
+        conservando sus días hábiles (al menos uno).
+        """
+        calendario = self.busdaycalendar()
+        duracion = np.maximum(np.busday_count(a_dias(inicios), a_dias(fines) + np.timedelta64(1, 'D'), busdaycal=calendario), 1)
+        inicio = np.busday_offset(a_dias(nuevos_inicios), 0, roll='forward', busdaycal=calendario)
+        return _salida(inicio), _salida(np.busday_offset(inicio, duracion - 1, busdaycal=calendario))
+
+    def numero(self, fechas):
+        """
+        Número de día hábil (0 = primer día hábil de 2000): la fecha si es hábil, si no el siguiente.
+        Con estos números, sumar o restar días hábiles es aritmética de enteros (ver ruta_critica.py).
+        """
+        with self._lock:
+            self._asegurar()
+            calendario, origen = self._calendario, self._origen
+        return _salida(np.busday_count(origen, a_dias(fechas), busdaycal=calendario))
+
+    def fecha(self, numeros):
+        """Inverso de numero(): datetime64[D] (o date) del día hábil con ese número"""
+        with self._lock:
+            self._asegurar()
+            calendario, origen = self._calendario, self._origen
+        return _salida(np.busday_offset(origen, numeros, roll='forward', busdaycal=calendario))
+
+
+def ausencias(recursos, desde, hasta):
+    """
+    Ausencias que se cruzan con [desde, hasta]: lista de (recurso_id, desde, hasta, motivo).
+    'recursos': ids o un queryset de Recurso (se usa como subconsulta).
+    """
+    from rrhh.models import Ausencia
+
+    if not isinstance(recursos, (list, tuple, set)):
+        recursos = recursos.values('id')
+    return list(Ausencia.objects.filter(recurso__in=recursos, desde__lte=hasta, hasta__gte=desde).order_by(
+        'recurso_id', 'desde'
+    ).values_list('recurso_id', 'desde', 'hasta', 'motivo'))
+
+
+# --- FERIADOS LEGALES DE CHILE ---
+
+def _pascua(anio):
+    """Domingo de Pascua (algoritmo anónimo gregoriano)"""
+    a, b, c = anio % 19, anio // 100, anio % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(anio, mes, dia + 1)
+
+
+def _al_lunes(fecha):
+    """Ley 19.668: de martes a jueves pasa al lunes anterior, el viernes al lunes siguiente"""
+    if fecha.weekday() in (1, 2, 3):
+        return fecha - timedelta(days=fecha.weekday())
+    if fecha.weekday() == 4:
+        return fecha + timedelta(days=3)
+    return fecha
+
+
+# Día Nacional de los Pueblos Indígenas (Ley 21.357): el solsticio de invierno, 20 o 21 de junio
+SOLSTICIOS = {2021: 21, 2022: 21, 2023: 21, 2024: 20, 2025: 20, 2026: 21, 2027: 21, 2028: 20, 2029: 20, 2030: 21}
+
+
+def feriados_chile(anio):
+    """
+    Feriados nacionales de Chile del año: lista de (fecha, nombre). No incluye los regionales ni los
+    de elecciones, que se agregan a mano (admin) o desde un CSV (comando cargar_feriados --archivo).
+    """
+    pascua = _pascua(anio)
+    feriados = [
+        (date(anio, 1, 1), "Año Nuevo"),
+        (pascua - timedelta(days=2), "Viernes Santo"),
+        (pascua - timedelta(days=1), "Sábado Santo"),
+        (date(anio, 5, 1), "Día Nacional del Trabajo"),
+        (date(anio, 5, 21), "Día de las Glorias Navales"),
+        (_al_lunes(date(anio, 6, 29)), "San Pedro y San Pablo"),
+        (date(anio, 7, 16), "Día de la Virgen del Carmen"),
+        (date(anio, 8, 15), "Asunción de la Virgen"),
+        (date(anio, 9, 18), "Independencia Nacional"),
+        (date(anio, 9, 19), "Día de las Glorias del Ejército"),
+        (_al_lunes(date(anio, 10, 12)), "Encuentro de Dos Mundos"),
+        (date(anio, 11, 1), "Día de Todos los Santos"),
+        (date(anio, 12, 8), "Inmaculada Concepción"),
+        (date(anio, 12, 25), "Navidad"),
+    ]
+    if date(anio, 1, 1).weekday() == 6:
+        feriados.append((date(anio, 1, 2), "Feriado adicional de Año Nuevo"))
+    if anio >= 2021:
+        dia = SOLSTICIOS.get(anio, 20 if anio % 4 in (0, 1) else 21)
+        feriados.append((date(anio, 6, dia), "Día Nacional de los Pueblos Indígenas"))
+    if date(anio, 9, 18).weekday() == 1:
+        feriados.append((date(anio, 9, 17), "Feriado adicional de Fiestas Patrias"))
+    if date(anio, 9, 19).weekday() == 3:
+        feriados.append((date(anio, 9, 20), "Feriado adicional de Fiestas Patrias"))
+
+    # Día de las Iglesias Evangélicas (Ley 20.299): si cae martes pasa al viernes anterior, si cae miércoles al siguiente
+    evangelicas = date(anio, 10, 31)
+    if evangelicas.weekday() == 1:
+        evangelicas -= timedelta(days=4)
+    elif evangelicas.weekday() == 2:
+        evangelicas += timedelta(days=2)
+    feriados.append((evangelicas, "Día de las Iglesias Evangélicas y Protestantes"))
+
+    return sorted(feriados)
+
+
+# Instancia única por proceso
+calendario = Calendario()
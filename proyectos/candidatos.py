@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from .calendario import ausencias, calendario
+from .ocupacion import indice
+from rrhh.models import Ausencia, Habilidad
+from rrhh.matriz import matriz
+
+# Etiquetas de nivel ("3 - Intermedio") sin tener que instanciar cada Habilidad
+NIVELES = dict(Habilidad.NIVELES)
+MOTIVOS_AUSENCIA = dict(Ausencia.MOTIVOS)
+
+
+def evaluar_candidatos(recursos, requisitos, fecha_inicio, fecha_fin):
+    """
+    Calcula ocupación, fecha de liberación y match técnico para todo el grupo
+    de recursos sin consultas por recurso: la ocupación sale del índice en memoria
+    y los niveles de la matriz de habilidades. Una ausencia (rrhh.Ausencia) que toca
+    el rango también deja al recurso ocupado.
+    Devuelve la lista de candidatos ya ordenada, igual que buscar_disponibilidad.
+    """
+    requisitos = list(requisitos)
+    recursos = list(recursos)
+
+    # 1. OCUPACIÓN: se resuelve contra el índice en memoria, más una consulta por las ausencias
+    ids = [r.id for r in recursos]
+    ocupados_ids = indice.ocupados(fecha_inicio, fecha_fin, ids)
+    # La ausencia que termina más tarde de cada recurso (vienen ordenadas por fecha de inicio)
+    ausentes = {}
+    for recurso_id, _, hasta, motivo in ausencias(ids, fecha_inicio, fecha_fin):
+        if recurso_id not in ausentes or hasta > ausentes[recurso_id][0]:
+            ausentes[recurso_id] = (hasta, motivo)
+
+    # Si está ocupado, cuándo se libera: el día hábil siguiente a la tarea que termina más tarde
+    # desde el inicio buscado o al fin de la ausencia. Todos los días hábiles de una vez
+    ultimas, liberaciones = {}, {}
+    for recurso_id in ocupados_ids.union(ausentes):
+        ultimas[recurso_id] = indice.ultima_tarea(recurso_id, fecha_inicio) if recurso_id in ocupados_ids else None
+        fines = [ultimas[recurso_id].fin] if ultimas[recurso_id] else []
+        if recurso_id in ausentes:
+            fines.append(ausentes[recurso_id][0])
+        liberaciones[recurso_id] = max(fines) + timedelta(days=1)
+    if liberaciones:
+        siguientes = calendario.siguiente_habil(list(liberaciones.values())).tolist()
+        liberaciones = dict(zip(liberaciones, siguientes))
+
+    # 2. HABILIDADES Y MATCH: submatriz de niveles desde la matriz en memoria, puntaje vectorizado
+    if requisitos:
+        niveles = matriz.niveles([r.id for r in recursos], [req.id for req in requisitos])
+        puntajes = matriz.puntaje(niveles).tolist()
+        niveles = niveles.tolist()
+
+    # 3. ARMADO DE CANDIDATOS
+    candidatos = []
+    for i, recurso in enumerate(recursos):
+        match_score = 100
+        detalles = []
+
+        if requisitos:
+            match_score = puntajes[i]
+            for req, nivel in zip(requisitos, niveles[i]):
+                if nivel:
+                    detalles.append({'skill': req.nombre, 'nivel': NIVELES.get(nivel, nivel), 'cumple': True})
+                else:
+                    detalles.append({'skill': req.nombre, 'nivel': '---', 'cumple': False})
+
+        ocupado = recurso.id in liberaciones
+        ultima_tarea = ultimas.get(recurso.id)
+        if recurso.id in ausentes and (not ultima_tarea or ausentes[recurso.id][0] >= ultima_tarea.fin):
+            tarea_actual = MOTIVOS_AUSENCIA.get(ausentes[recurso.id][1], "Ausente")
+        else:
+            tarea_actual = ultima_tarea.nombre if ultima_tarea else ""
+
+        candidatos.append({
+            'perfil': recurso,
+            'match': match_score,
+            'ocupado': ocupado,
+            'fecha_liberacion': liberaciones.get(recurso.id),
+            'tarea_actual': tarea_actual,
+            'detalles': detalles
+        })
+
+    # 4. ORDENAMIENTO: primero por Match (mayor a menor), luego libres primero
+    candidatos.sort(key=lambda x: (not x['ocupado'], x['match']), reverse=True)
+    return candidatos
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from . import calendario as calendario_laboral
+from .models import Tarea
+
+ESCALAS = ('semana', 'dia')
+SEMANAS_POR_DEFECTO = 26
+DIAS_MAXIMOS = 2 * 366
+
+
+def ventana_por_defecto():
+    """Desde el lunes de esta semana, SEMANAS_POR_DEFECTO semanas hacia adelante"""
+    hoy = timezone.localdate()
+    lunes = hoy - timedelta(days=hoy.weekday())
+    return lunes, lunes + timedelta(weeks=SEMANAS_POR_DEFECTO, days=-1)
+
+
+def matriz_capacidad(recursos, desde, hasta, escala='semana', unidad_negocio=None, centro_costo=None):
+    """
+    Carga de cada recurso en el tiempo: cuántas tareas abiertas (progreso < 100) tiene en paralelo.
+    Arreglo de diferencias por día (+1 al empezar cada tarea, -1 el día siguiente a su fin)
+    armado en una sola pasada con bincount, y después una suma acumulada por fila.
+    Con escala 'semana' la ventana se alinea a lunes-domingo y cada celda resume 7 días.
+
+    recursos: queryset de Recurso (ya filtrado). Los filtros de unidad_negocio y centro_costo
+    aplican a los proyectos de las tareas.
+
+    Devuelve dict con:
+      recursos: lista de (id, nombre, perfil) en el orden de las filas
+      columnas: fecha de inicio de cada columna
+      carga:    float (recursos x columnas), tareas en paralelo promedio de los días hábiles de la columna
+      pico:     int (recursos x columnas), máximo de tareas en paralelo en algún día hábil de la columna
+      habiles:  días hábiles de cada columna
+    Las ausencias del recurso (rrhh.Ausencia) cuentan como una tarea más en esos días.
+    """
+    if escala == 'semana':
+        desde = desde - timedelta(days=desde.weekday())
+        hasta = hasta + timedelta(days=6 - hasta.weekday())
+    dias = (hasta - desde).days + 1
+
+    filas = list(recursos.order_by('nombre', 'id').values_list('id', 'nombre', 'perfil__nombre'))
+    ids = np.array([f[0] for f in filas], dtype=np.int64)
+    orden = np.argsort(ids)
+
+    tareas = Tarea.objects.filter(
+        asignado_a__in=recursos.values('id'), progreso__lt=100,
+        fecha_inicio__lte=hasta, fecha_fin__gte=desde,
+    )
+    if unidad_negocio:
+        tareas = tareas.filter(proyecto__unidad_negocio=unidad_negocio)
+    if centro_costo:
+        tareas = tareas.filter(proyecto__centro_costo=centro_costo)
+
+    # 1. Una sola pasada en Python: las fechas como ordinales (convertir date a datetime64 es mucho más lento)
+    asignados, inicios, fines = [], [], []
+    for recurso_id, inicio, fin in tareas.order_by().values_list('asignado_a_id', 'fecha_inicio', 'fecha_fin').iterator(chunk_size=5000):
+        asignados.append(recurso_id)
+        inicios.append(inicio.toordinal())
+        fines.append(fin.toordinal())
+
+    # 2. Arreglo de diferencias: una fila por recurso, una columna extra para el -1 después del último día
+    ancho = dias + 1
+    diferencias = np.zeros(len(ids) * ancho, dtype=np.int32)
+    origen = desde.toordinal()
+    if asignados:
+        fila = orden[np.searchsorted(ids, np.array(asignados, dtype=np.int64), sorter=orden)]
+        inicio = np.clip(np.array(inicios, dtype=np.int64) - origen, 0, dias)
+        fin = np.clip(np.array(fines, dtype=np.int64) - origen + 1, 0, dias)
+        base = fila * ancho
+        diferencias += np.bincount(base + inicio, minlength=diferencias.size).astype(np.int32)
+        diferencias -= np.bincount(base + fin, minlength=diferencias.size).astype(np.int32)
+
+    # 3. Las ausencias suman como una tarea a tiempo completo (el recurso no está disponible esos días).
+    #    Vienen ordenadas por recurso y fecha: las que se pisan se funden antes, así un día cuenta una vez
+    fundidas = []
+    for recurso_id, a_desde, a_hasta, _ in calendario_laboral.ausencias(recursos, desde, hasta):
+        if fundidas and fundidas[-1][0] == recurso_id and a_desde <= fundidas[-1][2] + timedelta(days=1):
+            fundidas[-1][2] = max(fundidas[-1][2], a_hasta)
+        else:
+            fundidas.append([recurso_id, a_desde, a_hasta])
+    for recurso_id, a_desde, a_hasta in fundidas:
+        fila = orden[np.searchsorted(ids, recurso_id, sorter=orden)] * ancho
+        diferencias[fila + max(a_desde.toordinal() - origen, 0)] += 1
+        diferencias[fila + min(a_hasta.toordinal() - origen + 1, dias)] -= 1
+
+    # 4. Suma acumulada por fila: tareas en paralelo de cada recurso en cada día. Sólo cuentan los
+    #    días hábiles (semana laboral y feriados, ver calendario.py)
+    habiles = calendario_laboral.calendario.es_habil(np.arange(dias) + origen)
+    diaria = np.cumsum(diferencias.reshape(len(ids), ancho), axis=1)[:, :dias] * habiles
+
+    if escala == 'semana':
+        semanal = diaria.reshape(len(ids), dias // 7, 7)
+        # Promedio sobre los días hábiles de cada semana (una semana sin ninguno queda en 0)
+        habiles_semana = habiles.reshape(dias // 7, 7).sum(axis=1)
+        carga = semanal.sum(axis=2) / np.maximum(habiles_semana, 1)
+        pico = semanal.max(axis=2)
+        columnas = [desde + timedelta(weeks=i) for i in range(dias // 7)]
+    else:
+        habiles_semana = habiles.astype(np.int64)
+        carga, pico = diaria.astype(float), diaria
+        columnas = [desde + timedelta(days=i) for i in range(dias)]
+
+    return {'recursos': filas, 'columnas': columnas, 'carga': carga, 'pico': pico, 'habiles': habiles_semana}
+
+
+def sobreasignados(mapa):
+    """Celdas con más de una tarea en paralelo algún día"""
+    return mapa['pico'] > 1
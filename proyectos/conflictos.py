@@ -0,0 +1,133 @@
+import heapq
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+
+from .ocupacion import Intervalo, indice, _a_fecha
+
+# Tramo de días en que un recurso tiene 2 o más tareas abiertas a la vez
+Conflicto = namedtuple('Conflicto', ['recurso_id', 'desde', 'hasta', 'profundidad', 'dias', 'tareas'])
+
+
+def verificacion_activa():
+    """El chequeo previo al guardar se puede apagar con VERIFICAR_CONFLICTOS = False en settings"""
+    return getattr(settings, 'VERIFICAR_CONFLICTOS', True)
+
+
+def barrer(recurso_id, intervalos):
+    """
+    Línea de barrido sobre los intervalos de UN recurso: cada tarea suma 1 el día que empieza
+    y resta 1 el día siguiente a su fin. Los eventos se ordenan (O(n log n)) y se recorren una vez,
+    juntando los tramos consecutivos con 2 o más tareas en paralelo.
+    Devuelve la lista de Conflicto del recurso, con la profundidad máxima y las tareas involucradas.
+    """
+    eventos = []
+    for i in intervalos:
+        eventos.append((i.inicio, 1, i))
+        eventos.append((i.fin + timedelta(days=1), -1, i))
+    eventos.sort(key=lambda e: (e[0], e[1], e[2].id))
+
+    conflictos = []
+    activas = {}
+    tramo = None  # [desde, profundidad, {id: Intervalo}]
+    # Se aplican todos los eventos de un mismo día antes de mirar cuántas quedan en paralelo
+    for dia, del_dia in groupby(eventos, key=lambda e: e[0]):
+        for _, cambio, intervalo in del_dia:
+            if cambio > 0:
+                activas[intervalo.id] = intervalo
+            else:
+                activas.pop(intervalo.id, None)
+
+        if len(activas) >= 2:
+            if tramo is None:
+                tramo = [dia, 0, {}]
+            tramo[1] = max(tramo[1], len(activas))
+            tramo[2].update(activas)
+        elif tramo is not None:
+            # El tramo cerró el día anterior a este evento
+            hasta = dia - timedelta(days=1)
+            tareas = sorted(tramo[2].values(), key=lambda i: (i.inicio, i.id))
+            conflictos.append(Conflicto(recurso_id, tramo[0], hasta, tramo[1], (hasta - tramo[0]).days + 1, tareas))
+            tramo = None
+    return conflictos
+
+
+def detectar(recursos_ids=None, desde=None, hasta=None):
+    """
+    Conflictos de todos los recursos (o de los pedidos) a partir del índice de ocupación,
+    opcionalmente recortados a [desde, hasta]. Ordenados por fecha y recurso.
+    """
+    desde, hasta = _a_fecha(desde), _a_fecha(hasta)
+    conflictos = []
+    for recurso_id, intervalos in indice.intervalos(recursos_ids).items():
+        if desde or hasta:
+            intervalos = [
+                i for i in intervalos
+                if (hasta is None or i.inicio <= hasta) and (desde is None or i.fin >= desde)
+            ]
+        if len(intervalos) < 2:
+            continue
+        for c in barrer(recurso_id, intervalos):
+            inicio = max(c.desde, desde) if desde else c.desde
+            fin = min(c.hasta, hasta) if hasta else c.hasta
+            conflictos.append(c._replace(desde=inicio, hasta=fin, dias=(fin - inicio).days + 1))
+
+    conflictos.sort(key=lambda c: (c.desde, c.recurso_id))
+    return conflictos
+
+
+def verificar(tareas):
+    """
+    Chequeo previo al guardar: para cada tarea (ya con su responsable y fechas NUEVAS, sin guardar)
+    devuelve las tareas abiertas del mismo recurso que se le cruzarían. Consulta el índice en memoria
+    (bisect sobre la agenda del recurso), así que no agrega consultas a la base.
+    Las tareas del mismo lote se comparan entre sí con sus valores nuevos, no con los del índice:
+    por recurso, ordenadas por inicio, con una línea de barrido (O(n log n) más los cruces encontrados).
+
+    Devuelve lista de dicts {'tarea': Tarea, 'cruces': [Intervalo, ...]} sólo de las que chocan.
+    """
+    lote = [t for t in tareas if t.asignado_a_id and t.progreso < 100]
+    ids_lote = {t.id for t in tareas}
+    nuevos = [Intervalo(_a_fecha(t.fecha_inicio), _a_fecha(t.fecha_fin), t.id, t.nombre) for t in lote]
+
+    # Cruces dentro del lote: las que siguen activas (fin >= inicio de la actual) en un heap por fecha de fin
+    del_lote = defaultdict(list)
+    por_recurso = defaultdict(list)
+    for posicion, tarea in enumerate(lote):
+        por_recurso[tarea.asignado_a_id].append(posicion)
+    for posiciones in por_recurso.values():
+        activas = []
+        for posicion in sorted(posiciones, key=lambda p: nuevos[p].inicio):
+            while activas and activas[0][0] < nuevos[posicion].inicio:
+                heapq.heappop(activas)
+            for _, otra in activas:
+                del_lote[posicion].append(nuevos[otra])
+                del_lote[otra].append(nuevos[posicion])
+            heapq.heappush(activas, (nuevos[posicion].fin, posicion))
+
+    resultado = []
+    for posicion, tarea in enumerate(lote):
+        inicio, fin = nuevos[posicion].inicio, nuevos[posicion].fin
+        cruces = [i for i in indice.solapadas(tarea.asignado_a_id, inicio, fin) if i.id not in ids_lote]
+        cruces += del_lote[posicion]
+        if cruces:
+            resultado.append({'tarea': tarea, 'cruces': cruces})
+    return resultado
+
+
+def a_json(verificacion):
+    """Resultado de verificar() listo para JsonResponse"""
+    return [
+        {
+            'id': str(item['tarea'].id),
+            'tarea': item['tarea'].nombre,
+            'recurso_id': item['tarea'].asignado_a_id,
+            'cruces': [
+                {'id': str(i.id), 'nombre': i.nombre, 'start': i.inicio.isoformat(), 'end': i.fin.isoformat()}
+                for i in item['cruces']
+            ],
+        }
+        for item in verificacion
+    ]
@@ -0,0 +1,166 @@
+import random
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+
+from . import agregados, ruta_critica, tablero
+from .autocompletar import autocompletar
+from .models import Proyecto, Tarea
+from .ocupacion import indice
+from rrhh.matriz import matriz
+from rrhh.models import Perfil, Recurso, Conocimiento, Habilidad
+
+# Tamaños predefinidos (los usa también el comando benchmark)
+ESCALAS = {
+    'minima': {'recursos': 20, 'proyectos': 5, 'tareas_por_proyecto': 10, 'conocimientos': 15},
+    'chica': {'recursos': 100, 'proyectos': 40, 'tareas_por_proyecto': 25, 'conocimientos': 40},
+    'mediana': {'recursos': 1000, 'proyectos': 400, 'tareas_por_proyecto': 50, 'conocimientos': 150},
+    'grande': {'recursos': 5000, 'proyectos': 2000, 'tareas_por_proyecto': 100, 'conocimientos': 300},
+}
+
+PERFILES = [
+    'Ingeniero Junior', 'Ingeniero Semi Senior', 'Ingeniero Senior', 'Jefe de Proyecto',
+    'Técnico Nivel 1', 'Técnico Nivel 2', 'Técnico Nivel 3', 'Dibujante Proyectista', 'Programador PLC',
+]
+CATEGORIAS = {
+    '1. PLCs': ['PLC S7-1200', 'PLC S7-1500', 'PLC S7-300', 'ControlLogix', 'CompactLogix', 'Modicon M340'],
+    '2. HMI/SCADA': ['WinCC', 'FactoryTalk View', 'Ignition', 'InTouch', 'TIA Portal HMI'],
+    '3. Variadores': ['SINAMICS G120', 'PowerFlex 755', 'ATV930', 'ABB ACS880'],
+    '4. Instrumentación': ['Caudalímetros', 'Transmisores de presión', 'Analizadores', 'Calibración HART'],
+    '12. Redes': ['Red PROFIBUS DP', 'PROFINET', 'EtherNet/IP', 'Modbus TCP', 'Fibra óptica'],
+    '20. Energía': ['Media tensión', 'Protecciones eléctricas', 'Celdas', 'Estudios de coordinación'],
+}
+NOMBRES = ['Alejandro', 'Jairo', 'Camila', 'Felipe', 'Valentina', 'Matías', 'Javiera', 'Sebastián',
+           'Constanza', 'Tomás', 'Francisca', 'Diego', 'Catalina', 'Ignacio', 'Fernanda', 'Cristóbal']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva', 'Martínez',
+             'Sepúlveda', 'Morales', 'Rodríguez', 'López', 'Fuentes', 'Hernández', 'Torres']
+ACTIVIDADES = ['Ingeniería básica', 'Ingeniería de detalle', 'Programación PLC', 'Desarrollo SCADA',
+               'Montaje', 'Pruebas FAT', 'Pruebas SAT', 'Puesta en marcha', 'Documentación', 'Capacitación']
+PREFIJOS_CC = ['AU', 'AGRO', 'TEL', 'EN']
+
+LOTE = 2000
+
+
+def limpiar():
+    """Borra todos los datos de Proyectos y RRHH sin pasar por las señales (DELETE directo por tabla)"""
+    modelos = [Tarea.requisitos.through, Tarea, Proyecto, Habilidad, Recurso, Conocimiento, Perfil]
+    with transaction.atomic(), connection.cursor() as cursor:
+        for modelo in modelos:
+            cursor.execute(f"DELETE FROM {connection.ops.quote_name(modelo._meta.db_table)}")
+    _refrescar([])
+
+
+def _refrescar(proyectos_ids):
+    # bulk_create / DELETE no disparan señales: índices y caches se reconstruyen de una vez
+    indice.invalidar()
+    matriz.invalidar()
+    tablero.invalidar()
+    autocompletar.invalidar()
+    ruta_critica.invalidar(*proyectos_ids)
+
+
+def generar(recursos, proyectos, tareas_por_proyecto, conocimientos, habilidades_por_recurso=8, semilla=0):
+    """
+    Carga datos ficticios pero con forma realista: perfiles y conocimientos por categoría,
+    recursos con su matriz de habilidades, y proyectos con tareas en cadenas de predecesoras
+    (cada sucesora empieza después de que termina su predecesora). Todo con bulk_create.
+    Devuelve un dict con la cantidad de filas creadas por modelo.
+    """
+    azar = random.Random(semilla)
+    hoy = date.today()
+
+    with transaction.atomic():
+        perfiles = Perfil.objects.bulk_create([Perfil(nombre=n) for n in PERFILES])
+
+        nombres_conocimientos = [(c, n) for c, lista in CATEGORIAS.items() for n in lista]
+        lista_conocimientos = []
+        for i in range(conocimientos):
+            categoria, nombre = nombres_conocimientos[i % len(nombres_conocimientos)]
+            vuelta = i // len(nombres_conocimientos)
+            lista_conocimientos.append(Conocimiento(nombre=f"{nombre} v{vuelta + 1}" if vuelta else nombre, categoria=categoria))
+        lista_conocimientos = Conocimiento.objects.bulk_create(lista_conocimientos, batch_size=LOTE)
+
+        lista_recursos = Recurso.objects.bulk_create([
+            Recurso(
+                nombre=f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {i + 1}",
+                perfil=azar.choice(perfiles),
+                email=f"recurso{i + 1}@ejemplo.cl",
+                activo=azar.random() > 0.05,
+            )
+            for i in range(recursos)
+        ], batch_size=LOTE)
+
+        habilidades = []
+        por_recurso = min(habilidades_por_recurso, len(lista_conocimientos))
+        for recurso in lista_recursos:
+            for conocimiento in azar.sample(lista_conocimientos, por_recurso):
+                habilidades.append(Habilidad(recurso=recurso, conocimiento=conocimiento, nivel=azar.randint(1, 5)))
+        Habilidad.objects.bulk_create(habilidades, batch_size=LOTE)
+
+        lista_proyectos = Proyecto.objects.bulk_create([
+            Proyecto(
+                nombre=f"Proyecto {i + 1:05d}",
+                centro_costo=f"{azar.choice(PREFIJOS_CC)}{azar.randint(10000, 49999)}",
+                unidad_negocio=azar.choice(Proyecto.OPCIONES_UNIDAD)[0],
+                fecha_inicio=hoy + timedelta(days=azar.randint(-180, 180)),
+                fecha_fin_estimada=hoy + timedelta(days=azar.randint(181, 540)),
+            )
+            for i in range(proyectos)
+        ], batch_size=LOTE)
+
+        # Tareas en 1 a 4 cadenas por proyecto; se recuerda la posición de la predecesora en la lista
+        tareas, predecesoras = [], []
+        for proyecto in lista_proyectos:
+            cadenas = [proyecto.fecha_inicio] * azar.randint(1, 4)
+            ultimas = [None] * len(cadenas)
+            for n in range(tareas_por_proyecto):
+                c = azar.randrange(len(cadenas))
+                inicio = cadenas[c] + timedelta(days=azar.randint(0, 3))
+                fin = inicio + timedelta(days=azar.randint(0, 15))
+                cadenas[c] = fin + timedelta(days=1)
+
+                if fin < hoy:
+                    progreso = 100 if azar.random() < 0.8 else azar.choice([50, 80, 90])
+                elif inicio > hoy:
+                    progreso = 0
+                else:
+                    progreso = azar.choice([0, 10, 25, 50, 75])
+
+                predecesoras.append(ultimas[c] if azar.random() < 0.8 else None)
+                ultimas[c] = len(tareas)
+                tareas.append(Tarea(
+                    nombre=f"{ACTIVIDADES[n % len(ACTIVIDADES)]} {n + 1}",
+                    proyecto=proyecto,
+                    asignado_a=azar.choice(lista_recursos) if lista_recursos and azar.random() < 0.85 else None,
+                    fecha_inicio=inicio, fecha_fin=fin, progreso=progreso,
+                ))
+        tareas = Tarea.objects.bulk_create(tareas, batch_size=LOTE)
+
+        con_predecesora = []
+        for tarea, posicion in zip(tareas, predecesoras):
+            if posicion is not None:
+                tarea.predecesora_id = tareas[posicion].id
+                con_predecesora.append(tarea)
+        Tarea.objects.bulk_update(con_predecesora, ['predecesora'], batch_size=LOTE)
+
+        Requisito = Tarea.requisitos.through
+        requisitos = []
+        for tarea in tareas:
+            for conocimiento in azar.sample(lista_conocimientos, min(azar.randint(0, 3), len(lista_conocimientos))):
+                requisitos.append(Requisito(tarea_id=tarea.id, conocimiento_id=conocimiento.id))
+        Requisito.objects.bulk_create(requisitos, batch_size=LOTE)
+
+        agregados.recalcular([p.id for p in lista_proyectos])
+
+    _refrescar([p.id for p in lista_proyectos])
+
+    return {
+        'perfiles': len(perfiles),
+        'conocimientos': len(lista_conocimientos),
+        'recursos': len(lista_recursos),
+        'habilidades': len(habilidades),
+        'proyectos': len(lista_proyectos),
+        'tareas': len(tareas),
+        'predecesoras': len(con_predecesora),
+        'requisitos': len(requisitos),
+    }
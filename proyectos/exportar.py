@@ -0,0 +1,101 @@
+import tempfile
+from itertools import islice
+
+from django.db.models import FilteredRelation, Q
+from django.http import FileResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+
+from .calendario import calendario
+from .models import Tarea, expresion_estado
+
+ENCABEZADOS = ['Ingeniero/Recurso', 'Cargo/Perfil', 'Proyecto', 'Tarea', 'Inicio', 'Fin', 'Días hábiles', 'Estado', 'Progreso (%)']
+ANCHOS = {'A': 25, 'B': 20, 'C': 25, 'D': 30}
+# El reporte resume los estados: lo que no está terminado ni atrasado figura "En Curso"
+ETIQUETAS_ESTADO = {Tarea.COMPLETADO: "Finalizado", Tarea.ATRASADO: "Atrasado"}
+
+
+def filas_reporte(recursos, fecha_inicio=None, fecha_fin=None):
+    """
+    Genera las filas del reporte (una por tarea, o "Sin tareas" si el recurso no tiene)
+    desde UNA sola consulta: recursos LEFT JOIN tareas filtradas LEFT JOIN proyecto,
+    leída con iterator() para no cargar todo en memoria. El estado también sale de la consulta
+    (expresion_estado) y los días hábiles de cada tarea se cuentan de a un bloque de filas.
+    """
+    condicion = Q()
+    if fecha_inicio:
+        condicion &= Q(tarea__fecha_inicio__gte=fecha_inicio)
+    if fecha_fin:
+        condicion &= Q(tarea__fecha_fin__lte=fecha_fin)
+
+    consulta = recursos.annotate(
+        t=FilteredRelation('tarea', condition=condicion)
+    ).annotate(
+        t_estado=expresion_estado(timezone.localdate(), prefijo='t__')
+    ).order_by('id', '-t__fecha_fin', 't__id').values_list(
+        'nombre', 'perfil__nombre', 't__id', 't__proyecto__nombre', 't__nombre',
+        't__fecha_inicio', 't__fecha_fin', 't_estado', 't__progreso'
+    )
+
+    filas = consulta.iterator(chunk_size=2000)
+    while bloque := list(islice(filas, 2000)):
+        con_tarea = [fila for fila in bloque if fila[2] is not None]
+        habiles = iter(calendario.dias_habiles([f[5] for f in con_tarea], [f[6] for f in con_tarea]).tolist())
+
+        for r_nombre, r_cargo, t_id, proyecto, tarea, inicio, fin, estado, progreso in bloque:
+            if t_id is None:
+                yield [r_nombre, r_cargo, "Sin tareas", "-", "-", "-", "-", "-", "-"]
+                continue
+
+            yield [r_nombre, r_cargo, proyecto, tarea, inicio, fin, next(habiles),
+                   ETIQUETAS_ESTADO.get(estado, "En Curso"), progreso]
+
+
+def escribir_excel(filas, archivo):
+    """
+    Escribe el libro del reporte con openpyxl en modo write-only: las filas se pasan a disco
+    a medida que llegan, así la memoria no crece con la cantidad de tareas.
+    'archivo' es una ruta o un archivo binario abierto.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Reporte de Recursos")
+
+    # Ajuste de columnas (en write-only hay que definirlo antes de escribir filas)
+    for columna, ancho in ANCHOS.items():
+        ws.column_dimensions[columna].width = ancho
+
+    # Encabezados con estilo
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="0d6efd", end_color="0d6efd", fill_type="solid")
+    encabezados = []
+    for texto in ENCABEZADOS:
+        celda = WriteOnlyCell(ws, value=texto)
+        celda.font = header_font
+        celda.fill = header_fill
+        encabezados.append(celda)
+    ws.append(encabezados)
+
+    for fila in filas:
+        ws.append(fila)
+
+    wb.save(archivo)
+
+
+def exportar_reporte_excel(recursos, fecha_inicio=None, fecha_fin=None, nombre_archivo='Reporte_Recursos_RMS.xlsx'):
+    """
+    Excel del reporte de recursos (ver escribir_excel), enviado por partes (streaming)
+    desde un archivo temporal.
+    """
+    # El archivo temporal se borra solo cuando la respuesta termina de enviarse y lo cierra
+    archivo = tempfile.TemporaryFile()
+    escribir_excel(filas_reporte(recursos, fecha_inicio, fecha_fin), archivo)
+    archivo.seek(0)
+
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=nombre_archivo,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Tarea
+
+# Ventana por defecto alrededor de hoy (días hacia atrás / hacia adelante)
+VENTANA_ATRAS = 30
+VENTANA_ADELANTE = 90
+
+LIMITE_POR_DEFECTO = 200
+LIMITE_MAXIMO = 1000
+
+# Clave de orden del keyset: las filas se agrupan por proyecto o por responsable
+ORDENES = {
+    'proyecto': F('proyecto_id'),
+    'recurso': Coalesce('asignado_a_id', Value(0)),
+}
+
+
+def ventana_por_defecto():
+    hoy = timezone.localdate()
+    return hoy - timedelta(days=VENTANA_ATRAS), hoy + timedelta(days=VENTANA_ADELANTE)
+
+
+def leer_cursor(cursor):
+    """El cursor es 'clave:id' de la última fila entregada"""
+    clave, tarea_id = cursor.split(':')
+    return int(clave), int(tarea_id)
+
+
+def consulta_gantt(desde, hasta, proyecto_id=None, recurso_id=None, orden='proyecto', cursor=None, limite=LIMITE_POR_DEFECTO):
+    """
+    Tareas que se cruzan con [desde, hasta], ordenadas por (proyecto|recurso, id) y paginadas por
+    keyset (sin OFFSET). Trae una fila de más para saber si hay página siguiente.
+    """
+    tareas = Tarea.objects.filter(fecha_inicio__lte=hasta, fecha_fin__gte=desde)
+
+    if proyecto_id:
+        tareas = tareas.filter(proyecto_id=proyecto_id)
+    if recurso_id:
+        tareas = tareas.filter(asignado_a_id=recurso_id)
+
+    tareas = tareas.annotate(clave=ORDENES[orden]).order_by('clave', 'id')
+
+    if cursor:
+        clave, tarea_id = cursor
+        tareas = tareas.filter(Q(clave__gt=clave) | Q(clave=clave, id__gt=tarea_id))
+
+    # Sólo las columnas que necesitan las barras y el popup
+    return tareas.values_list(
+        'clave', 'id', 'nombre', 'fecha_inicio', 'fecha_fin', 'progreso',
+        'proyecto_id', 'proyecto__nombre', 'asignado_a__nombre'
+    )[:limite + 1]
+
+
+def armar_filas(tareas, limite=LIMITE_POR_DEFECTO):
+    """Barras para Frappe Gantt a partir de las filas de consulta_gantt: (filas, siguiente_cursor o None)"""
+    filas = []
+    for clave, tarea_id, nombre, inicio, fin, progreso, proyecto, proyecto_nombre, responsable in tareas:
+        filas.append({
+            'id': str(tarea_id),
+            'name': nombre,
+            'start': inicio.strftime("%Y-%m-%d"),
+            'end': fin.strftime("%Y-%m-%d"),
+            'progress': progreso,
+            # Usamos colores diferentes según el proyecto (truco visual)
+            'custom_class': f'bar-project-{proyecto % 5}',
+            'proyecto_id': proyecto,  # Para pedir la ruta crítica de los proyectos visibles
+            # Información extra para el tooltip
+            'proyecto': proyecto_nombre,
+            'responsable': responsable or "Sin asignar",
+            '_clave': clave,
+        })
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = f"{filas[-1]['_clave']}:{filas[-1]['id']}"
+
+    for fila in filas:
+        del fila['_clave']
+
+    return filas, siguiente
+
+
+def filas_gantt(desde, hasta, limite=LIMITE_POR_DEFECTO, **filtros):
+    """Una página de barras para Frappe Gantt (ver consulta_gantt): (filas, siguiente_cursor o None)"""
+    return armar_filas(consulta_gantt(desde, hasta, limite=limite, **filtros), limite)
+
+
+async def afilas_gantt(desde, hasta, limite=LIMITE_POR_DEFECTO, **filtros):
+    """filas_gantt con el ORM async (para vistas_asincronas)"""
+    return armar_filas([fila async for fila in consulta_gantt(desde, hasta, limite=limite, **filtros)], limite)
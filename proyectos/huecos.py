@@ -0,0 +1,122 @@
+"""
+Primer hueco disponible: para cada candidato, la primera ventana de N días hábiles dentro de un
+horizonte en la que no tiene ninguna tarea abierta encima.
+
+Los intervalos ocupados salen del índice de ocupación (sin consultas). Los de todos los candidatos
+se procesan juntos con NumPy: se ordenan por recurso e inicio, el máximo acumulado de fecha_fin
+los fusiona y lo que queda entre un bloque y el siguiente es un hueco. Los días hábiles de cada
+hueco se cuentan con busday_count de una vez para todos, con el calendario laboral (semana laboral
+y feriados); las ausencias de cada candidato se suman a sus intervalos ocupados.
+"""
+import heapq
+from datetime import date
+
+import numpy as np
+
+from .calendario import a_dias, a_ordinales, ausencias, calendario
+from .ocupacion import indice
+from rrhh.matriz import matriz
+
+HORIZONTE_POR_DEFECTO = 365
+HORIZONTE_MAXIMO = 2 * 366
+
+# Mayor que cualquier ordinal: sumado por recurso, separa sus fechas en un mismo arreglo
+_SEPARACION = 10 ** 7
+
+
+def _intervalos(recursos_ids, desde, hasta, excluir):
+    """
+    (posición del recurso, inicio, fin) como ordinales de las tareas abiertas y las ausencias que
+    tocan [desde, hasta]
+    """
+    posicion = {rid: i for i, rid in enumerate(recursos_ids)}
+    por_recurso = indice.ordinales(recursos_ids)
+    bloques = [np.zeros((0, 3), dtype=np.int64)]
+    if por_recurso:
+        duenos = np.repeat([posicion[rid] for rid in por_recurso], [len(a) for a in por_recurso.values()])
+        inicios, fines, tareas = np.concatenate(list(por_recurso.values())).T
+        dentro = (fines >= desde) & (inicios <= hasta)
+        if excluir:
+            dentro &= ~np.isin(tareas, list(excluir))
+        bloques.append(np.column_stack([duenos[dentro], inicios[dentro], fines[dentro]]))
+
+    faltas = ausencias(recursos_ids, date.fromordinal(desde), date.fromordinal(hasta))
+    if faltas:
+        bloques.append(np.array(
+            [(posicion[rid], a_desde.toordinal(), a_hasta.toordinal()) for rid, a_desde, a_hasta, _ in faltas],
+            dtype=np.int64,
+        ))
+    return np.concatenate(bloques).T
+
+
+def primeros_huecos(recursos_ids, dias, desde, hasta, excluir=()):
+    """
+    {recurso_id: (inicio, fin)} con la primera ventana de 'dias' días hábiles dentro de [desde, hasta]
+    sin tareas abiertas del recurso. Los que no tienen ninguna en el horizonte no aparecen.
+    'excluir': ids de tareas que no cuentan como ocupación (p.ej. la que se quiere reasignar).
+    """
+    recursos_ids = list(recursos_ids)
+    if not recursos_ids or dias < 1:
+        return {}
+    d0, d1 = desde.toordinal(), hasta.toordinal()
+    excluir = set(excluir)
+
+    # 1. Intervalos de todos los candidatos, ordenados por recurso y fecha de inicio
+    duenos, inicios, fines = _intervalos(recursos_ids, d0, d1, excluir)
+    orden = np.lexsort((inicios, duenos))
+    duenos, inicios, fines = duenos[orden], inicios[orden], fines[orden]
+
+    # 2. Fin más lejano visto hasta cada intervalo (por recurso, gracias a _SEPARACION): un hueco
+    #    empieza el día después de ese máximo y termina el día antes del intervalo siguiente
+    base = duenos * _SEPARACION
+    alcance = np.maximum.accumulate(base + fines) - base
+    primero = np.ones(len(duenos), dtype=bool)
+    primero[1:] = duenos[1:] != duenos[:-1]
+    ultimo = np.ones(len(duenos), dtype=bool)
+    ultimo[:-1] = primero[1:]
+
+    previo = np.full(len(duenos), d0, dtype=np.int64)
+    previo[1:] = np.maximum(alcance[:-1] + 1, d0)
+    sin_tareas = np.setdiff1d(np.arange(len(recursos_ids)), duenos)
+
+    # Huecos antes de cada intervalo, después del último de cada recurso y el horizonte entero de los libres
+    hueco_dueno = np.concatenate([duenos, duenos[ultimo], sin_tareas])
+    hueco_inicio = np.concatenate([np.where(primero, d0, previo), alcance[ultimo] + 1,
+                                   np.full(len(sin_tareas), d0, dtype=np.int64)])
+    hueco_fin = np.concatenate([inicios - 1, np.full(ultimo.sum() + len(sin_tareas), d1, dtype=np.int64)])
+
+    validos = hueco_inicio <= hueco_fin
+    hueco_dueno, hueco_inicio, hueco_fin = hueco_dueno[validos], hueco_inicio[validos], hueco_fin[validos]
+    orden = np.lexsort((hueco_inicio, hueco_dueno))
+    hueco_dueno, hueco_inicio, hueco_fin = hueco_dueno[orden], hueco_inicio[orden], hueco_fin[orden]
+
+    # 3. Días hábiles de cada hueco y el primero de cada recurso en el que caben
+    habiles = calendario.dias_habiles(a_dias(hueco_inicio), a_dias(hueco_fin))
+    caben = np.flatnonzero(habiles >= dias)
+    duenos_ok, primeros = np.unique(hueco_dueno[caben], return_index=True)
+    elegidos = caben[primeros]
+
+    inicio = calendario.siguiente_habil(a_dias(hueco_inicio[elegidos]))
+    fin = calendario.sumar(inicio, dias - 1)
+    return {
+        recursos_ids[fila]: (date.fromordinal(i), date.fromordinal(f))
+        for fila, i, f in zip(duenos_ok.tolist(), a_ordinales(inicio).tolist(), a_ordinales(fin).tolist())
+    }
+
+
+def buscar(recursos_ids, dias, desde, hasta, requisitos=(), k=10, excluir=()):
+    """
+    Los K candidatos que antes pueden empezar una tarea de 'dias' días hábiles, y a igual fecha los de
+    mejor match técnico. Lista de dicts {'recurso_id', 'inicio', 'fin', 'match'}.
+    """
+    huecos = primeros_huecos(recursos_ids, dias, desde, hasta, excluir)
+    if not huecos:
+        return []
+    ids, puntajes = matriz.puntajes(list(requisitos), list(huecos), solo_activos=False)
+    match = dict(zip(ids.tolist(), puntajes.tolist()))
+
+    mejores = heapq.nsmallest(k, huecos, key=lambda rid: (huecos[rid][0], -match.get(rid, 0), rid))
+    return [
+        {'recurso_id': rid, 'inicio': huecos[rid][0], 'fin': huecos[rid][1], 'match': match.get(rid, 0)}
+        for rid in mejores
+    ]
@@ -0,0 +1,384 @@
+import re
+import unicodedata
+from datetime import date, datetime
+
+from django.db import transaction
+from django.db.models import F
+
+from . import agregados, ruta_critica, tablero
+from .autocompletar import autocompletar
+from .models import Proyecto, Tarea
+from .ocupacion import indice
+from rrhh.importacion import ErrorImportacion, clave_nombre, leer_filas, mapa_conocimientos, mapas_recursos
+
+LOTE = 2000
+
+MAX_AVISOS = 500
+
+# Encabezados aceptados (sin tildes ni mayúsculas) para cada dato: los nuestros y los de
+# exportaciones típicas de MS Project / Primavera
+COLUMNAS = {
+    'proyecto': ('proyecto', 'project', 'nombre del proyecto', 'project name'),
+    'id_externo': ('id', 'id externo', 'unique id', 'uid', 'activity id', 'id actividad'),
+    'nombre': ('tarea', 'nombre', 'name', 'task name', 'activity name', 'nombre de tarea'),
+    'inicio': ('inicio', 'fecha inicio', 'fecha_inicio', 'comienzo', 'start', 'start date'),
+    'fin': ('fin', 'fecha fin', 'fecha_fin', 'finish', 'finish date', 'end'),
+    'progreso': ('progreso', '% completado', 'porcentaje completado', '% complete', 'activity % complete'),
+    'responsable': ('responsable', 'recurso', 'asignado a', 'nombres de los recursos', 'resource names'),
+    'predecesora': ('predecesora', 'predecesoras', 'predecessors'),
+    'requisitos': ('requisitos', 'conocimientos', 'conocimientos requeridos'),
+    'centro_costo': ('centro de costo', 'centro_costo', 'cost center'),
+    'unidad_negocio': ('unidad de negocio', 'unidad_negocio', 'business unit'),
+}
+OBLIGATORIAS = ('proyecto', 'nombre', 'inicio', 'fin')
+
+FORMATOS_FECHA = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d', '%d-%m-%y', '%d/%m/%y')
+
+# "12", "12FS", "12FS+2d", "12SS-1 día": nos quedamos con el ID (Tarea tiene una sola predecesora)
+PATRON_PREDECESORA = re.compile(r'^\s*(.+?)\s*(?:(?:FC|CC|FF|CF|FS|SS|SF)\s*(?:[+-].*)?)?$', re.IGNORECASE)
+
+
+def _sin_tildes(texto):
+    texto = unicodedata.normalize('NFKD', ' '.join(str(texto).split()).casefold())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def _leer_fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor or '').strip()
+    # MS Project antepone el día de la semana: "lun 15/01/24"
+    texto = texto.split(' ', 1)[1] if re.match(r'^[^\d\s]+\.?\s+\d', texto) else texto
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto.split(' ')[0], formato).date()
+        except ValueError:
+            continue
+    raise ValueError(valor)
+
+
+def _leer_progreso(valor):
+    """'50%', '50' o 50 son 50; un número con decimales entre 0 y 1 (celda Excel con formato %) es una fracción"""
+    if valor is None or str(valor).strip() == '':
+        return 0
+    if isinstance(valor, float) and 0 < valor < 1:
+        valor *= 100
+    numero = round(float(str(valor).strip().rstrip('%').replace(',', '.')))
+    if not 0 <= numero <= 100:
+        raise ValueError(valor)
+    return numero
+
+
+UNIDADES = {
+    _sin_tildes(texto): codigo for codigo, etiqueta in Proyecto.OPCIONES_UNIDAD for texto in (codigo, etiqueta)
+}
+
+
+class ResultadoImportacion:
+    """Totales de una importación de cronograma"""
+
+    def __init__(self):
+        self.filas = 0
+        self.proyectos_creados = []
+        self.tareas_creadas = 0
+        self.tareas_actualizadas = 0
+        self.predecesoras = 0
+        self.requisitos = 0
+        self.avisos = []
+        self.total_avisos = 0
+
+    def avisar(self, mensaje):
+        self.total_avisos += 1
+        if len(self.avisos) < MAX_AVISOS:
+            self.avisos.append(mensaje)
+
+
+def _columnas(encabezado):
+    """{dato: índice de columna} según los encabezados del archivo"""
+    alias = {a: dato for dato, nombres in COLUMNAS.items() for a in nombres}
+    columnas = {}
+    for j, titulo in enumerate(encabezado):
+        dato = alias.get(_sin_tildes(titulo or ''))
+        if dato and dato not in columnas:
+            columnas[dato] = j
+    faltan = [dato for dato in OBLIGATORIAS if dato not in columnas]
+    if faltan:
+        raise ErrorImportacion(f"Faltan columnas obligatorias: {', '.join(faltan)}")
+    return columnas
+
+
+class _Importador:
+    """
+    Estado de una importación: mapas en memoria de proyectos, recursos, conocimientos y
+    tareas ya conocidas por (proyecto, id externo), para no consultar por fila.
+    """
+
+    def __init__(self, columnas, resultado):
+        self.columnas = columnas
+        self.resultado = resultado
+
+        self.proyectos = {}
+        for pid, nombre in Proyecto.objects.order_by('-id').values_list('id', 'nombre'):
+            self.proyectos[clave_nombre(nombre)] = pid  # con nombres repetidos gana el más antiguo
+        self.por_email, self.por_nombre, _ = mapas_recursos()
+        self.conocimientos, _ = mapa_conocimientos()
+
+        self.tareas = {}             # (proyecto_id, id_externo) -> tarea_id
+        self.proyectos_cargados = set()
+        self.vistas = set()          # (proyecto_id, id_externo) ya leídas en este archivo
+        self.pendientes = []         # (tarea, id_externo de la predecesora): se enlazan al final
+
+    def valor(self, fila, dato):
+        j = self.columnas.get(dato)
+        if j is None or j >= len(fila) or fila[j] is None:
+            return None
+        return str(fila[j]).strip() if isinstance(fila[j], str) else fila[j]
+
+    def _cargar_tareas(self, proyectos_ids):
+        """IDs de las tareas con ID externo de los proyectos que aparecen por primera vez"""
+        nuevos = [pid for pid in proyectos_ids if pid not in self.proyectos_cargados]
+        if not nuevos:
+            return
+        filas = Tarea.objects.filter(proyecto_id__in=nuevos, id_externo__isnull=False).values_list(
+            'proyecto_id', 'id_externo', 'id'
+        )
+        for pid, externo, tid in filas.iterator(chunk_size=LOTE):
+            self.tareas[(pid, externo)] = tid
+        self.proyectos_cargados.update(nuevos)
+
+    def _crear_proyectos(self, filas):
+        """Crea de una vez los proyectos del lote que no existen (fechas provisorias: las de sus tareas)"""
+        nuevos = {}
+        for fila in filas:
+            clave = clave_nombre(fila['proyecto'])
+            if clave in self.proyectos:
+                continue
+            proyecto = nuevos.get(clave)
+            if proyecto is None:
+                proyecto = nuevos[clave] = Proyecto(
+                    nombre=fila['proyecto'], fecha_inicio=fila['inicio'], fecha_fin_estimada=fila['fin'],
+                    centro_costo=fila['centro_costo'] or Proyecto._meta.get_field('centro_costo').default,
+                    unidad_negocio=fila['unidad_negocio'] or Proyecto._meta.get_field('unidad_negocio').default,
+                )
+            proyecto.fecha_inicio = min(proyecto.fecha_inicio, fila['inicio'])
+            proyecto.fecha_fin_estimada = max(proyecto.fecha_fin_estimada, fila['fin'])
+
+        for clave, proyecto in zip(nuevos, Proyecto.objects.bulk_create(nuevos.values())):
+            self.proyectos[clave] = proyecto.id
+            self.proyectos_cargados.add(proyecto.id)  # recién creado: no tiene tareas que cargar
+            self.resultado.proyectos_creados.append(proyecto.id)
+
+    def leer(self, numero, fila):
+        """Fila del archivo -> dict validado, o None (con aviso) si no se puede importar"""
+        proyecto, nombre = self.valor(fila, 'proyecto'), self.valor(fila, 'nombre')
+        if not proyecto or not nombre:
+            if any(v not in (None, '') for v in fila):
+                self.resultado.avisar(f"Fila {numero}: sin proyecto o sin nombre de tarea, se ignora")
+            return None
+        try:
+            inicio, fin = _leer_fecha(self.valor(fila, 'inicio')), _leer_fecha(self.valor(fila, 'fin'))
+        except ValueError as e:
+            self.resultado.avisar(f"Fila {numero} '{nombre}': fecha '{e}' no válida, se ignora")
+            return None
+        if fin < inicio:
+            self.resultado.avisar(f"Fila {numero} '{nombre}': termina antes de empezar, se ignora")
+            return None
+        try:
+            progreso = _leer_progreso(self.valor(fila, 'progreso'))
+        except ValueError:
+            self.resultado.avisar(f"Fila {numero} '{nombre}': progreso no válido, se deja en 0")
+            progreso = 0
+
+        responsable, sin_resolver = None, False
+        texto = self.valor(fila, 'responsable')
+        if texto:
+            # MS Project separa varios recursos con ';' o ',' y agrega "[50%]": se toma el primero
+            primero = re.split(r'[;,]', str(texto))[0].split('[')[0]
+            clave = clave_nombre(primero)
+            responsable = self.por_email.get(clave) if '@' in clave else self.por_nombre.get(clave)
+            if responsable is None:
+                sin_resolver = True
+                self.resultado.avisar(f"Fila {numero} '{nombre}': responsable '{primero.strip()}' no encontrado, "
+                                      "se mantiene el actual")
+
+        requisitos = []
+        for parte in re.split(r'[;,]', str(self.valor(fila, 'requisitos') or '')):
+            if parte.strip():
+                cid = self.conocimientos.get(clave_nombre(parte))
+                if cid is None:
+                    self.resultado.avisar(f"Fila {numero} '{nombre}': conocimiento '{parte.strip()}' no existe")
+                else:
+                    requisitos.append(cid)
+
+        predecesora = None
+        texto = self.valor(fila, 'predecesora')
+        if texto not in (None, ''):
+            referencias = [r for r in re.split(r'[;,]', str(texto)) if r.strip()]
+            if len(referencias) > 1:
+                self.resultado.avisar(f"Fila {numero} '{nombre}': {len(referencias)} predecesoras, se usa la primera")
+            if referencias:
+                predecesora = PATRON_PREDECESORA.match(referencias[0]).group(1)
+
+        externo = self.valor(fila, 'id_externo')
+        if isinstance(externo, float) and externo.is_integer():
+            externo = int(externo)  # Excel guarda los ID numéricos como 12.0
+        if externo in (None, '') and 'id_externo' in self.columnas:
+            self.resultado.avisar(f"Fila {numero} '{nombre}': sin ID, se crea como tarea nueva en cada importación")
+
+        unidad = self.valor(fila, 'unidad_negocio')
+        return {
+            'numero': numero, 'proyecto': str(proyecto), 'nombre': str(nombre)[:200],
+            'id_externo': str(externo)[:50] if externo not in (None, '') else None,
+            'inicio': inicio, 'fin': fin, 'progreso': progreso,
+            'responsable': responsable, 'responsable_sin_resolver': sin_resolver,
+            'requisitos': requisitos, 'predecesora': predecesora,
+            'centro_costo': str(self.valor(fila, 'centro_costo') or '')[:100],
+            'unidad_negocio': UNIDADES.get(_sin_tildes(unidad)) if unidad else None,
+        }
+
+    def guardar_lote(self, filas):
+        """Un lote = una transacción: proyectos nuevos, upsert de tareas y reemplazo de sus requisitos"""
+        with transaction.atomic():
+            self._crear_proyectos(filas)
+            for fila in filas:
+                fila['proyecto_id'] = self.proyectos[clave_nombre(fila['proyecto'])]
+            self._cargar_tareas({f['proyecto_id'] for f in filas})
+
+            # Un mismo ID repetido en el lote haría que el upsert toque dos veces la misma fila
+            unicas = {}
+            for fila in filas:
+                clave = (fila['proyecto_id'], fila['id_externo']) if fila['id_externo'] else ('fila', fila['numero'])
+                if clave in unicas or clave in self.vistas:
+                    self.resultado.avisar(f"Fila {fila['numero']}: ID '{fila['id_externo']}' repetido, prevalece esta fila")
+                unicas[clave] = fila
+            filas = list(unicas.values())
+
+            tareas = [
+                Tarea(
+                    proyecto_id=f['proyecto_id'], id_externo=f['id_externo'], nombre=f['nombre'],
+                    fecha_inicio=f['inicio'], fecha_fin=f['fin'], progreso=f['progreso'],
+                    asignado_a_id=f['responsable'],
+                    # Si la predecesora ya está guardada (lote anterior o en la base) se enlaza de inmediato
+                    predecesora_id=self.tareas.get((f['proyecto_id'], f['predecesora'])),
+                )
+                for f in filas
+            ]
+            # Al actualizar sólo se pisan los datos que trae el archivo: sin columna de progreso o de
+            # responsable (o con un responsable que no se encontró) se conserva lo que ya tenía la tarea
+            campos = ['nombre', 'fecha_inicio', 'fecha_fin']
+            campos += [campo for campo in ('progreso', 'predecesora') if campo in self.columnas]
+            con_responsable, sin_responsable = [], []
+            for fila, tarea in zip(filas, tareas):
+                resuelto = 'responsable' in self.columnas and not fila['responsable_sin_resolver']
+                (con_responsable if resuelto else sin_responsable).append(tarea)
+
+            existentes = sum(1 for f in filas if (f['proyecto_id'], f['id_externo']) in self.tareas)
+            for grupo, campos_grupo in ((con_responsable, campos + ['asignado_a']), (sin_responsable, campos)):
+                if grupo:
+                    Tarea.objects.bulk_create(
+                        grupo, batch_size=LOTE, update_conflicts=True, unique_fields=['proyecto', 'id_externo'],
+                        update_fields=campos_grupo,
+                    )
+            self.resultado.tareas_actualizadas += existentes
+            self.resultado.tareas_creadas += len(tareas) - existentes
+
+            for fila, tarea in zip(filas, tareas):
+                if fila['id_externo']:
+                    self.tareas[(fila['proyecto_id'], fila['id_externo'])] = tarea.id
+                    self.vistas.add((fila['proyecto_id'], fila['id_externo']))
+                if fila['predecesora'] and tarea.predecesora_id is None:
+                    self.pendientes.append((tarea, fila['predecesora']))
+                elif tarea.predecesora_id:
+                    self.resultado.predecesoras += 1
+
+            if 'requisitos' in self.columnas:
+                Requisito = Tarea.requisitos.through
+                Requisito.objects.filter(tarea_id__in=[t.id for t in tareas]).delete()
+                requisitos = Requisito.objects.bulk_create([
+                    Requisito(tarea_id=tarea.id, conocimiento_id=cid)
+                    for fila, tarea in zip(filas, tareas) for cid in set(fila['requisitos'])
+                ], batch_size=LOTE)
+                self.resultado.requisitos += len(requisitos)
+
+    def enlazar_predecesoras(self):
+        """
+        Segunda pasada, en memoria, para las referencias a tareas del mismo lote o posteriores:
+        el ID externo de la predecesora se busca en su mismo proyecto.
+        """
+        con_clave, sin_clave = [], []
+        for tarea, externo in self.pendientes:
+            predecesora_id = self.tareas.get((tarea.proyecto_id, externo))
+            if predecesora_id is None or predecesora_id == tarea.id:
+                self.resultado.avisar(f"Tarea '{tarea.nombre}': predecesora '{externo}' no encontrada en su proyecto")
+                continue
+            tarea.predecesora_id = predecesora_id
+            (con_clave if tarea.id_externo else sin_clave).append(tarea)
+
+        with transaction.atomic():
+            # Las que tienen ID externo se actualizan con el mismo upsert: un INSERT ... ON CONFLICT
+            # que siempre choca es mucho más barato que el CASE por fila que arma bulk_update
+            Tarea.objects.bulk_create(
+                con_clave, batch_size=LOTE, update_conflicts=True,
+                unique_fields=['proyecto', 'id_externo'], update_fields=['predecesora'],
+            )
+            Tarea.objects.bulk_update(sin_clave, ['predecesora'], batch_size=LOTE)
+        self.resultado.predecesoras += len(con_clave) + len(sin_clave)
+
+
+def importar(archivo, nombre, hoja=None, progreso=None):
+    """
+    Importa un cronograma (una fila por tarea) en lotes de LOTE filas, cada uno en su transacción.
+    Las tareas con ID externo se actualizan si ya existen en su proyecto (reimportación).
+    'progreso' recibe la cantidad de filas procesadas después de cada lote.
+    """
+    filas = leer_filas(archivo, nombre, hoja)
+    encabezado = next(filas, None)
+    if not encabezado:
+        raise ErrorImportacion("El archivo está vacío")
+
+    resultado = ResultadoImportacion()
+    importador = _Importador(_columnas(encabezado), resultado)
+    if 'id_externo' not in importador.columnas:
+        resultado.avisar("El archivo no tiene columna de ID: todas las tareas se crean como nuevas "
+                         "y reimportarlo las duplicará")
+
+    try:
+        lote = []
+        for numero, fila in enumerate(filas, 2):
+            leida = importador.leer(numero, fila)
+            if leida is None:
+                continue
+            lote.append(leida)
+            resultado.filas += 1
+            if len(lote) == LOTE:
+                importador.guardar_lote(lote)
+                lote = []
+                if progreso:
+                    progreso(resultado.filas)
+        if lote:
+            importador.guardar_lote(lote)
+            if progreso:
+                progreso(resultado.filas)
+
+        if importador.pendientes:
+            importador.enlazar_predecesoras()
+
+    finally:
+        # bulk_create / bulk_update no disparan señales: agregados, índices y caches se reconstruyen
+        # de una vez, también si un lote falló (los anteriores ya quedaron guardados)
+        proyectos_ids = list(importador.proyectos_cargados)
+        with transaction.atomic():
+            agregados.recalcular(proyectos_ids)
+            # Los proyectos nuevos toman como fechas las de sus tareas (pudieron venir en varios lotes)
+            Proyecto.objects.filter(id__in=resultado.proyectos_creados, primera_fecha__isnull=False).update(
+                fecha_inicio=F('primera_fecha'), fecha_fin_estimada=F('ultima_fecha')
+            )
+        indice.invalidar()
+        tablero.invalidar()
+        ruta_critica.invalidar(*proyectos_ids)
+        if resultado.proyectos_creados:
+            autocompletar.invalidar('proyecto')
+
+    return resultado
@@ -0,0 +1,164 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from proyectos import datos_sinteticos
+from proyectos.models import Tarea
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    posicion = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[posicion]
+
+
+def _vistas():
+    """(nombre, url) de cada pantalla a medir, con parámetros armados según los datos generados"""
+    hoy = timezone.localdate()
+    desde, hasta = (hoy - timedelta(days=30)).isoformat(), (hoy + timedelta(days=30)).isoformat()
+    tarea = Tarea.objects.filter(requisitos__isnull=False).order_by('id').values_list('id', flat=True).first()
+    return [
+        ('index', '/'),
+        ('vista_gantt', '/gantt/'),
+        ('gantt_datos_api', f'/api/gantt/?desde={desde}&hasta={hasta}'),
+        ('buscar_disponibilidad', f'/buscar/?tarea_id={tarea}' if tarea else f'/buscar/?fecha_inicio={desde}&fecha_fin={hasta}'),
+        ('ver_recursos', '/recursos/'),
+        ('lista_proyectos', '/proyectos-lista/'),
+        ('reporte_recurso_html', f'/reporte/?fecha_inicio={desde}&fecha_fin={hasta}'),
+        ('reporte_recurso_excel', f'/reporte/?fecha_inicio={desde}&fecha_fin={hasta}&exportar=excel'),
+    ]
+
+
+def _pedir(cliente, url):
+    respuesta = cliente.get(url)
+    # Las respuestas en streaming (Excel) se consumen completas: son parte del costo
+    if respuesta.streaming:
+        b''.join(respuesta.streaming_content)
+    respuesta.close()
+    if respuesta.status_code != 200:
+        raise CommandError(f"{url} respondió {respuesta.status_code}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos ficticios en una base de datos de PRUEBA (no toca la real) y mide cada pantalla: "
+        "cantidad de consultas, latencia (p50/p95/p99) y memoria pico. Ej: "
+        "DB_ENGINE=sqlite python manage.py benchmark --escalas minima,chica --salida bench.json"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escalas', default='minima,chica',
+                            help=f"Lista separada por comas de: {', '.join(datos_sinteticos.ESCALAS)}")
+        parser.add_argument('--repeticiones', type=int, default=10)
+        parser.add_argument('--salida', default='bench_output.json', help="Archivo JSON con los resultados")
+        parser.add_argument('--comparar', help="JSON de una corrida anterior para mostrar la diferencia")
+
+    def handle(self, *args, **options):
+        escalas = [e.strip() for e in options['escalas'].split(',') if e.strip()]
+        desconocidas = [e for e in escalas if e not in datos_sinteticos.ESCALAS]
+        if desconocidas:
+            raise CommandError(f"Escala desconocida: {', '.join(desconocidas)}")
+        repeticiones = max(1, options['repeticiones'])
+
+        # Base de prueba aparte (en SQLite, en memoria): los datos reales no se tocan
+        setup_test_environment(debug=False)
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+        try:
+            resultados = [self._medir_escala(escala, repeticiones) for escala in escalas]
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        salida = {
+            'fecha': timezone.now().isoformat(),
+            'motor': connection.vendor,
+            'python': platform.python_version(),
+            'repeticiones': repeticiones,
+            'escalas': resultados,
+        }
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(salida, archivo, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"Resultados en {options['salida']}"))
+
+        if options['comparar']:
+            self._comparar(options['comparar'], salida)
+
+    def _medir_escala(self, escala, repeticiones):
+        datos_sinteticos.limpiar()
+        cache.clear()
+        inicio = time.perf_counter()
+        creados = datos_sinteticos.generar(**datos_sinteticos.ESCALAS[escala])
+        self.stdout.write(f"\n== {escala}: {creados['recursos']} recursos, {creados['tareas']} tareas "
+                          f"(generadas en {time.perf_counter() - inicio:.1f} s)")
+
+        cliente = Client()
+        vistas = {}
+        for nombre, url in _vistas():
+            # 1. Primera petición (caches e índices fríos): consultas y memoria pico
+            cache.clear()
+            tracemalloc.start()
+            with CaptureQueriesContext(connection) as consultas_frio:
+                _pedir(cliente, url)
+            memoria_pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            # 2. Peticiones repetidas (caches calientes): latencia
+            tiempos = []
+            for _ in range(repeticiones):
+                with CaptureQueriesContext(connection) as consultas:
+                    t0 = time.perf_counter()
+                    _pedir(cliente, url)
+                    tiempos.append((time.perf_counter() - t0) * 1000)
+
+            vistas[nombre] = {
+                'url': url,
+                'consultas_frio': len(consultas_frio),
+                'consultas': len(consultas),
+                'p50_ms': round(_percentil(tiempos, 50), 2),
+                'p95_ms': round(_percentil(tiempos, 95), 2),
+                'p99_ms': round(_percentil(tiempos, 99), 2),
+                'media_ms': round(statistics.mean(tiempos), 2),
+                'memoria_pico_kb': round(memoria_pico / 1024),
+            }
+            fila = vistas[nombre]
+            self.stdout.write(
+                f"  {nombre:<24} {fila['consultas_frio']:>4}/{fila['consultas']:<4} consultas  "
+                f"p50 {fila['p50_ms']:>9.2f} ms  p95 {fila['p95_ms']:>9.2f} ms  pico {fila['memoria_pico_kb']:>8} KB"
+            )
+
+        return {'escala': escala, 'datos': creados, 'vistas': vistas}
+
+    def _comparar(self, ruta, actual):
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                anterior = json.load(archivo)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"No se pudo leer {ruta}: {e}")
+
+        previas = {r['escala']: r['vistas'] for r in anterior.get('escalas', [])}
+        self.stdout.write(f"\nComparación con {ruta} ({anterior.get('fecha', '?')}):")
+        for resultado in actual['escalas']:
+            antes = previas.get(resultado['escala'])
+            if not antes:
+                continue
+            self.stdout.write(f"== {resultado['escala']}")
+            for nombre, fila in resultado['vistas'].items():
+                previa = antes.get(nombre)
+                if not previa:
+                    continue
+                cambio = (fila['p50_ms'] - previa['p50_ms']) / previa['p50_ms'] * 100 if previa['p50_ms'] else 0
+                self.stdout.write(
+                    f"  {nombre:<24} consultas {previa['consultas']:>4} -> {fila['consultas']:<4} "
+                    f"p50 {previa['p50_ms']:>9.2f} -> {fila['p50_ms']:>9.2f} ms ({cambio:+.0f}%)"
+                )
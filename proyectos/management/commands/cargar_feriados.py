@@ -0,0 +1,45 @@
+import csv
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from proyectos.calendario import calendario, feriados_chile
+from proyectos.models import Feriado
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga en la tabla Feriado los feriados nacionales de Chile de los años indicados (por defecto, "
+        "este y el siguiente) y/o los de un CSV con columnas fecha (AAAA-MM-DD) y nombre, por ejemplo los "
+        "regionales o los de elecciones. Las fechas ya cargadas se actualizan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('anios', nargs='*', type=int, help="Años (por defecto, este y el siguiente)")
+        parser.add_argument('--archivo', help="CSV con columnas fecha,nombre (en vez de los feriados calculados)")
+
+    def handle(self, *args, **options):
+        if options['archivo']:
+            feriados = self._leer(options['archivo'])
+        else:
+            anios = options['anios'] or [date.today().year, date.today().year + 1]
+            feriados = [feriado for anio in anios for feriado in feriados_chile(anio)]
+
+        # Una fecha repetida (en el CSV, o dos feriados que caen el mismo día) queda con el último nombre
+        por_fecha = dict(feriados)
+        Feriado.objects.bulk_create(
+            [Feriado(fecha=fecha, nombre=nombre) for fecha, nombre in sorted(por_fecha.items())],
+            update_conflicts=True, unique_fields=['fecha'], update_fields=['nombre'],
+        )
+        # bulk_create no dispara las señales
+        calendario.invalidar()
+        self.stdout.write(self.style.SUCCESS(f"{len(por_fecha)} feriado(s) cargados."))
+
+    def _leer(self, ruta):
+        try:
+            with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+                return [(date.fromisoformat(fila['fecha'].strip()), fila['nombre'].strip()) for fila in csv.DictReader(archivo)]
+        except OSError as e:
+            raise CommandError(f"No se pudo leer {ruta}: {e}")
+        except (KeyError, ValueError, AttributeError) as e:
+            raise CommandError(f"{ruta}: se esperan las columnas fecha (AAAA-MM-DD) y nombre ({e})")
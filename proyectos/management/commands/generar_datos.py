@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from proyectos import datos_sinteticos
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos ficticios (perfiles, recursos, conocimientos, habilidades, proyectos y tareas "
+        "con cadenas de predecesoras) para pruebas de carga. Ej: generar_datos --escala mediana --limpiar"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', choices=datos_sinteticos.ESCALAS.keys(), default='chica',
+                            help="Tamaño predefinido (los parámetros sueltos lo sobreescriben)")
+        parser.add_argument('--recursos', type=int)
+        parser.add_argument('--proyectos', type=int)
+        parser.add_argument('--tareas-por-proyecto', type=int)
+        parser.add_argument('--conocimientos', type=int)
+        parser.add_argument('--habilidades-por-recurso', type=int, default=8)
+        parser.add_argument('--semilla', type=int, default=0, help="Misma semilla = mismos datos")
+        parser.add_argument('--limpiar', action='store_true',
+                            help="Borra TODOS los proyectos, tareas y recursos antes de generar")
+
+    def handle(self, *args, **options):
+        tamano = dict(datos_sinteticos.ESCALAS[options['escala']])
+        for campo in tamano:
+            if options.get(campo) is not None:
+                tamano[campo] = options[campo]
+        if any(valor < 0 for valor in tamano.values()):
+            raise CommandError("Las cantidades no pueden ser negativas.")
+
+        inicio = time.perf_counter()
+        if options['limpiar']:
+            datos_sinteticos.limpiar()
+        creados = datos_sinteticos.generar(
+            habilidades_por_recurso=options['habilidades_por_recurso'], semilla=options['semilla'], **tamano
+        )
+
+        resumen = ", ".join(f"{cantidad} {modelo}" for modelo, cantidad in creados.items())
+        self.stdout.write(self.style.SUCCESS(f"Creados: {resumen} ({time.perf_counter() - inicio:.1f} s)."))
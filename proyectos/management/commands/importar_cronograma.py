@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from proyectos.importacion import COLUMNAS, LOTE, importar
+from rrhh.importacion import ErrorImportacion
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa proyectos y tareas desde un .xlsx o .csv con una fila por tarea (exportación de "
+        "MS Project / Primavera). Columnas obligatorias: proyecto, tarea, inicio, fin; opcionales: id, "
+        "progreso, responsable, predecesora, requisitos, centro de costo, unidad de negocio. "
+        "Las tareas con ID ya importadas se actualizan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', nargs='?')
+        parser.add_argument('--hoja', help="Hoja del libro Excel (por defecto, la activa)")
+        parser.add_argument('--columnas', action='store_true', help="Muestra los encabezados aceptados y termina")
+
+    def handle(self, *args, **options):
+        if options['columnas']:
+            for dato, nombres in COLUMNAS.items():
+                self.stdout.write(f"  {dato:<15} {', '.join(nombres)}")
+            return
+        if not options['archivo']:
+            raise CommandError("Indique el archivo a importar")
+
+        inicio = time.perf_counter()
+
+        def progreso(filas):
+            self.stdout.write(f"  {filas} filas ({time.perf_counter() - inicio:.1f} s)")
+
+        self.stdout.write(f"Importando {options['archivo']} en lotes de {LOTE} filas...")
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar(archivo, options['archivo'], hoja=options['hoja'], progreso=progreso)
+        except OSError as e:
+            raise CommandError(f"No se pudo leer {options['archivo']}: {e}")
+        except ErrorImportacion as e:
+            raise CommandError(str(e))
+
+        for aviso in resultado.avisos:
+            self.stderr.write(f"  ! {aviso}")
+        if resultado.total_avisos > len(resultado.avisos):
+            self.stderr.write(f"  ! ... y {resultado.total_avisos - len(resultado.avisos)} avisos más")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado.filas} filas en {time.perf_counter() - inicio:.1f} s: "
+            f"{len(resultado.proyectos_creados)} proyectos nuevos, {resultado.tareas_creadas} tareas nuevas, "
+            f"{resultado.tareas_actualizadas} actualizadas, {resultado.predecesoras} con predecesora, "
+            f"{resultado.requisitos} requisitos."
+        ))
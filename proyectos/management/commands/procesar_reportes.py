@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from proyectos import reportes
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de los reportes en segundo plano: toma los trabajos pendientes (tabla TrabajoReporte), "
+        "reparte los recursos en partes entre varios procesos y deja el archivo en MEDIA_ROOT/reportes/. "
+        "Se pueden correr varios workers a la vez. Ej: python manage.py procesar_reportes --procesos 4"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int,
+                            help="Procesos del pool (por defecto REPORTES['PROCESOS'] o la cantidad de CPUs; 0 = sin pool)")
+        parser.add_argument('--recursos-por-parte', type=int, help="Recursos por parte (por defecto REPORTES['RECURSOS_POR_PARTE'])")
+        parser.add_argument('--espera', type=float, default=2.0, help="Segundos entre revisiones de la cola vacía")
+        parser.add_argument('--una-vez', action='store_true', help="Procesa lo pendiente y termina")
+
+    def handle(self, *args, **options):
+        while True:
+            reencolados, borrados = reportes.mantenimiento()
+            if reencolados or borrados:
+                self.stdout.write(f"{reencolados} trabajo(s) reencolados, {borrados} vencido(s) borrados.")
+
+            trabajo = reportes.tomar_siguiente()
+            if trabajo is None:
+                if options['una_vez']:
+                    return
+                time.sleep(options['espera'])
+                continue
+
+            inicio = time.perf_counter()
+            trabajo = reportes.procesar(trabajo, options['procesos'], options['recursos_por_parte'])
+            duracion = time.perf_counter() - inicio
+            if trabajo.estado == trabajo.TERMINADO:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{trabajo}: {trabajo.partes} parte(s) en {duracion:.1f} s -> {trabajo.archivo}"
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f"{trabajo}: {trabajo.error}"))
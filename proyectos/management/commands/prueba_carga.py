@@ -0,0 +1,111 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+RUTAS = ['/', '/recursos/', '/capacidad/', '/conflictos/']
+
+
+def _percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga contra un servidor YA levantado: N clientes concurrentes pidiendo las rutas "
+        "indicadas, con latencia p50/p95/p99 y peticiones por segundo. Para comparar WSGI con ASGI: "
+        "'gunicorn sistema_recursos.wsgi' vs 'VISTAS_ASINCRONAS=1 uvicorn sistema_recursos.asgi:application' "
+        "y en otra terminal: python manage.py prueba_carga --url http://127.0.0.1:8000 --concurrencia 32"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Servidor a probar")
+        parser.add_argument('--rutas', default=','.join(RUTAS), help="Rutas separadas por comas")
+        parser.add_argument('--concurrencia', type=int, default=16, help="Clientes simultáneos")
+        parser.add_argument('--peticiones', type=int, default=50, help="Peticiones por cliente")
+        parser.add_argument('--cookie', default='', help="Cabecera Cookie (por ejemplo sessionid=... para pantallas con login)")
+        parser.add_argument('--salida', help="Archivo JSON con los resultados")
+
+    def handle(self, *args, **options):
+        destino = urlsplit(options['url'])
+        if destino.scheme not in ('http', 'https') or not destino.hostname:
+            raise CommandError(f"URL inválida: {options['url']}")
+        rutas = [r.strip() for r in options['rutas'].split(',') if r.strip()]
+        concurrencia = max(1, options['concurrencia'])
+        peticiones = max(1, options['peticiones'])
+        cabeceras = {'Cookie': options['cookie']} if options['cookie'] else {}
+
+        tiempos = defaultdict(list)
+        errores = defaultdict(int)
+        lock = threading.Lock()
+
+        def cliente(numero):
+            # Una conexión keep-alive por cliente, como un navegador
+            clase = http.client.HTTPSConnection if destino.scheme == 'https' else http.client.HTTPConnection
+            conexion = clase(destino.hostname, destino.port, timeout=60)
+            try:
+                for i in range(peticiones):
+                    ruta = rutas[(numero + i) % len(rutas)]
+                    inicio = time.perf_counter()
+                    try:
+                        conexion.request('GET', ruta, headers=cabeceras)
+                        respuesta = conexion.getresponse()
+                        respuesta.read()
+                        correcta = respuesta.status == 200
+                    except (OSError, http.client.HTTPException):
+                        conexion.close()
+                        correcta = False
+                    duracion = (time.perf_counter() - inicio) * 1000
+                    with lock:
+                        if correcta:
+                            tiempos[ruta].append(duracion)
+                        else:
+                            errores[ruta] += 1
+            finally:
+                conexion.close()
+
+        self.stdout.write(f"{concurrencia} clientes x {peticiones} peticiones contra {options['url']}")
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as grupo:
+            list(grupo.map(cliente, range(concurrencia)))
+        total_s = time.perf_counter() - inicio
+
+        resultados = {}
+        for ruta in rutas:
+            ordenados = sorted(tiempos[ruta])
+            resultados[ruta] = {
+                'correctas': len(ordenados),
+                'errores': errores[ruta],
+                'p50_ms': round(_percentil(ordenados, 50), 2) if ordenados else None,
+                'p95_ms': round(_percentil(ordenados, 95), 2) if ordenados else None,
+                'p99_ms': round(_percentil(ordenados, 99), 2) if ordenados else None,
+                'media_ms': round(statistics.mean(ordenados), 2) if ordenados else None,
+            }
+            fila = resultados[ruta]
+            if ordenados:
+                self.stdout.write(
+                    f"  {ruta:<24} p50 {fila['p50_ms']:>9.2f} ms  p95 {fila['p95_ms']:>9.2f} ms  "
+                    f"p99 {fila['p99_ms']:>9.2f} ms  errores {fila['errores']}"
+                )
+            else:
+                self.stdout.write(self.style.ERROR(f"  {ruta:<24} sin respuestas correctas ({fila['errores']} errores)"))
+
+        correctas = sum(len(t) for t in tiempos.values())
+        resumen = {
+            'url': options['url'], 'concurrencia': concurrencia, 'segundos': round(total_s, 2),
+            'peticiones_por_segundo': round(correctas / total_s, 1), 'errores': sum(errores.values()),
+            'rutas': resultados,
+        }
+        self.stdout.write(self.style.SUCCESS(
+            f"{correctas} correctas en {total_s:.1f} s: {resumen['peticiones_por_segundo']} peticiones/s, "
+            f"{resumen['errores']} errores"
+        ))
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resumen, archivo, indent=2, ensure_ascii=False)
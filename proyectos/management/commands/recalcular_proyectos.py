@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from proyectos import agregados, tablero
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye los agregados de tareas de cada Proyecto (cantidad, avance, completadas y fechas), "
+        "p.ej. después de cambios hechos sin señales (update() o SQL directo)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('proyectos', nargs='*', type=int, help="IDs de proyectos (por defecto, todos)")
+
+    def handle(self, *args, **options):
+        actualizados = agregados.recalcular(options['proyectos'] or None)
+        tablero.invalidar()
+        self.stdout.write(self.style.SUCCESS(f"Agregados recalculados en {actualizados} proyecto(s)."))
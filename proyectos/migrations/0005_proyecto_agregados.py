@@ -0,0 +1,68 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:43
+
+from datetime import date
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q, Sum
+
+
+def calcular_agregados(apps, schema_editor):
+    Proyecto = apps.get_model('proyectos', 'Proyecto')
+    hoy = date.today()
+    proyectos = Proyecto.objects.annotate(
+        a_total=Count('tareas'),
+        a_suma=Sum('tareas__progreso'),
+        a_completadas=Count('tareas', filter=Q(tareas__progreso=100)),
+        a_atrasadas=Count('tareas', filter=Q(tareas__progreso__lt=100, tareas__fecha_fin__lt=hoy)),
+        a_primera=Min('tareas__fecha_inicio'),
+        a_ultima=Max('tareas__fecha_fin'),
+    )
+    for p in proyectos:
+        p.total_tareas = p.a_total
+        p.suma_progreso = p.a_suma or 0
+        p.tareas_completadas = p.a_completadas
+        p.tareas_atrasadas = p.a_atrasadas
+        p.primera_fecha = p.a_primera
+        p.ultima_fecha = p.a_ultima
+        p.save(update_fields=['total_tareas', 'suma_progreso', 'tareas_completadas', 'tareas_atrasadas', 'primera_fecha', 'ultima_fecha'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyectos', '0004_tarea_requisitos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proyecto',
+            name='primera_fecha',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Inicio de la primera tarea'),
+        ),
+        migrations.AddField(
+            model_name='proyecto',
+            name='suma_progreso',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='proyecto',
+            name='tareas_atrasadas',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='proyecto',
+            name='tareas_completadas',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='proyecto',
+            name='total_tareas',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='proyecto',
+            name='ultima_fecha',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Fin de la última tarea'),
+        ),
+        migrations.RunPython(calcular_agregados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyectos', '0005_proyecto_agregados'),
+        ('rrhh', '0002_conocimiento_habilidad'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(condition=models.Q(('progreso__lt', 100)), fields=['asignado_a', 'fecha_inicio', 'fecha_fin', 'id'], name='tarea_abiertas_recurso_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(fields=['asignado_a', 'fecha_fin', 'fecha_inicio'], name='tarea_recurso_fechas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(fields=['fecha_fin', 'fecha_inicio'], name='tarea_fechas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(condition=models.Q(('progreso', 100)), fields=['asignado_a', 'fecha_inicio'], name='tarea_completadas_idx'),
+        ),
+    ]
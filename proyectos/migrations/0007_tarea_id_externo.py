@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 08:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyectos', '0006_tarea_indices'),
+        ('rrhh', '0002_conocimiento_habilidad'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarea',
+            name='id_externo',
+            field=models.CharField(blank=True, max_length=50, null=True, verbose_name='ID externo'),
+        ),
+        migrations.AddConstraint(
+            model_name='tarea',
+            constraint=models.UniqueConstraint(fields=('proyecto', 'id_externo'), name='tarea_id_externo_unico'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyectos', '0007_tarea_id_externo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoReporte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('formato', models.CharField(choices=[('excel', 'Excel'), ('html', 'HTML')], max_length=10)),
+                ('parametros', models.JSONField(default=dict, help_text='Filtros del reporte: recurso, fecha_inicio, fecha_fin')),
+                ('clave', models.CharField(db_index=True, editable=False, max_length=64)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('terminado', 'Terminado'), ('error', 'Error')], default='pendiente', max_length=12)),
+                ('partes', models.PositiveIntegerField(default=0, editable=False)),
+                ('partes_listas', models.PositiveIntegerField(default=0, editable=False)),
+                ('archivo', models.CharField(blank=True, editable=False, help_text='Ruta relativa a MEDIA_ROOT', max_length=255)),
+                ('error', models.TextField(blank=True, editable=False)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('iniciado', models.DateTimeField(blank=True, null=True)),
+                ('terminado', models.DateTimeField(blank=True, null=True)),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['estado', 'creado'], name='trabajo_reporte_cola_idx')],
+            },
+        ),
+    ]
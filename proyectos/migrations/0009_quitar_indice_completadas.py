@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyectos', '0008_trabajo_reporte'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tarea',
+            name='tarea_completadas_idx',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyectos', '0010_feriado'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='proyecto',
+            name='tareas_atrasadas',
+        ),
+    ]
@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.db import models
-from datetime import date
+from django.db.models import Case, Count, Q, Value, When
+from django.utils import timezone
 from rrhh.models import Recurso, Conocimiento
 
 class Proyecto(models.Model):
@@ -30,10 +32,84 @@ class Proyecto(models.Model):
     fecha_fin_estimada = models.DateField()
     descripcion = models.TextField(blank=True)
 
+    # 2. Agregados de sus tareas, mantenidos por señales (ver agregados.py).
+    #    Así los listados no necesitan cargar las tareas. "recalcular_proyectos" los reconstruye.
+    total_tareas = models.PositiveIntegerField(default=0, editable=False)
+    suma_progreso = models.PositiveIntegerField(default=0, editable=False)
+    tareas_completadas = models.PositiveIntegerField(default=0, editable=False)
+    primera_fecha = models.DateField(null=True, blank=True, editable=False, verbose_name="Inicio de la primera tarea")
+    ultima_fecha = models.DateField(null=True, blank=True, editable=False, verbose_name="Fin de la última tarea")
+
+    @property
+    def avance_total(self):
+        """Promedio de progreso de sus tareas (0 si no tiene)"""
+        return round(self.suma_progreso / self.total_tareas) if self.total_tareas else 0
+
     def __str__(self):
         return f"{self.nombre} ({self.centro_costo}) ({self.get_unidad_negocio_display()})"
 
+def expresion_estado(hoy=None, prefijo=''):
+    """
+    La regla de Tarea.estado_actual como expresión SQL (Case/When), para anotar, filtrar y contar
+    en la base de datos. 'prefijo' permite usarla desde otra tabla (p.ej. 'tarea__' o una FilteredRelation).
+    """
+    hoy = hoy or timezone.localdate()
+    return Case(
+        When(Q(**{prefijo + 'progreso': 100}), then=Value(Tarea.COMPLETADO)),
+        When(Q(**{prefijo + 'fecha_fin__lt': hoy}), then=Value(Tarea.ATRASADO)),
+        When(Q(**{prefijo + 'progreso__gt': 0}), then=Value(Tarea.EN_CURSO)),
+        When(Q(**{prefijo + 'fecha_inicio__lte': hoy}), then=Value(Tarea.INICIANDO)),
+        default=Value(Tarea.PENDIENTE),
+        output_field=models.CharField(),
+    )
+
+
+class TareaQuerySet(models.QuerySet):
+
+    def con_estado(self, hoy=None):
+        """Anota 'estado' (COMPLETADO, ATRASADO, ...) calculado en SQL; se puede filtrar y ordenar por él"""
+        return self.annotate(estado=expresion_estado(hoy))
+
+    def conteo_estados(self, *agrupar, hoy=None):
+        """
+        Cantidad de tareas por estado en UNA consulta: {'total', 'completado', 'atrasado', ...}.
+        Con campos para agrupar (p.ej. 'proyecto', 'asignado_a', 'proyecto__centro_costo') devuelve
+        una fila así por cada grupo, con esos campos incluidos.
+        """
+        consulta, conteos = self._conteos_estado(hoy)
+        if not agrupar:
+            return consulta.aggregate(**conteos)
+        return consulta.values(*agrupar).annotate(**conteos).order_by(*agrupar)
+
+    async def aconteo_estados(self, *agrupar, hoy=None):
+        """conteo_estados con el ORM async; agrupado devuelve la lista de filas ya leída"""
+        consulta, conteos = self._conteos_estado(hoy)
+        if not agrupar:
+            return await consulta.aaggregate(**conteos)
+        return [fila async for fila in consulta.values(*agrupar).annotate(**conteos).order_by(*agrupar)]
+
+    def _conteos_estado(self, hoy):
+        conteos = {'total': Count('id')}
+        for codigo, _ in Tarea.ESTADOS:
+            conteos[codigo.lower()] = Count('id', filter=Q(_estado=codigo))
+        return self.alias(_estado=expresion_estado(hoy)), conteos
+
+
 class Tarea(models.Model):
+    # Estados calculados (ver estado_actual y TareaQuerySet.con_estado)
+    COMPLETADO = 'COMPLETADO'
+    ATRASADO = 'ATRASADO'
+    EN_CURSO = 'EN_CURSO'
+    INICIANDO = 'INICIANDO'
+    PENDIENTE = 'PENDIENTE'
+    ESTADOS = [
+        (COMPLETADO, 'Completado'),
+        (ATRASADO, 'Atrasado'),
+        (EN_CURSO, 'En Curso'),
+        (INICIANDO, 'Sin Avance'),
+        (PENDIENTE, 'Pendiente'),
+    ]
+
     nombre = models.CharField(max_length=200)
     proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name='tareas')
     
@@ -50,21 +126,95 @@ class Tarea(models.Model):
 
     requisitos = models.ManyToManyField(Conocimiento, blank=True, verbose_name="Conocimientos Requeridos")
 
+    # ID de la tarea en el cronograma de origen (MS Project, Primavera): permite reimportar sin duplicar
+    id_externo = models.CharField(max_length=50, null=True, blank=True, verbose_name="ID externo")
+
+    class Meta:
+        constraints = [
+            # Las tareas sin ID externo (NULL) no chocan entre sí
+            models.UniqueConstraint(fields=['proyecto', 'id_externo'], name='tarea_id_externo_unico'),
+        ]
+        # Índices para las consultas de agenda (ver EXPLAIN en tests.py: ninguna debe recorrer la tabla entera)
+        indexes = [
+            # Tareas abiertas por responsable y fecha: índice de ocupación, capacidad
+            models.Index(fields=['asignado_a', 'fecha_inicio', 'fecha_fin', 'id'],
+                         condition=models.Q(progreso__lt=100), name='tarea_abiertas_recurso_idx'),
+            # Cruce con una ventana de fechas de un responsable (reporte, Ver Recursos, asignación, Gantt por recurso)
+            models.Index(fields=['asignado_a', 'fecha_fin', 'fecha_inicio'], name='tarea_recurso_fechas_idx'),
+            # Cruce con una ventana de fechas sin filtrar responsable (Gantt)
+            models.Index(fields=['fecha_fin', 'fecha_inicio'], name='tarea_fechas_idx'),
+        ]
+
+    objects = TareaQuerySet.as_manager()
+
     @property
     def estado_actual(self):
-        """Calcula el estado en tiempo real basado en fechas y progreso"""
-        hoy = date.today()
+        """Calcula el estado en tiempo real basado en fechas y progreso (misma regla que expresion_estado)"""
+        hoy = timezone.localdate()
         
         if self.progreso == 100:
-            return 'COMPLETADO'
+            return self.COMPLETADO
         elif self.fecha_fin < hoy:
-            return 'ATRASADO'
+            return self.ATRASADO
         elif self.progreso > 0:
-            return 'EN_CURSO'
+            return self.EN_CURSO
         elif self.fecha_inicio <= hoy:
-            return 'INICIANDO' 
+            return self.INICIANDO
         else:
-            return 'PENDIENTE' 
+            return self.PENDIENTE
+
+    def __str__(self):
+        return f"{self.nombre} - {self.asignado_a}"
+
+class Feriado(models.Model):
+    """Día no hábil para todos (feriados legales): ver calendario.py y el comando cargar_feriados"""
+    fecha = models.DateField(unique=True)
+    nombre = models.CharField(max_length=100)
+
+    class Meta:
+        ordering = ['fecha']
+
+    def __str__(self):
+        return f"{self.fecha:%d/%m/%Y} - {self.nombre}"
+
+class TrabajoReporte(models.Model):
+    """Reporte pedido para generarse en segundo plano (ver reportes.py y el comando procesar_reportes)"""
+    PENDIENTE = 'pendiente'
+    EN_PROCESO = 'en_proceso'
+    TERMINADO = 'terminado'
+    ERROR = 'error'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_PROCESO, 'En proceso'),
+        (TERMINADO, 'Terminado'),
+        (ERROR, 'Error'),
+    ]
+    FORMATOS = [
+        ('excel', 'Excel'),
+        ('html', 'HTML'),
+    ]
+
+    formato = models.CharField(max_length=10, choices=FORMATOS)
+    parametros = models.JSONField(default=dict, help_text="Filtros del reporte: recurso, fecha_inicio, fecha_fin")
+    # Hash de formato + filtros + día: trabajos con la misma clave producen el mismo archivo
+    clave = models.CharField(max_length=64, db_index=True, editable=False)
+    estado = models.CharField(max_length=12, choices=ESTADOS, default=PENDIENTE)
+
+    partes = models.PositiveIntegerField(default=0, editable=False)
+    partes_listas = models.PositiveIntegerField(default=0, editable=False)
+    archivo = models.CharField(max_length=255, blank=True, editable=False, help_text="Ruta relativa a MEDIA_ROOT")
+    error = models.TextField(blank=True, editable=False)
+
+    solicitado_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # La cola: el worker toma el pendiente más antiguo
+            models.Index(fields=['estado', 'creado'], name='trabajo_reporte_cola_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.nombre} - {self.asignado_a}"
\ No newline at end of file
+        return f"Reporte {self.get_formato_display()} #{self.id} ({self.get_estado_display()})"
@@ -0,0 +1,273 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, namedtuple
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.cache import cache
+
+# Cada tarea abierta (progreso < 100) y asignada se guarda como un intervalo liviano
+Intervalo = namedtuple('Intervalo', ['inicio', 'fin', 'id', 'nombre'])
+
+CLAVE_VERSION = 'ocupacion:version'
+
+# Cada cuántos segundos se revisa si otro proceso modificó tareas
+INTERVALO_VERIFICACION = 1.0
+
+
+def _a_fecha(valor):
+    """Acepta date o texto 'YYYY-MM-DD' (como llegan desde request.GET)"""
+    if isinstance(valor, str):
+        return date.fromisoformat(valor[:10])
+    return valor
+
+
+class _Agenda:
+    """Intervalos de un recurso ordenados por fecha_inicio, con estructuras auxiliares para bisect"""
+
+    def __init__(self):
+        self.intervalos = []
+        self.recalcular()
+
+    def recalcular(self):
+        self.inicios = [i.inicio for i in self.intervalos]
+
+        # Máximo acumulado de fecha_fin: permite saber en O(log n) si algo se cruza con [a, b]
+        self.max_fin = []
+        maximo = None
+        for i in self.intervalos:
+            maximo = i.fin if maximo is None or i.fin > maximo else maximo
+            self.max_fin.append(maximo)
+
+        # Bloques ocupados fusionados (disjuntos y ordenados) para responder "libre desde"
+        self.bloques_inicio, self.bloques_fin = [], []
+        for i in self.intervalos:
+            if self.bloques_fin and i.inicio <= self.bloques_fin[-1] + timedelta(days=1):
+                self.bloques_fin[-1] = max(self.bloques_fin[-1], i.fin)
+            else:
+                self.bloques_inicio.append(i.inicio)
+                self.bloques_fin.append(i.fin)
+
+        # Inicio, fin (como ordinales) e id de cada intervalo, para procesar muchos recursos juntos (huecos.py)
+        self.ordinales = np.array(
+            [(i.inicio.toordinal(), i.fin.toordinal(), i.id) for i in self.intervalos], dtype=np.int64
+        ).reshape(-1, 3)
+
+        # La tarea que termina más tarde (empate: la de menor id)
+        self.ultima = min(self.intervalos, key=lambda i: (-i.fin.toordinal(), i.id), default=None)
+
+
+class IndiceOcupacion:
+    """
+    Índice en memoria de las tareas abiertas, agrupadas y ordenadas por recurso.
+    Se construye una vez por proceso y se mantiene al día con las señales de Tarea.
+    Si otro proceso modifica tareas, la versión compartida en el cache obliga a reconstruirlo.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._agendas = None
+        self._tareas = {}  # tarea_id -> recurso_id
+        self._version = None
+        self._verificado = 0.0
+
+    # --- CONSTRUCCIÓN Y MANTENIMIENTO ---
+
+    def _cargar(self):
+        from .models import Tarea
+
+        agendas = {}
+        tareas = {}
+        filas = Tarea.objects.filter(progreso__lt=100, asignado_a__isnull=False).values_list(
+            'asignado_a_id', 'fecha_inicio', 'fecha_fin', 'id', 'nombre'
+        ).order_by('asignado_a_id', 'fecha_inicio', 'fecha_fin', 'id')
+
+        for recurso_id, inicio, fin, tarea_id, nombre in filas.iterator(chunk_size=5000):
+            agenda = agendas.get(recurso_id)
+            if agenda is None:
+                agenda = agendas[recurso_id] = _Agenda()
+            agenda.intervalos.append(Intervalo(inicio, fin, tarea_id, nombre))
+            tareas[tarea_id] = recurso_id
+
+        for agenda in agendas.values():
+            agenda.recalcular()
+
+        self._agendas = agendas
+        self._tareas = tareas
+
+    def _asegurar(self):
+        ahora = time.monotonic()
+        if self._agendas is not None and ahora - self._verificado < INTERVALO_VERIFICACION:
+            return
+        version = cache.get(CLAVE_VERSION)
+        with self._lock:
+            if self._agendas is None or version != self._version:
+                self._cargar()
+                self._version = version
+            self._verificado = ahora
+
+    def _marcar_cambio(self):
+        # Avisamos al resto de procesos (si el cache es compartido) que su copia quedó vieja
+        try:
+            version = cache.incr(CLAVE_VERSION)
+        except ValueError:
+            cache.set(CLAVE_VERSION, 1, None)
+            version = 1
+        return version
+
+    def actualizar(self, tarea):
+        """Reubica una tarea en el índice (llamado desde post_save)"""
+        self.actualizar_varias(tareas=[tarea])
+
+    def eliminar(self, tarea_id):
+        """Saca una tarea del índice (llamado desde post_delete)"""
+        self.actualizar_varias(eliminadas=[tarea_id])
+
+    def actualizar_varias(self, tareas=(), eliminadas=()):
+        """
+        Reubica y saca muchas tareas de una vez (escrituras masivas, borrado de un proyecto):
+        cada agenda tocada se recalcula una sola vez y la versión compartida sube una sola vez.
+        """
+        version_previa = cache.get(CLAVE_VERSION)
+        with self._lock:
+            if self._agendas is None:
+                self._marcar_cambio()
+                return
+
+            # Primero se sacan todas (también las que se reubican), agrupadas por recurso
+            quitar = defaultdict(set)
+            for tarea_id in [t.id for t in tareas] + list(eliminadas):
+                recurso_id = self._tareas.pop(tarea_id, None)
+                if recurso_id is not None:
+                    quitar[recurso_id].add(tarea_id)
+            for recurso_id, ids in quitar.items():
+                agenda = self._agendas[recurso_id]
+                agenda.intervalos = [i for i in agenda.intervalos if i.id not in ids]
+
+            tocadas = set(quitar)
+            for tarea in tareas:
+                if tarea.asignado_a_id and tarea.progreso < 100:
+                    agenda = self._agendas.get(tarea.asignado_a_id)
+                    if agenda is None:
+                        agenda = self._agendas[tarea.asignado_a_id] = _Agenda()
+                    insort(agenda.intervalos, Intervalo(_a_fecha(tarea.fecha_inicio), _a_fecha(tarea.fecha_fin), tarea.id, tarea.nombre))
+                    self._tareas[tarea.id] = tarea.asignado_a_id
+                    tocadas.add(tarea.asignado_a_id)
+
+            for recurso_id in tocadas:
+                agenda = self._agendas[recurso_id]
+                if agenda.intervalos:
+                    agenda.recalcular()
+                else:
+                    del self._agendas[recurso_id]
+            self._sincronizar_version(version_previa)
+
+    def _sincronizar_version(self, version_previa):
+        nueva = self._marcar_cambio()
+        # Si nadie más cambió nada entre medio, nuestra copia sigue siendo la vigente
+        if self._version == version_previa:
+            self._version = nueva
+
+    def invalidar(self):
+        """Fuerza una reconstrucción completa en el próximo acceso (ej: tras un update masivo)"""
+        with self._lock:
+            self._agendas = None
+            self._marcar_cambio()
+
+    # --- CONSULTAS ---
+
+    def _agenda(self, recurso_id):
+        self._asegurar()
+        return self._agendas.get(recurso_id)
+
+    @staticmethod
+    def _cruza(agenda, desde, hasta):
+        if agenda is None:
+            return False
+        idx = bisect_right(agenda.inicios, hasta)
+        return idx > 0 and agenda.max_fin[idx - 1] >= desde
+
+    def ocupado(self, recurso_id, desde, hasta):
+        """¿Tiene el recurso alguna tarea abierta que se cruce con [desde, hasta]?"""
+        desde, hasta = _a_fecha(desde), _a_fecha(hasta)
+        with self._lock:
+            return self._cruza(self._agenda(recurso_id), desde, hasta)
+
+    def ocupados(self, desde, hasta, recursos_ids=None):
+        """Conjunto de recursos con al menos una tarea abierta en [desde, hasta]"""
+        desde, hasta = _a_fecha(desde), _a_fecha(hasta)
+        with self._lock:
+            self._asegurar()
+            ids = self._agendas.keys() if recursos_ids is None else recursos_ids
+            return {rid for rid in ids if self._cruza(self._agendas.get(rid), desde, hasta)}
+
+    def ultima_tarea(self, recurso_id, desde):
+        """La tarea abierta que termina más tarde, si termina en o después de 'desde'"""
+        desde = _a_fecha(desde)
+        with self._lock:
+            agenda = self._agenda(recurso_id)
+            if agenda is None or agenda.ultima.fin < desde:
+                return None
+            return agenda.ultima
+
+    def libre_desde(self, recurso_id, fecha):
+        """Primer día (>= fecha) en que el recurso no tiene ninguna tarea abierta encima"""
+        fecha = _a_fecha(fecha)
+        with self._lock:
+            agenda = self._agenda(recurso_id)
+            if agenda is None:
+                return fecha
+            idx = bisect_right(agenda.bloques_inicio, fecha) - 1
+            if idx >= 0 and agenda.bloques_fin[idx] >= fecha:
+                return agenda.bloques_fin[idx] + timedelta(days=1)
+            return fecha
+
+    def activas(self, recurso_id, fecha):
+        """Tareas abiertas que están en curso en 'fecha' (inicio <= fecha <= fin)"""
+        fecha = _a_fecha(fecha)
+        with self._lock:
+            agenda = self._agenda(recurso_id)
+            if agenda is None:
+                return []
+            idx = bisect_right(agenda.inicios, fecha)
+            return [i for i in agenda.intervalos[:idx] if i.fin >= fecha]
+
+    def proximas(self, recurso_id, fecha, n=3):
+        """Las siguientes N tareas abiertas que empiezan después de 'fecha'"""
+        fecha = _a_fecha(fecha)
+        with self._lock:
+            agenda = self._agenda(recurso_id)
+            if agenda is None:
+                return []
+            idx = bisect_right(agenda.inicios, fecha)
+            return agenda.intervalos[idx:idx + n]
+
+    def solapadas(self, recurso_id, desde, hasta):
+        """Todas las tareas abiertas del recurso que se cruzan con [desde, hasta]"""
+        desde, hasta = _a_fecha(desde), _a_fecha(hasta)
+        with self._lock:
+            agenda = self._agenda(recurso_id)
+            if agenda is None:
+                return []
+            idx = bisect_right(agenda.inicios, hasta)
+            # Sólo recorremos el prefijo cuyo máximo de fin alcanza 'desde'
+            primero = bisect_left(agenda.max_fin, desde, 0, idx)
+            return [i for i in agenda.intervalos[primero:idx] if i.fin >= desde]
+
+    def ordinales(self, recursos_ids):
+        """{recurso_id: arreglo (n x 3) con inicio, fin (ordinales) e id de sus tareas abiertas}"""
+        with self._lock:
+            self._asegurar()
+            return {rid: self._agendas[rid].ordinales for rid in recursos_ids if rid in self._agendas}
+
+    def intervalos(self, recursos_ids=None):
+        """{recurso_id: intervalos ordenados por inicio} de todos los recursos (o de los pedidos)"""
+        with self._lock:
+            self._asegurar()
+            ids = list(self._agendas) if recursos_ids is None else recursos_ids
+            return {rid: list(self._agendas[rid].intervalos) for rid in ids if rid in self._agendas}
+
+
+# Instancia única por proceso
+indice = IndiceOcupacion()
@@ -0,0 +1,319 @@
+"""
+Reportes de recursos en segundo plano, sin broker: la cola es la tabla TrabajoReporte.
+
+- solicitar() registra el pedido (o devuelve uno igual pendiente o ya generado y vigente).
+- El comando procesar_reportes toma los pendientes y llama a procesar(): los recursos se reparten
+  en partes que generan varios procesos (ProcessPoolExecutor) y el resultado se une en orden en
+  un archivo bajo MEDIA_ROOT/reportes/.
+- Los archivos se reutilizan mientras estén vigentes (misma clave = mismos filtros, mismo día).
+
+Configuración en settings.REPORTES.
+"""
+import hashlib
+import json
+import logging
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Prefetch, QuerySet
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .calendario import calendario
+from .exportar import escribir_excel, filas_reporte
+from .models import Tarea, TrabajoReporte
+from rrhh.models import Habilidad, Recurso
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION = {
+    'VIGENCIA': 60 * 60,          # segundos que un archivo generado se reutiliza
+    'RECURSOS_POR_PARTE': 200,    # recursos que genera cada tarea del pool
+    'PROCESOS': None,             # procesos del pool (None = os.cpu_count(), 0 = sin pool)
+    'TIEMPO_MAXIMO': 30 * 60,     # un trabajo "en proceso" más viejo que esto se reintenta (worker caído)
+}
+
+EXTENSIONES = {'excel': 'xlsx', 'html': 'html'}
+TIPOS = {
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'html': 'text/html; charset=utf-8',
+}
+MARCA_HOJAS = '<!--HOJAS-->'
+
+
+def configuracion():
+    return {**CONFIGURACION, **getattr(settings, 'REPORTES', {})}
+
+
+def _fecha(valor):
+    return date.fromisoformat(str(valor)).isoformat() if valor else None
+
+
+def normalizar_parametros(parametros):
+    """{'recurso', 'fecha_inicio', 'fecha_fin'} validados (lanza ValueError); recurso None = todos"""
+    recurso = parametros.get('recurso')
+    return {
+        'recurso': int(recurso) if recurso else None,
+        'fecha_inicio': _fecha(parametros.get('fecha_inicio')),
+        'fecha_fin': _fecha(parametros.get('fecha_fin')),
+    }
+
+
+def clave_reporte(formato, parametros, hoy=None):
+    # El día entra en la clave: "Atrasado" depende de la fecha de emisión
+    texto = json.dumps({'formato': formato, 'parametros': parametros, 'hoy': (hoy or timezone.localdate()).isoformat()},
+                       sort_keys=True)
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+def ruta_absoluta(trabajo):
+    return os.path.join(settings.MEDIA_ROOT, trabajo.archivo)
+
+
+def _vigentes():
+    limite = timezone.now() - timedelta(seconds=configuracion()['VIGENCIA'])
+    return TrabajoReporte.objects.filter(estado=TrabajoReporte.TERMINADO, terminado__gte=limite)
+
+
+def solicitar(formato, parametros, usuario=None):
+    """
+    Devuelve (trabajo, nuevo). Si ya hay uno con los mismos filtros en cola, en proceso o terminado
+    y vigente, se devuelve ese (nuevo=False) en vez de generar otro. Lanza ValueError si los filtros
+    o el formato son inválidos.
+    """
+    if formato not in EXTENSIONES:
+        raise ValueError(formato)
+    parametros = normalizar_parametros(parametros)
+    clave = clave_reporte(formato, parametros)
+
+    en_curso = TrabajoReporte.objects.filter(
+        clave=clave, estado__in=[TrabajoReporte.PENDIENTE, TrabajoReporte.EN_PROCESO]
+    ).order_by('-creado').first()
+    if en_curso:
+        return en_curso, False
+    listo = _vigentes().filter(clave=clave).order_by('-terminado').first()
+    if listo and os.path.exists(ruta_absoluta(listo)):
+        return listo, False
+
+    trabajo = TrabajoReporte.objects.create(
+        formato=formato, parametros=parametros, clave=clave,
+        solicitado_por=usuario if usuario is not None and usuario.is_authenticated else None,
+    )
+    return trabajo, True
+
+
+def a_json(trabajo):
+    return {
+        'id': trabajo.id,
+        'formato': trabajo.formato,
+        'parametros': trabajo.parametros,
+        'estado': trabajo.estado,
+        'partes': trabajo.partes,
+        'partes_listas': trabajo.partes_listas,
+        'error': trabajo.error,
+        'creado': trabajo.creado.isoformat(),
+        'terminado': trabajo.terminado.isoformat() if trabajo.terminado else None,
+    }
+
+
+# --- DATOS DEL REPORTE (los usa también la vista reporte_recurso) ---
+
+def datos_reporte(recursos, fecha_inicio=None, fecha_fin=None, hoy=None):
+    """
+    Por cada recurso: sus tareas en el periodo (de la más reciente a la más antigua, con 'estado'
+    y 'dias_habiles' anotados) y sus estadísticas. Cuesta lo mismo en consultas sea uno o sean todos los recursos:
+    los recursos con su perfil y habilidades y las tareas de todos juntas.
+    """
+    if isinstance(recursos, QuerySet):
+        recursos = recursos.select_related('perfil').prefetch_related(
+            Prefetch('habilidades', queryset=Habilidad.objects.select_related('conocimiento').order_by('conocimiento__nombre'))
+        )
+    recursos = list(recursos)
+    if not recursos:
+        return []
+
+    tareas = Tarea.objects.filter(asignado_a__in=[r.id for r in recursos])
+    if fecha_inicio:
+        tareas = tareas.filter(fecha_inicio__gte=fecha_inicio)
+    if fecha_fin:
+        tareas = tareas.filter(fecha_fin__lte=fecha_fin)
+
+    tareas = list(tareas.con_estado(hoy).select_related('proyecto').order_by('asignado_a', '-fecha_fin', 'id'))
+    if tareas:
+        habiles = calendario.dias_habiles([t.fecha_inicio for t in tareas], [t.fecha_fin for t in tareas])
+        for tarea, dias in zip(tareas, habiles.tolist()):
+            tarea.dias_habiles = dias
+
+    por_recurso = defaultdict(list)
+    for tarea in tareas:
+        por_recurso[tarea.asignado_a_id].append(tarea)
+
+    datos = []
+    for recurso in recursos:
+        # Las tareas ya vienen cargadas con su estado: contarlas aquí ahorra volver a leerlas con un GROUP BY
+        conteo = Counter(t.estado for t in por_recurso[recurso.id])
+        total_tareas = len(por_recurso[recurso.id])
+        completadas = conteo[Tarea.COMPLETADO]
+        datos.append({
+            'recurso': recurso,
+            'tareas': por_recurso[recurso.id],
+            'stats': {
+                'total': total_tareas,
+                'completadas': completadas,
+                'pendientes': total_tareas - completadas,
+                'atrasadas': conteo[Tarea.ATRASADO],
+                'rendimiento': round((completadas / total_tareas * 100), 1) if total_tareas > 0 else 0
+            }
+        })
+    return datos
+
+
+# --- GENERACIÓN POR PARTES ---
+
+def _iniciar_proceso():
+    # Con "spawn"/"forkserver" el proceso hijo parte sin Django configurado
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def generar_parte(formato, recursos_ids, fecha_inicio, fecha_fin):
+    """
+    Una parte del reporte (se ejecuta en un proceso del pool): filas de Excel o las hojas HTML
+    de esos recursos, en orden de id.
+    """
+    recursos = Recurso.objects.filter(id__in=recursos_ids).order_by('id')
+    if formato == 'excel':
+        return list(filas_reporte(recursos, fecha_inicio, fecha_fin))
+    return ''.join(
+        render_to_string('proyectos/_hoja_reporte.html', {'item': item})
+        for item in datos_reporte(recursos, fecha_inicio, fecha_fin)
+    )
+
+
+def _recursos_ids(parametros):
+    recursos = Recurso.objects.order_by('id')
+    if parametros['recurso']:
+        recursos = recursos.filter(id=parametros['recurso'])
+    return list(recursos.values_list('id', flat=True))
+
+
+def _generar_partes(formato, partes, parametros, procesos):
+    """Resultados de cada parte EN ORDEN, a medida que terminan (map del pool)"""
+    argumentos = [(formato, ids, parametros['fecha_inicio'], parametros['fecha_fin']) for ids in partes]
+    if procesos == 0 or len(partes) <= 1:
+        for args in argumentos:
+            yield generar_parte(*args)
+        return
+
+    # Los hijos no deben heredar las conexiones abiertas del padre
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso) as pool:
+        yield from pool.map(generar_parte, *zip(*argumentos))
+
+
+def procesar(trabajo, procesos=None, recursos_por_parte=None):
+    """Genera el archivo de un trabajo ya tomado (EN_PROCESO) y lo deja TERMINADO o con ERROR"""
+    config = configuracion()
+    if procesos is None:
+        procesos = config['PROCESOS']
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    recursos_por_parte = max(1, recursos_por_parte or config['RECURSOS_POR_PARTE'])
+
+    trabajo.archivo = os.path.join('reportes', f"{trabajo.clave[:16]}-{trabajo.id}.{EXTENSIONES[trabajo.formato]}")
+    destino = ruta_absoluta(trabajo)
+    temporal = f"{destino}.tmp"
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+
+    try:
+        ids = _recursos_ids(trabajo.parametros)
+        partes = [ids[i:i + recursos_por_parte] for i in range(0, len(ids), recursos_por_parte)]
+        trabajo.partes = len(partes)
+        TrabajoReporte.objects.filter(id=trabajo.id).update(partes=trabajo.partes)
+
+        resultados = _generar_partes(trabajo.formato, partes, trabajo.parametros, procesos)
+        if trabajo.formato == 'excel':
+            escribir_excel(_contar_partes(trabajo, resultados, aplanar=True), temporal)
+        else:
+            _escribir_html(_contar_partes(trabajo, resultados), temporal, trabajo.parametros)
+        os.replace(temporal, destino)
+    except Exception as e:
+        logger.exception("Falló el reporte #%s", trabajo.id)
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        trabajo.estado, trabajo.error = TrabajoReporte.ERROR, f"{type(e).__name__}: {e}"
+        trabajo.archivo = ''
+    else:
+        trabajo.estado = TrabajoReporte.TERMINADO
+    trabajo.terminado = timezone.now()
+    trabajo.save(update_fields=['estado', 'error', 'archivo', 'terminado'])
+    return trabajo
+
+
+def _contar_partes(trabajo, resultados, aplanar=False):
+    """Pasa los resultados y va anotando el avance (partes_listas) para la API de estado"""
+    for listas, resultado in enumerate(resultados, 1):
+        if aplanar:
+            yield from resultado
+        else:
+            yield resultado
+        TrabajoReporte.objects.filter(id=trabajo.id).update(partes_listas=listas)
+
+
+def _escribir_html(hojas, ruta, parametros):
+    cabecera, pie = render_to_string('proyectos/reporte_archivo.html', {
+        'contenido': MARCA_HOJAS, 'filtros': parametros,
+    }).split(MARCA_HOJAS)
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write(cabecera)
+        for hojas_parte in hojas:
+            archivo.write(hojas_parte)
+        archivo.write(pie)
+
+
+# --- COLA ---
+
+def tomar_siguiente():
+    """
+    El pendiente más antiguo, marcado EN_PROCESO. El UPDATE condicionado al estado hace que dos
+    workers no tomen el mismo (si otro lo ganó, se prueba con el siguiente).
+    """
+    while True:
+        trabajo = TrabajoReporte.objects.filter(estado=TrabajoReporte.PENDIENTE).order_by('creado', 'id').first()
+        if trabajo is None:
+            return None
+        ahora = timezone.now()
+        tomado = TrabajoReporte.objects.filter(id=trabajo.id, estado=TrabajoReporte.PENDIENTE).update(
+            estado=TrabajoReporte.EN_PROCESO, iniciado=ahora, partes_listas=0, error='',
+        )
+        if tomado:
+            trabajo.estado, trabajo.iniciado, trabajo.partes_listas, trabajo.error = TrabajoReporte.EN_PROCESO, ahora, 0, ''
+            return trabajo
+
+
+def mantenimiento():
+    """
+    Reencola los trabajos de un worker que se cayó y borra los vencidos con sus archivos.
+    Devuelve (reencolados, borrados).
+    """
+    config = configuracion()
+    ahora = timezone.now()
+    reencolados = TrabajoReporte.objects.filter(
+        estado=TrabajoReporte.EN_PROCESO, iniciado__lt=ahora - timedelta(seconds=config['TIEMPO_MAXIMO'])
+    ).update(estado=TrabajoReporte.PENDIENTE)
+
+    vencidos = list(TrabajoReporte.objects.filter(
+        estado__in=[TrabajoReporte.TERMINADO, TrabajoReporte.ERROR],
+        terminado__lt=ahora - timedelta(seconds=config['VIGENCIA']),
+    ))
+    for trabajo in vencidos:
+        if trabajo.archivo and os.path.exists(ruta_absoluta(trabajo)):
+            os.remove(ruta_absoluta(trabajo))
+    TrabajoReporte.objects.filter(id__in=[t.id for t in vencidos]).delete()
+    return reencolados, len(vencidos)
@@ -0,0 +1,111 @@
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from . import conflictos
+from .calendario import calendario
+from .models import Tarea
+from .signals import tareas_actualizadas
+
+
+class ErrorReprogramacion(Exception):
+    """Cambio de fechas inválido (tarea inexistente, fin antes que inicio, etc.)"""
+
+
+class ConflictoAgenda(ErrorReprogramacion):
+    """Las nuevas fechas dejarían a algún responsable con tareas cruzadas (no se guardó nada)"""
+
+    def __init__(self, verificacion):
+        super().__init__("Algún responsable quedaría con tareas cruzadas.")
+        self.verificacion = verificacion
+
+
+def _a_fecha(valor):
+    return date.fromisoformat(str(valor)[:10])
+
+
+def reprogramar(cambios, verificar_conflictos=False):
+    """
+    Aplica varios cambios de fecha de una vez y empuja hacia adelante las sucesoras
+    (cadena 'predecesora') que queden empezando antes de que termine su predecesora:
+    pasan al día hábil siguiente conservando su duración en días hábiles.
+    Las tareas de 'cambios' quedan con las fechas pedidas, nunca se empujan: si alguna empezaría
+    antes de que termine su predecesora (movida en el mismo lote), lanza ErrorReprogramacion.
+    Todo se guarda con bulk_update en una sola transacción.
+
+    cambios: lista de dicts {'id', 'start', 'end'}.
+    verificar_conflictos: si es True y alguna tarea movida (incluidas las empujadas) se cruza
+    con otra del mismo responsable, lanza ConflictoAgenda sin guardar.
+    Devuelve la lista de tareas que cambiaron de fecha (explícitas + empujadas).
+    """
+    # 1. Validamos y normalizamos los cambios pedidos
+    pedidos = {}
+    for cambio in cambios:
+        try:
+            tarea_id = int(cambio['id'])
+            inicio, fin = _a_fecha(cambio['start']), _a_fecha(cambio['end'])
+        except (KeyError, TypeError, ValueError):
+            raise ErrorReprogramacion(f"Cambio inválido: {cambio}")
+        if fin < inicio:
+            raise ErrorReprogramacion(f"La tarea {tarea_id} termina antes de empezar.")
+        pedidos[tarea_id] = (inicio, fin)
+
+    with transaction.atomic():
+        tareas = Tarea.objects.select_for_update().in_bulk(pedidos.keys())
+        faltantes = set(pedidos) - set(tareas)
+        if faltantes:
+            raise ErrorReprogramacion(f"Tarea no encontrada: {', '.join(map(str, sorted(faltantes)))}")
+
+        movidas = {}
+        for tarea_id, (inicio, fin) in pedidos.items():
+            tarea = tareas[tarea_id]
+            if (tarea.fecha_inicio, tarea.fecha_fin) != (inicio, fin):
+                tarea.fecha_inicio, tarea.fecha_fin = inicio, fin
+                movidas[tarea_id] = tarea
+
+        # 2. Cascada por niveles: una consulta por nivel del grafo, sólo desde las tareas que se movieron.
+        #    Cada tarea tiene una sola predecesora, así que cada empujada viene de una sola tarea pedida
+        #    ('origen'): volver a esa misma tarea es un ciclo y ahí se corta.
+        frontera = list(movidas.values())
+        origen = {tarea_id: tarea_id for tarea_id in movidas}
+        while frontera:
+            por_id = {t.id: t for t in frontera}
+            sucesoras = Tarea.objects.select_for_update().filter(predecesora_id__in=por_id.keys())
+
+            # Si la sucesora ya está cargada (cambio explícito) usamos esa instancia
+            sucesoras = [tareas.setdefault(s.id, s) for s in sucesoras]
+            empujadas, choques = [], []
+            for sucesora in sucesoras:
+                predecesora = por_id[sucesora.predecesora_id]
+                if sucesora.fecha_inicio > predecesora.fecha_fin or origen[predecesora.id] == sucesora.id:
+                    continue
+                (choques if sucesora.id in pedidos else empujadas).append(sucesora)
+            if choques:
+                raise ErrorReprogramacion("; ".join(
+                    f"La tarea {s.id} empieza antes de que termine su predecesora {s.predecesora_id}" for s in choques
+                ) + ".")
+
+            # Todo el nivel de una vez: empieza el día hábil siguiente al fin de su predecesora y
+            # conserva sus días hábiles (ver calendario.py)
+            inicios, fines = calendario.mover(
+                [s.fecha_inicio for s in empujadas], [s.fecha_fin for s in empujadas],
+                [por_id[s.predecesora_id].fecha_fin + timedelta(days=1) for s in empujadas],
+            )
+            frontera = []
+            for sucesora, inicio, fin in zip(empujadas, inicios.tolist(), fines.tolist()):
+                sucesora.fecha_inicio, sucesora.fecha_fin = inicio, fin
+                movidas[sucesora.id] = sucesora
+                origen[sucesora.id] = origen[sucesora.predecesora_id]
+                frontera.append(sucesora)
+
+        # 3. Escritura masiva y aviso a los índices/caches que dependen de las tareas
+        movidas = list(movidas.values())
+        if verificar_conflictos:
+            verificacion = conflictos.verificar(movidas)
+            if verificacion:
+                raise ConflictoAgenda(verificacion)
+
+        Tarea.objects.bulk_update(movidas, ['fecha_inicio', 'fecha_fin'], batch_size=1000)
+        tareas_actualizadas.send(sender=Tarea, tareas=movidas)
+
+    return movidas
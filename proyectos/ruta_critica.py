@@ -0,0 +1,131 @@
+from collections import deque
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.cache import cache
+
+from .calendario import a_ordinales, calendario
+from .models import Tarea
+
+# Los resultados se guardan por proyecto hasta que cambia alguna de sus tareas (ver signals.py)
+# o el calendario de feriados (su versión es parte de la clave)
+CLAVE_CACHE = 'ruta_critica:{}:{}'
+
+
+def clave_cache(proyecto_id):
+    return CLAVE_CACHE.format(proyecto_id, calendario.version())
+
+
+def invalidar(*proyectos_ids):
+    cache.delete_many([clave_cache(pid) for pid in proyectos_ids if pid])
+
+
+def _calcular_proyecto(proyecto_id):
+    """
+    CPM sobre el grafo de 'predecesora' de un proyecto, en tiempo lineal:
+    orden topológico (Kahn), pasada hacia adelante (inicio/fin tempranos),
+    pasada hacia atrás (inicio/fin tardíos) y holgura = inicio tardío - inicio temprano.
+    Las fechas se manejan como números de día hábil (calendario.numero, calculados para todas las
+    tareas de una vez), así duraciones y holguras quedan en días hábiles. El resultado vuelve a ordinales.
+    """
+    filas = list(Tarea.objects.filter(proyecto_id=proyecto_id).values_list(
+        'id', 'fecha_inicio', 'fecha_fin', 'predecesora_id'
+    ))
+
+    # Inicio: su día hábil (o el siguiente); fin: el último día hábil que no pasa de su fecha fin
+    ids = [f[0] for f in filas]
+    numeros_inicio = calendario.numero([f[1] for f in filas]).tolist()
+    numeros_fin = (calendario.numero([f[2] + timedelta(days=1) for f in filas]) - 1).tolist()
+
+    inicio, duracion, predecesora = {}, {}, {}
+    for tarea_id, n_inicio, n_fin, (_, _, _, pred_id) in zip(ids, numeros_inicio, numeros_fin, filas):
+        inicio[tarea_id] = n_inicio
+        duracion[tarea_id] = max(n_fin - n_inicio + 1, 1)
+        predecesora[tarea_id] = pred_id
+
+    # Predecesoras de OTROS proyectos: no se recalculan, son una restricción fija (su fecha fin)
+    externas = {pid for pid in predecesora.values() if pid and pid not in inicio}
+    fin_externa = {}
+    if externas:
+        externas = list(Tarea.objects.filter(id__in=externas).values_list('id', 'fecha_fin'))
+        numeros = calendario.numero([f_fin + timedelta(days=1) for _, f_fin in externas]) - 1
+        fin_externa = dict(zip([tid for tid, _ in externas], numeros.tolist()))
+
+    # 1. ORDEN TOPOLÓGICO: cada tarea tiene a lo sumo una predecesora, así que el grado de entrada es 0 o 1
+    sucesoras = {tid: [] for tid in inicio}
+    raices = deque()
+    for tid, pid in predecesora.items():
+        if pid in inicio:
+            sucesoras[pid].append(tid)
+        else:
+            raices.append(tid)
+
+    orden = []
+    while raices:
+        tid = raices.popleft()
+        orden.append(tid)
+        raices.extend(sucesoras[tid])
+
+    # Lo que no entró al orden está en un ciclo (o cuelga de uno)
+    ciclos = sorted(set(inicio) - set(orden))
+
+    # 2. PASADA HACIA ADELANTE
+    es, ef = {}, {}
+    for tid in orden:
+        pid = predecesora[tid]
+        minimo = inicio[tid]
+        if pid in ef:
+            minimo = max(minimo, ef[pid] + 1)
+        elif pid in fin_externa:
+            minimo = max(minimo, fin_externa[pid] + 1)
+        es[tid] = minimo
+        ef[tid] = minimo + duracion[tid] - 1
+
+    fin_proyecto = max(ef.values()) if ef else None
+
+    # 3. PASADA HACIA ATRÁS
+    ls, lf = {}, {}
+    for tid in reversed(orden):
+        hijos = sucesoras[tid]
+        lf[tid] = min(ls[h] for h in hijos) - 1 if hijos else fin_proyecto
+        ls[tid] = lf[tid] - duracion[tid] + 1
+
+    # 4. De números de día hábil a fechas (ordinales), todas juntas
+    numeros = np.array([[es[tid], ef[tid], ls[tid], lf[tid]] for tid in orden], dtype=np.int64).reshape(-1, 4)
+    fechas = a_ordinales(calendario.fecha(numeros)).tolist()
+
+    tareas = {}
+    for tid, (f_es, f_ef, f_ls, f_lf) in zip(orden, fechas):
+        holgura = ls[tid] - es[tid]
+        tareas[tid] = {
+            'es': f_es, 'ef': f_ef, 'ls': f_ls, 'lf': f_lf,
+            'holgura': holgura, 'critica': holgura == 0,
+        }
+
+    return {
+        'fin_proyecto': a_ordinales(calendario.fecha(fin_proyecto)).item() if fin_proyecto is not None else None,
+        'tareas': tareas,
+        'ciclos': ciclos,
+    }
+
+
+def analizar(proyectos_ids):
+    """Analiza uno o varios proyectos (cada uno con su propio cache). Devuelve {proyecto_id: resultado}"""
+    resultados = cache.get_many([clave_cache(pid) for pid in proyectos_ids])
+    salida = {}
+    for pid in proyectos_ids:
+        resultado = resultados.get(clave_cache(pid))
+        if resultado is None:
+            resultado = _calcular_proyecto(pid)
+            cache.set(clave_cache(pid), resultado, None)
+        salida[pid] = resultado
+    return salida
+
+
+def analizar_proyecto(proyecto_id):
+    """Resultado CPM de un solo proyecto"""
+    return analizar([proyecto_id])[proyecto_id]
+
+
+def a_fecha(ordinal):
+    return date.fromordinal(ordinal).isoformat() if ordinal is not None else None
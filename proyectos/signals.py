@@ -0,0 +1,189 @@
+import copy
+
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete, pre_delete
+from django.dispatch import receiver, Signal
+from .models import Feriado, Tarea, Proyecto
+from .ocupacion import indice
+from .autocompletar import autocompletar
+from . import agregados, ruta_critica, tablero
+from .calendario import calendario
+from rrhh.models import Recurso, Perfil, Conocimiento
+
+# Se envía después de escrituras masivas (bulk_update / update) que no disparan post_save.
+# Argumentos: tareas (lista de instancias de Tarea ya actualizadas)
+tareas_actualizadas = Signal()
+
+
+@receiver(post_init, sender=Tarea)
+def recordar_valores_originales(sender, instance, **kwargs):
+    # Guardamos los valores con que se cargó la tarea, para saber al guardar qué cambió
+    # (si se movió de proyecto, cuánto restar de los agregados del anterior, etc.)
+    instance._original = {campo: instance.__dict__.get(campo) for campo in agregados.CAMPOS}
+
+
+def _original(tarea):
+    return getattr(tarea, '_original', {})
+
+
+# --- ÍNDICE DE OCUPACIÓN ---
+# Se actualiza recién cuando la transacción se confirma, para no reflejar cambios que se deshacen
+
+@receiver(post_save, sender=Tarea)
+def tarea_guardada(sender, instance, **kwargs):
+    # Copia: la instancia puede seguir modificándose antes del commit
+    tarea = copy.copy(instance)
+    transaction.on_commit(lambda: indice.actualizar(tarea))
+
+
+def _borrado_de_proyecto(origen):
+    # 'origin' es lo que se pidió borrar: un proyecto (o un queryset de proyectos) arrastra sus tareas
+    return isinstance(origen, Proyecto) or getattr(origen, 'model', None) is Proyecto
+
+
+@receiver(post_delete, sender=Tarea)
+def tarea_eliminada(sender, instance, origin=None, **kwargs):
+    if _borrado_de_proyecto(origin):
+        return  # proyecto_por_eliminar ya las saca todas juntas
+    tarea_id = instance.id
+    transaction.on_commit(lambda: indice.eliminar(tarea_id))
+
+
+@receiver(pre_delete, sender=Proyecto)
+def proyecto_por_eliminar(sender, instance, **kwargs):
+    tareas_ids = list(instance.tareas.values_list('id', flat=True))
+    transaction.on_commit(lambda: indice.actualizar_varias(eliminadas=tareas_ids))
+
+
+@receiver(tareas_actualizadas)
+def tareas_actualizadas_en_bloque(sender, tareas, **kwargs):
+    copias = [copy.copy(t) for t in tareas]
+    transaction.on_commit(lambda: indice.actualizar_varias(tareas=copias))
+
+
+# --- CACHE DE RUTA CRÍTICA ---
+# Se invalida el proyecto de la tarea (y el anterior, si se movió), más los proyectos
+# de sus sucesoras en otros proyectos, para los que esta tarea es una restricción externa
+
+def _proyectos_afectados(tareas, con_sucesoras=True):
+    proyectos = set()
+    for tarea in tareas:
+        proyectos.add(tarea.proyecto_id)
+        proyectos.add(_original(tarea).get('proyecto_id'))
+    if con_sucesoras:
+        proyectos.update(
+            Tarea.objects.filter(predecesora__in=[t.id for t in tareas if t.id])
+            .exclude(proyecto_id__in=proyectos)
+            .values_list('proyecto_id', flat=True).distinct()
+        )
+    return proyectos
+
+
+@receiver(post_save, sender=Tarea)
+def invalidar_ruta_critica(sender, instance, **kwargs):
+    proyectos = _proyectos_afectados([instance])
+    transaction.on_commit(lambda: ruta_critica.invalidar(*proyectos))
+
+
+@receiver(post_delete, sender=Tarea)
+def invalidar_ruta_critica_al_eliminar(sender, instance, **kwargs):
+    # Al borrar, Django ya dejó en NULL la predecesora de las sucesoras: no hay a quién buscar
+    proyectos = _proyectos_afectados([instance], con_sucesoras=False)
+    transaction.on_commit(lambda: ruta_critica.invalidar(*proyectos))
+
+
+@receiver(tareas_actualizadas)
+def invalidar_ruta_critica_en_bloque(sender, tareas, **kwargs):
+    proyectos = _proyectos_afectados(tareas)
+    transaction.on_commit(lambda: ruta_critica.invalidar(*proyectos))
+
+
+# --- AGREGADOS DEL PROYECTO ---
+# A diferencia de los caches, se escriben dentro de la misma transacción (con F()),
+# así se deshacen junto con el cambio de la tarea si algo falla
+
+def _actuales(tarea):
+    return {campo: getattr(tarea, campo) for campo in agregados.CAMPOS}
+
+
+@receiver(post_save, sender=Tarea)
+def actualizar_agregados(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    cambios = agregados.nuevos_cambios()
+    agregados.registrar(cambios, None if created else _original(instance), _actuales(instance))
+    agregados.aplicar(cambios)
+
+
+@receiver(post_delete, sender=Tarea)
+def actualizar_agregados_al_eliminar(sender, instance, **kwargs):
+    cambios = agregados.nuevos_cambios()
+    agregados.registrar(cambios, _original(instance), None)
+    agregados.aplicar(cambios)
+
+
+@receiver(tareas_actualizadas)
+def actualizar_agregados_en_bloque(sender, tareas, **kwargs):
+    cambios = agregados.nuevos_cambios()
+    for tarea in tareas:
+        agregados.registrar(cambios, _original(tarea), _actuales(tarea))
+    agregados.aplicar(cambios)
+
+
+# --- CACHE DEL DASHBOARD ---
+
+@receiver(post_save, sender=Proyecto)
+@receiver(post_delete, sender=Proyecto)
+@receiver(post_save, sender=Tarea)
+@receiver(post_delete, sender=Tarea)
+@receiver(post_save, sender=Recurso)
+@receiver(post_delete, sender=Recurso)
+@receiver(tareas_actualizadas)
+def invalidar_tablero(sender, **kwargs):
+    transaction.on_commit(tablero.invalidar)
+
+
+# --- BUSCADORES (AUTOCOMPLETAR) ---
+# Se reconstruye el catálogo del modelo que cambió (el de recursos muestra también el perfil)
+
+@receiver(post_save, sender=Recurso)
+@receiver(post_delete, sender=Recurso)
+@receiver(post_save, sender=Perfil)
+@receiver(post_delete, sender=Perfil)
+def invalidar_autocompletar_recursos(sender, **kwargs):
+    transaction.on_commit(lambda: autocompletar.invalidar('recurso'))
+
+
+@receiver(post_save, sender=Proyecto)
+@receiver(post_delete, sender=Proyecto)
+def invalidar_autocompletar_proyectos(sender, **kwargs):
+    transaction.on_commit(lambda: autocompletar.invalidar('proyecto'))
+
+
+@receiver(post_save, sender=Conocimiento)
+@receiver(post_delete, sender=Conocimiento)
+def invalidar_autocompletar_conocimientos(sender, **kwargs):
+    transaction.on_commit(lambda: autocompletar.invalidar('conocimiento'))
+
+
+# --- CALENDARIO LABORAL ---
+# Cambia la versión del calendario: también deja viejas las rutas críticas cacheadas (su clave la incluye)
+
+@receiver(post_save, sender=Feriado)
+@receiver(post_delete, sender=Feriado)
+def invalidar_calendario(sender, **kwargs):
+    transaction.on_commit(calendario.invalidar)
+
+
+# --- AL FINAL: lo guardado pasa a ser el nuevo "original" ---
+# (registrado después de todos los receptores de arriba, que todavía necesitan los valores anteriores)
+
+@receiver(post_save, sender=Tarea)
+def refrescar_valores_originales(sender, instance, **kwargs):
+    instance._original = _actuales(instance)
+
+
+@receiver(tareas_actualizadas)
+def refrescar_valores_originales_en_bloque(sender, tareas, **kwargs):
+    for tarea in tareas:
+        tarea._original = _actuales(tarea)
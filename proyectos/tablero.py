@@ -0,0 +1,91 @@
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Proyecto
+from rrhh.models import Recurso
+
+# Un resumen por día: "atrasadas" depende de la fecha, así que la clave cambia sola a medianoche
+CLAVE_CACHE = 'tablero:resumen:{}'
+DURACION = 60 * 60 * 24
+
+
+def clave_cache():
+    return CLAVE_CACHE.format(timezone.localdate().isoformat())
+
+
+def invalidar():
+    cache.delete(clave_cache())
+
+
+def _nuevo_grupo(nombre):
+    return {'nombre': nombre, 'cantidad': 0, 'tareas': 0, 'completadas': 0, 'atrasadas': 0, 'suma_progreso': 0, 'lista_proyectos': []}
+
+
+def _cerrar_grupo(grupo):
+    grupo['avance'] = round(grupo['suma_progreso'] / grupo['tareas']) if grupo['tareas'] else 0
+    return grupo
+
+
+def proyectos_con_conteos():
+    """
+    UNA sola consulta agrupada: cada proyecto con sus conteos de tareas
+    (en vivo y no desde los agregados del Proyecto, para que "atrasadas" sea la de hoy)
+    """
+    hoy = timezone.localdate()
+    return list(Proyecto.objects.annotate(
+        conteo_tareas=Count('tareas'),
+        completadas=Count('tareas', filter=Q(tareas__progreso=100)),
+        atrasadas=Count('tareas', filter=Q(tareas__progreso__lt=100, tareas__fecha_fin__lt=hoy)),
+        progreso_acumulado=Sum('tareas__progreso'),
+    ).order_by('centro_costo', 'nombre').values(
+        'id', 'nombre', 'centro_costo', 'unidad_negocio', 'fecha_inicio', 'fecha_fin_estimada',
+        'conteo_tareas', 'completadas', 'atrasadas', 'progreso_acumulado'
+    ))
+
+
+def armar(proyectos, total_recursos):
+    """Resumen del Dashboard a partir de proyectos_con_conteos() y la cantidad de recursos"""
+    # Acumulamos por Centro de Costo y por Unidad de Negocio en memoria
+    por_cc, por_unidad = {}, {}
+    unidades = dict(Proyecto.OPCIONES_UNIDAD)
+    totales = _nuevo_grupo('Total')
+
+    for p in proyectos:
+        # Mismos nombres de clave que usa la plantilla
+        p['total_tareas'] = p.pop('conteo_tareas')
+        p['suma_progreso'] = p.pop('progreso_acumulado') or 0
+        cc = por_cc.setdefault(p['centro_costo'], _nuevo_grupo(p['centro_costo']))
+        un = por_unidad.setdefault(p['unidad_negocio'], _nuevo_grupo(unidades.get(p['unidad_negocio'], p['unidad_negocio'])))
+
+        for grupo in (cc, un, totales):
+            grupo['cantidad'] += 1
+            grupo['tareas'] += p['total_tareas']
+            grupo['completadas'] += p['completadas']
+            grupo['atrasadas'] += p['atrasadas']
+            grupo['suma_progreso'] += p['suma_progreso']
+        cc['lista_proyectos'].append(p)
+
+    return {
+        'total_proyectos': totales['cantidad'],
+        'total_tareas': totales['tareas'],
+        'tareas_completadas': totales['completadas'],
+        'tareas_atrasadas': totales['atrasadas'],
+        'total_recursos': total_recursos,
+        'proyectos_por_cc': [_cerrar_grupo(g) for g in por_cc.values()],
+        'proyectos_por_unidad': [_cerrar_grupo(g) for g in por_unidad.values()],
+    }
+
+
+def _calcular():
+    return armar(proyectos_con_conteos(), Recurso.objects.count())
+
+
+def resumen_tablero():
+    """Datos del Dashboard, desde el cache mientras no cambien Proyectos, Tareas o Recursos"""
+    clave = clave_cache()
+    datos = cache.get(clave)
+    if datos is None:
+        datos = _calcular()
+        cache.set(clave, datos, DURACION)
+    return datos
@@ -1,3 +1,920 @@
-from django.test import TestCase
+import io
+import os
+import random
+import tempfile
+from collections import Counter
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q, Sum
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase
+from openpyxl import load_workbook
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+
+import numpy as np
+
+from . import agregados, asignacion, capacidad, conflictos, datos_sinteticos, huecos, ocupacion, reportes, ruta_critica, tablero, views, vistas_asincronas
+from . import importacion as importacion_cronograma
+from .calendario import calendario, feriados_chile
+from .models import Feriado, Proyecto, Tarea, TrabajoReporte
+from .reprogramacion import ErrorReprogramacion, reprogramar
+from .autocompletar import autocompletar
+from .ocupacion import Intervalo, indice
+from .signals import tareas_actualizadas
+from rrhh import importacion
+from rrhh.matriz import matriz
+from rrhh.models import Ausencia, Conocimiento, Habilidad, Perfil, Recurso
+from sistema_recursos.instrumentacion import registro
+
+# Pantallas que deben costar lo mismo en consultas sin importar la cantidad de datos
+VISTAS_CONSTANTES = {
+    'index': '/',
+    'vista_gantt': '/gantt/',
+    'gantt_datos_api': '/api/gantt/',
+    'ver_recursos': '/recursos/',
+    'lista_proyectos': '/proyectos-lista/',
+    'reporte_recurso': '/reporte/?fecha_inicio=2000-01-01',
+    'reporte_recurso_excel': '/reporte/?exportar=excel&fecha_inicio=2000-01-01',
+}
+
+
+class _Datos:
+    """Cada prueba parte con caches e índices en memoria vacíos (la transacción anterior se deshizo)"""
+
+    def setUp(self):
+        cache.clear()
+        indice.invalidar()
+        matriz.invalidar()
+        autocompletar.invalidar()
+        calendario.invalidar()
+
+    def generar(self, escala='minima', **cambios):
+        tamano = dict(datos_sinteticos.ESCALAS[escala], **cambios)
+        return datos_sinteticos.generar(**tamano)
+
+    def consultas(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as capturadas:
+            respuesta = self.client.get(url)
+            if respuesta.streaming:
+                b''.join(respuesta.streaming_content)
+        self.assertEqual(respuesta.status_code, 200, url)
+        return len(capturadas)
+
+
+class BaseDatos(_Datos, TestCase):
+    pass
+
+
+class PantallasTest(BaseDatos):
+
+    def test_todas_las_pantallas_responden(self):
+        self.generar()
+        tarea = Tarea.objects.filter(requisitos__isnull=False).first()
+        urls = list(VISTAS_CONSTANTES.values()) + [
+            f'/buscar/?tarea_id={tarea.id}',
+            '/reporte/?fecha_inicio=2000-01-01',
+            '/capacidad/',
+            '/conflictos/',
+            f'/proyectos-lista/{tarea.proyecto_id}/tareas/',
+            f'/asignacion/?proyecto={tarea.proyecto_id}',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.consultas(url)
+
+    def test_consultas_no_crecen_con_los_datos(self):
+        self.generar(recursos=10, proyectos=3, tareas_por_proyecto=5)
+        chicas = {nombre: self.consultas(url) for nombre, url in VISTAS_CONSTANTES.items()}
+
+        datos_sinteticos.limpiar()
+        self.generar(recursos=60, proyectos=20, tareas_por_proyecto=15)
+        grandes = {nombre: self.consultas(url) for nombre, url in VISTAS_CONSTANTES.items()}
+
+        self.assertEqual(chicas, grandes)
+
+
+class RecursosTest(BaseDatos):
+
+    def test_filtro_de_activos(self):
+        self.generar()
+        Recurso.objects.filter(id=Recurso.objects.order_by('id').first().id).update(activo=False)
+        total = lambda url: self.client.get(url).context['pagina'].paginator.count
+        # Por defecto se listan todos, como antes; el filtro es opcional
+        self.assertEqual(total('/recursos/'), Recurso.objects.count())
+        self.assertEqual(total('/recursos/?activo=1'), Recurso.objects.filter(activo=True).count())
+        self.assertEqual(total('/recursos/?activo=0'), 1)
+
+
+class AgregadosTest(BaseDatos):
+
+    def valores(self, proyecto):
+        proyecto.refresh_from_db()
+        return (proyecto.total_tareas, proyecto.suma_progreso, proyecto.tareas_completadas,
+                proyecto.primera_fecha, proyecto.ultima_fecha)
+
+    def test_cambios_incrementales_coinciden_con_recalcular(self):
+        self.generar()
+        origen, destino = Proyecto.objects.order_by('id')[:2]
+        hoy = date.today()
+
+        nueva = Tarea.objects.create(nombre='Nueva', proyecto=origen, fecha_inicio=hoy - timedelta(days=400),
+                                     fecha_fin=hoy - timedelta(days=390), progreso=20)
+        tarea = Tarea.objects.filter(proyecto=origen).exclude(id=nueva.id).first()
+        tarea.progreso = 100
+        tarea.fecha_fin = tarea.fecha_fin + timedelta(days=500)
+        tarea.save()
+        nueva.proyecto = destino
+        nueva.save()
+        Tarea.objects.filter(proyecto=destino).exclude(id=nueva.id).first().delete()
+
+        incrementales = [self.valores(origen), self.valores(destino)]
+        agregados.recalcular()
+        self.assertEqual(incrementales, [self.valores(origen), self.valores(destino)])
+
+    def test_atrasadas_en_vivo(self):
+        self.generar()
+        proyecto = Proyecto.objects.order_by('id').first()
+        tarea = Tarea.objects.create(nombre='Vence', proyecto=proyecto, fecha_inicio=date.today(), fecha_fin=date.today(), progreso=10)
+        atrasadas = lambda: self.client.get('/proyectos-lista/').context['proyectos'].get(id=proyecto.id).tareas_atrasadas
+
+        # Pasa el tiempo (sin señales): la tarea queda atrasada sin haber recontado nada
+        antes = atrasadas()
+        Tarea.objects.filter(id=tarea.id).update(fecha_fin=date.today() - timedelta(days=1))
+        self.assertEqual(atrasadas(), antes + 1)
+        # Completarla después no deja ningún contador en negativo
+        tarea.refresh_from_db()
+        tarea.progreso = 100
+        tarea.save()
+        self.assertEqual(atrasadas(), antes)
+
+
+class TableroTest(BaseDatos):
+
+    def test_conteos_y_cache_por_dia(self):
+        self.generar()
+        hoy = timezone.localdate()
+        atrasada = Q(progreso__lt=100, fecha_fin__lt=hoy)
+        datos = tablero.resumen_tablero()
+
+        self.assertEqual(
+            (datos['total_proyectos'], datos['total_recursos'], datos['total_tareas'],
+             datos['tareas_completadas'], datos['tareas_atrasadas']),
+            (Proyecto.objects.count(), Recurso.objects.count(), Tarea.objects.count(),
+             Tarea.objects.filter(progreso=100).count(), Tarea.objects.filter(atrasada).count()),
+        )
+        for grupo in datos['proyectos_por_cc']:
+            tareas = Tarea.objects.filter(proyecto__centro_costo=grupo['nombre'])
+            with self.subTest(centro_costo=grupo['nombre']):
+                self.assertEqual(
+                    (grupo['cantidad'], grupo['tareas'], grupo['atrasadas'], grupo['suma_progreso']),
+                    (Proyecto.objects.filter(centro_costo=grupo['nombre']).count(), tareas.count(),
+                     tareas.filter(atrasada).count(), tareas.aggregate(s=Sum('progreso'))['s'] or 0),
+                )
+        self.assertEqual(sum(g['tareas'] for g in datos['proyectos_por_unidad']), datos['total_tareas'])
+
+        # Queda en cache bajo la clave del día hasta que se guarda una tarea
+        self.assertIn(hoy.isoformat(), tablero.clave_cache())
+        self.assertEqual(cache.get(tablero.clave_cache()), datos)
+        tarea = Tarea.objects.filter(progreso__lt=100).first()
+        tarea.progreso = 100
+        with self.captureOnCommitCallbacks(execute=True):
+            tarea.save()
+        self.assertIsNone(cache.get(tablero.clave_cache()))
+        self.assertEqual(tablero.resumen_tablero()['tareas_completadas'], datos['tareas_completadas'] + 1)
+
+
+class InstrumentacionTest(BaseDatos):
+
+    def setUp(self):
+        super().setUp()
+        registro.reiniciar()
+
+    def test_registra_consultas_y_advierte_repetidas(self):
+        self.generar()
+        with self.assertLogs('sistema_recursos.instrumentacion', level='WARNING') as logs, \
+                self.settings(INSTRUMENTACION={'PRESUPUESTO_CONSULTAS': 0}):
+            self.client.get('/proyectos-lista/')
+        self.assertIn('presupuesto 0', logs.output[0])
+
+        self.client.get('/')
+        self.assertEqual(registro.resumen()['index']['peticiones'], 1)
+
+    def test_estadisticas_solo_staff(self):
+        self.assertEqual(self.client.get('/estadisticas/').status_code, 302)
+        User.objects.create_user('jefe', password='x', is_staff=True)
+        self.client.login(username='jefe', password='x')
+        self.client.get('/')
+        datos = self.client.get('/estadisticas/').json()
+        self.assertIn('index', datos['vistas'])
+
+        # Sólo un POST vacía el registro, y necesita el token CSRF
+        self.client.get('/estadisticas/?reiniciar=1')
+        self.assertIn('index', registro.resumen())
+        cliente_csrf = Client(enforce_csrf_checks=True)
+        cliente_csrf.login(username='jefe', password='x')
+        self.assertEqual(cliente_csrf.post('/estadisticas/').status_code, 403)
+        self.assertEqual(self.client.post('/estadisticas/').json()['vistas'], {})
+
+
+class PlanesConsultaTest(BaseDatos):
+    """
+    EXPLAIN de las consultas reales de cada vista. Ninguna debe recorrer la tabla de tareas entera,
+    y las de agenda por responsable deben llegar a uno de los índices de Tarea.Meta.indexes
+    (el índice de la FK sola también evita el Seq Scan, pero filtra las fechas fila por fila).
+    """
+
+    TABLA = Tarea._meta.db_table
+    INDICES = [indice.name for indice in Tarea._meta.indexes]
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Con pocas filas Postgres prefiere Seq Scan aunque haya índice: así sólo aparece si no hay uno que sirva
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + sql)
+                return [fila[0] for fila in cursor.fetchall()]
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [fila[-1] for fila in cursor.fetchall()]
+
+    def recorre_tabla(self, plan):
+        if connection.vendor == 'postgresql':
+            return any(f'Seq Scan on {self.TABLA}' in paso for paso in plan)
+        # SQLite: "SCAN tabla" a secas es lectura secuencial; "SCAN tabla USING INDEX" recorre en orden un índice
+        # (el Gantt lo hace para cortar en el LÍMITE de la página) y "SEARCH" busca en un índice
+        return any(paso == f'SCAN {self.TABLA}' for paso in plan)
+
+    def usa_indice_de_agenda(self, plan):
+        return any(nombre in paso for paso in plan for nombre in self.INDICES)
+
+    def test_consultas_de_agenda_usan_indices(self):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest(f"Sin lector de planes para {connection.vendor}")
+        self.generar('chica')
+        recurso = Tarea.objects.filter(asignado_a__isnull=False).values_list('asignado_a_id', flat=True).first()
+        hoy = date.today()
+        desde, hasta = (hoy - timedelta(days=30)).isoformat(), (hoy + timedelta(days=30)).isoformat()
+        # (url, si sus consultas a Tarea deben usar un índice del paquete)
+        urls = [
+            (f'/api/gantt/?desde={desde}&hasta={hasta}', False),
+            (f'/api/gantt/?desde={desde}&hasta={hasta}&recurso={recurso}&orden=recurso', True),
+            ('/recursos/', True),
+            (f'/reporte/?recurso={recurso}&fecha_inicio={desde}', True),
+            ('/api/capacidad/', True),
+            (f'/asignacion/?desde={desde}', True),
+            ('/conflictos/', True),
+        ]
+        for url, de_agenda in urls:
+            indice.invalidar()
+            cache.clear()
+            with CaptureQueriesContext(connection) as capturadas:
+                self.assertEqual(self.client.get(url).status_code, 200, url)
+            for consulta in capturadas.captured_queries:
+                sql = consulta['sql']
+                if not sql.startswith('SELECT') or f'"{self.TABLA}"' not in sql:
+                    continue
+                plan = self.plan(sql)
+                with self.subTest(url=url, sql=sql[:120]):
+                    self.assertFalse(self.recorre_tabla(plan), '\n'.join(plan))
+                    if de_agenda:
+                        self.assertTrue(self.usa_indice_de_agenda(plan), '\n'.join(plan))
+
+
+class ImportacionHabilidadesTest(BaseDatos):
+
+    def archivo(self, filas):
+        texto = '\n'.join(';'.join('' if v is None else str(v) for v in fila) for fila in filas)
+        return io.BytesIO(texto.encode('utf-8'))
+
+    def test_simular_aplicar_y_quitar(self):
+        self.generar()
+        recurso = Recurso.objects.order_by('id').first()
+        sin_habilidad, con_habilidad = (
+            Conocimiento.objects.exclude(habilidad__recurso=recurso).order_by('id').first(),
+            Habilidad.objects.filter(recurso=recurso).select_related('conocimiento').first(),
+        )
+        filas = [
+            ['Recurso', sin_habilidad.nombre.upper(), con_habilidad.conocimiento.nombre, 'No existe'],
+            [recurso.email, 4, 0, 3],
+            ['Nadie', 1, 1, 1],
+        ]
+        total = Habilidad.objects.count()
+
+        simulado = importacion.importar(self.archivo(filas), 'matriz.csv', simular=True)
+        self.assertEqual((len(simulado.nuevas), len(simulado.eliminadas), simulado.total_avisos), (1, 1, 2))
+        self.assertEqual(Habilidad.objects.count(), total)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            importacion.importar(self.archivo(filas), 'matriz.csv')
+        self.assertEqual(Habilidad.objects.get(recurso=recurso, conocimiento=sin_habilidad).nivel, 4)
+        self.assertFalse(Habilidad.objects.filter(id=con_habilidad.id).exists())
+        self.assertEqual(matriz.niveles([recurso.id], [sin_habilidad.id]).tolist(), [[4]])
+
+        repetido = importacion.importar(self.archivo(filas), 'matriz.csv', simular=True)
+        self.assertFalse(repetido.hay_cambios)
+
+
+class ImportacionCronogramaTest(BaseDatos):
+
+    def archivo(self, filas):
+        return io.BytesIO('\n'.join(','.join(fila) for fila in filas).encode('utf-8'))
+
+    def test_importa_enlaza_predecesoras_y_reimporta(self):
+        self.generar()
+        recurso = Recurso.objects.order_by('id').first()
+        conocimiento = Conocimiento.objects.order_by('id').first()
+        filas = [
+            ['Proyecto', 'ID', 'Tarea', 'Inicio', 'Fin', '% Completado', 'Responsable', 'Predecesoras', 'Requisitos'],
+            # La 1 depende de la 3, que viene después: se enlaza en la segunda pasada
+            ['Planta Nueva', '1', 'Montaje', '10/03/2031', '20/03/2031', '0', recurso.email, '3FS+1d', conocimiento.nombre],
+            ['Planta Nueva', '2', 'Pruebas', '2031-03-21', '2031-03-25', '50%', '', '1', ''],
+            ['Planta Nueva', '3', 'Ingeniería', '2031-03-01', '2031-03-08', '100', '', '', ''],
+        ]
+
+        resultado = importacion_cronograma.importar(self.archivo(filas), 'cronograma.csv')
+        self.assertEqual((resultado.tareas_creadas, resultado.predecesoras, resultado.total_avisos), (3, 2, 0))
+        proyecto = Proyecto.objects.get(nombre='Planta Nueva')
+        tareas = {t.id_externo: t for t in proyecto.tareas.all()}
+        self.assertEqual(tareas['1'].predecesora_id, tareas['3'].id)
+        self.assertEqual(tareas['2'].predecesora_id, tareas['1'].id)
+        self.assertEqual(tareas['1'].asignado_a_id, recurso.id)
+        self.assertEqual(list(tareas['1'].requisitos.all()), [conocimiento])
+        self.assertEqual((proyecto.total_tareas, proyecto.fecha_inicio), (3, date(2031, 3, 1)))
+
+        # Reimportar actualiza por ID externo en vez de duplicar
+        filas[2][5] = '100'
+        filas[2][7] = ''
+        resultado = importacion_cronograma.importar(self.archivo(filas), 'cronograma.csv')
+        self.assertEqual((resultado.tareas_creadas, resultado.tareas_actualizadas), (0, 3))
+        proyecto.refresh_from_db()
+        self.assertEqual((proyecto.total_tareas, proyecto.tareas_completadas), (3, 2))
+        self.assertIsNone(proyecto.tareas.get(id_externo='2').predecesora_id)
+
+    def test_reimportar_sin_columnas_conserva_datos(self):
+        self.generar()
+        recurso = Recurso.objects.order_by('id').first()
+        filas = [
+            ['Proyecto', 'ID', 'Tarea', 'Inicio', 'Fin', '% Completado', 'Responsable'],
+            ['Planta Nueva', '1', 'Montaje', '2031-03-10', '2031-03-20', '40', recurso.email],
+            ['Planta Nueva', '2', 'Pruebas', '2031-03-21', '2031-03-25', '10', recurso.email],
+        ]
+        importacion_cronograma.importar(self.archivo(filas), 'cronograma.csv')
+
+        # Sin columna de progreso y con un responsable desconocido en la fila 2
+        filas = [
+            ['Proyecto', 'ID', 'Tarea', 'Inicio', 'Fin', 'Responsable'],
+            ['Planta Nueva', '1', 'Montaje', '2031-03-10', '2031-03-22', recurso.email],
+            ['Planta Nueva', '2', 'Pruebas', '2031-03-23', '2031-03-25', 'Nadie Conocido'],
+        ]
+        resultado = importacion_cronograma.importar(self.archivo(filas), 'cronograma.csv')
+        self.assertEqual((resultado.tareas_actualizadas, resultado.total_avisos), (2, 1))
+        tareas = {t.id_externo: t for t in Proyecto.objects.get(nombre='Planta Nueva').tareas.all()}
+        self.assertEqual((tareas['1'].progreso, tareas['1'].fecha_fin), (40, date(2031, 3, 22)))
+        self.assertEqual((tareas['2'].progreso, tareas['2'].asignado_a_id), (10, recurso.id))
+
+        # Sin columna de responsable se conservan las asignaciones; sin ID se avisa una vez
+        filas = [['Proyecto', 'ID', 'Tarea', 'Inicio', 'Fin'],
+                 ['Planta Nueva', '1', 'Montaje', '2031-03-10', '2031-03-22'],
+                 ['Planta Nueva', '', 'Cierre', '2031-03-26', '2031-03-27']]
+        resultado = importacion_cronograma.importar(self.archivo(filas), 'cronograma.csv')
+        self.assertEqual((resultado.tareas_creadas, resultado.total_avisos), (1, 1))
+        self.assertEqual(Tarea.objects.get(id=tareas['1'].id).asignado_a_id, recurso.id)
+        resultado = importacion_cronograma.importar(self.archivo([fila[:1] + fila[2:] for fila in filas]), 'cronograma.csv')
+        self.assertEqual(resultado.total_avisos, 1)
+
+
+class AutocompletarTest(BaseDatos):
+
+    def nombres(self, tipo, consulta, **params):
+        respuesta = self.client.get(f'/api/autocompletar/{tipo}/', {'q': consulta, **params})
+        self.assertEqual(respuesta.status_code, 200)
+        return [r['nombre'] for r in respuesta.json()['resultados']]
+
+    def test_prefijo_sin_tildes_y_senales(self):
+        self.generar()
+        perfil = Recurso.objects.first().perfil
+        self.assertEqual(self.nombres('recurso', 'munoz'), [])  # el catálogo ya quedó construido
+
+        with self.captureOnCommitCallbacks(execute=True):
+            jose = Recurso.objects.create(nombre='José Muñoz', perfil=perfil, email='jmunoz@ejemplo.cl')
+        self.assertEqual(self.nombres('recurso', 'JOSE mu'), ['José Muñoz'])
+        self.assertEqual(self.nombres('recurso', 'munos'), ['José Muñoz'])  # respaldo por trigramas
+
+        with self.captureOnCommitCallbacks(execute=True):
+            jose.activo = False
+            jose.save()
+        self.assertEqual(self.nombres('recurso', 'jose', activos='1'), [])
+        self.assertEqual(self.nombres('recurso', 'jose'), ['José Muñoz'])
+
+        self.assertEqual(self.client.get('/api/autocompletar/tarea/').status_code, 404)
+        self.assertEqual(self.client.get('/api/autocompletar/recurso/?limite=x').status_code, 400)
+
+
+class AdminTest(BaseDatos):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@ejemplo.cl', 'x'))
+
+    def test_listas_en_consultas_constantes(self):
+        urls = ['/admin/proyectos/tarea/', '/admin/proyectos/tarea/?responsable=recurso', '/admin/rrhh/recurso/']
+        self.generar(recursos=10, proyectos=3, tareas_por_proyecto=5)
+        chicas = [self.consultas(url) for url in urls]
+        datos_sinteticos.limpiar()
+        self.generar(recursos=120, proyectos=20, tareas_por_proyecto=15)
+        self.assertEqual(chicas, [self.consultas(url) for url in urls])
+
+    def test_acciones_desplazar_y_reasignar(self):
+        self.generar()
+        tarea = Tarea.objects.filter(predecesora__isnull=True, progreso__lt=100).order_by('id').first()
+        antes = (tarea.fecha_inicio, tarea.fecha_fin)
+        accion = {'_selected_action': [tarea.id], 'forzar': 'on'}
+
+        self.client.post('/admin/proyectos/tarea/', {**accion, 'action': 'desplazar_fechas', 'dias': '3'})
+        tarea.refresh_from_db()
+        # 3 días hábiles más tarde, con los mismos días hábiles de duración (sin feriados cargados)
+        inicio = np.busday_offset(antes[0], 3, roll='forward')
+        fin = np.busday_offset(inicio, max(np.busday_count(antes[0], antes[1] + timedelta(days=1)), 1) - 1)
+        self.assertEqual((tarea.fecha_inicio, tarea.fecha_fin), (inicio.item(), fin.item()))
+
+        recurso = Recurso.objects.exclude(id=tarea.asignado_a_id).filter(activo=True).first()
+        self.client.post('/admin/proyectos/tarea/', {**accion, 'action': 'reasignar', 'responsable': recurso.id})
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.asignado_a_id, recurso.id)
+        # La señal tareas_actualizadas dejó el índice de ocupación al día
+        self.assertIn(tarea.id, [i.id for i in indice.intervalos([recurso.id])[recurso.id]])
+
+
+class ReportesTest(BaseDatos):
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        ajustes = self.settings(MEDIA_ROOT=media.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_cola_partes_y_reutilizacion(self):
+        self.generar()
+        respuesta = self.client.post('/api/reportes/', {'formato': 'excel', 'fecha_inicio': '2000-01-01'})
+        self.assertEqual(respuesta.status_code, 202)
+        trabajo_id = respuesta.json()['trabajo']['id']
+        # El mismo pedido mientras está en cola no genera otro trabajo
+        self.assertEqual(self.client.post('/api/reportes/', {'formato': 'excel', 'fecha_inicio': '2000-01-01'}).json()['trabajo']['id'], trabajo_id)
+        self.assertEqual(self.client.post('/api/reportes/', {'formato': 'excel', 'fecha_inicio': 'ayer'}).status_code, 400)
+
+        trabajo = reportes.procesar(reportes.tomar_siguiente(), procesos=0, recursos_por_parte=3)
+        self.assertEqual(trabajo.estado, TrabajoReporte.TERMINADO, trabajo.error)
+        self.assertEqual(trabajo.partes, -(-Recurso.objects.count() // 3))
+        self.assertIsNone(reportes.tomar_siguiente())
+
+        # Las partes se unen en orden: el archivo es igual al Excel generado de una vez
+        esperadas = list(reportes.filas_reporte(Recurso.objects.all(), '2000-01-01'))
+        filas = list(load_workbook(reportes.ruta_absoluta(trabajo), read_only=True).active.iter_rows(values_only=True))
+        self.assertEqual(len(filas), len(esperadas) + 1)
+        self.assertEqual([f[:4] for f in filas[1:]], [tuple(e[:4]) for e in esperadas])
+
+        estado = self.client.get(f'/api/reportes/{trabajo.id}/').json()['trabajo']
+        self.assertEqual(estado['estado'], 'terminado')
+        descarga = self.client.get(estado['url_descarga'])
+        self.assertEqual(descarga.status_code, 200)
+        descarga.close()
+        # Pedido repetido: se devuelve el archivo vigente
+        self.assertEqual(self.client.post('/api/reportes/', {'formato': 'excel', 'fecha_inicio': '2000-01-01'}).status_code, 200)
+
+        with self.settings(REPORTES={'VIGENCIA': -1}):
+            self.assertEqual(reportes.mantenimiento(), (0, 1))
+        self.assertFalse(os.path.exists(reportes.ruta_absoluta(trabajo)))
+        self.assertEqual(self.client.get(estado['url_descarga']).status_code, 404)
+
+    def test_html_por_partes(self):
+        self.generar()
+        reportes.solicitar('html', {})
+        trabajo = reportes.procesar(reportes.tomar_siguiente(), procesos=0, recursos_por_parte=4)
+        with open(reportes.ruta_absoluta(trabajo), encoding='utf-8') as archivo:
+            contenido = archivo.read()
+        self.assertEqual(contenido.count('mb-5 hoja-reporte'), Recurso.objects.count())
+        self.assertTrue(contenido.rstrip().endswith('</html>'))
+
+
+class EstadosTareaTest(BaseDatos):
+
+    def test_estado_en_sql_coincide_con_estado_actual(self):
+        self.generar()
+        tareas = list(Tarea.objects.con_estado().select_related('proyecto'))
+        self.assertEqual([t.estado for t in tareas], [t.estado_actual for t in tareas])
+
+        with self.assertNumQueries(1):
+            conteo = Tarea.objects.conteo_estados()
+        esperado = Counter(t.estado_actual.lower() for t in tareas)
+        self.assertEqual(conteo, {'total': len(tareas), **{e.lower(): esperado[e.lower()] for e, _ in Tarea.ESTADOS}})
+
+        with self.assertNumQueries(1):
+            grupos = list(Tarea.objects.conteo_estados('proyecto__centro_costo'))
+        por_centro = Counter((t.proyecto.centro_costo, t.estado_actual.lower()) for t in tareas)
+        for grupo in grupos:
+            centro = grupo['proyecto__centro_costo']
+            self.assertEqual(grupo['atrasado'], por_centro[centro, 'atrasado'])
+            self.assertEqual(grupo['total'], sum(n for (c, _), n in por_centro.items() if c == centro))
+
+    def test_api_y_filtro_por_estado(self):
+        self.generar()
+        datos = self.client.get('/api/estados/?agrupar=recurso').json()
+        self.assertEqual(sum(g['total'] for g in datos['grupos']), Tarea.objects.count())
+        self.assertEqual(self.client.get('/api/estados/?agrupar=tarea').status_code, 400)
+        self.assertEqual(self.client.get('/api/estados/?proyecto=x').status_code, 400)
+
+        tarea = Tarea.objects.first()
+        respuesta = self.client.get(f'/proyectos-lista/{tarea.proyecto_id}/tareas/?estado={tarea.estado_actual}')
+        self.assertEqual(
+            len(respuesta.context['tareas']),
+            sum(t.estado_actual == tarea.estado_actual for t in Tarea.objects.filter(proyecto=tarea.proyecto_id))
+        )
+
+
+class OcupacionTest(BaseDatos):
+
+    def test_consultas_y_cambios(self):
+        self.generar()
+        recurso = Recurso.objects.create(nombre="Agenda", perfil=Perfil.objects.first())
+        proyecto = Proyecto.objects.first()
+        crear = lambda nombre, inicio, fin, progreso=0: Tarea.objects.create(
+            nombre=nombre, proyecto=proyecto, asignado_a=recurso, fecha_inicio=inicio, fecha_fin=fin, progreso=progreso)
+        primera = crear("Primera", date(2031, 3, 1), date(2031, 3, 10))
+        segunda = crear("Segunda", date(2031, 3, 5), date(2031, 3, 20))
+        crear("Terminada", date(2031, 3, 1), date(2031, 4, 30), progreso=100)
+
+        self.assertEqual(indice.ocupados(date(2031, 3, 15), date(2031, 3, 16), [recurso.id]), {recurso.id})
+        self.assertEqual(indice.ocupados(date(2031, 3, 21), date(2031, 3, 25), [recurso.id]), set())
+        self.assertEqual(indice.ultima_tarea(recurso.id, date(2031, 3, 1)).id, segunda.id)
+        self.assertIsNone(indice.ultima_tarea(recurso.id, date(2031, 3, 21)))
+
+        # Guardar, completar y borrar tareas actualiza el índice ya cargado (al hacer commit)
+        with self.captureOnCommitCallbacks(execute=True):
+            segunda.fecha_fin = date(2031, 4, 5)
+            segunda.save()
+        self.assertTrue(indice.ocupado(recurso.id, date(2031, 3, 25), date(2031, 3, 25)))
+        self.assertEqual(indice.ultima_tarea(recurso.id, date(2031, 3, 21)).fin, date(2031, 4, 5))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            segunda.progreso = 100
+            segunda.save()
+        self.assertEqual(indice.ultima_tarea(recurso.id, date(2031, 3, 1)).id, primera.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            primera.delete()
+        self.assertFalse(indice.ocupado(recurso.id, date(2031, 3, 1), date(2031, 12, 31)))
+
+    def test_cambios_en_bloque_suben_la_version_una_vez(self):
+        self.generar()
+        proyecto = Proyecto.objects.order_by('id').first()
+        tareas = list(proyecto.tareas.filter(asignado_a__isnull=False, progreso__lt=100))
+        recurso = Recurso.objects.create(nombre="Bloque", perfil=Perfil.objects.first())
+        indice.ocupados(date(2000, 1, 1), date(2100, 1, 1))  # índice ya cargado
+        version = lambda: cache.get(ocupacion.CLAVE_VERSION)
+
+        antes = version()
+        for tarea in tareas:
+            tarea.asignado_a = recurso
+        with self.captureOnCommitCallbacks(execute=True):
+            Tarea.objects.bulk_update(tareas, ['asignado_a'])
+            tareas_actualizadas.send(sender=Tarea, tareas=tareas)
+        self.assertEqual(version(), antes + 1)
+        self.assertEqual({i.id for i in indice.intervalos([recurso.id])[recurso.id]}, {t.id for t in tareas})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            proyecto.delete()
+        self.assertEqual(version(), antes + 2)
+        self.assertEqual(indice.intervalos([recurso.id]), {})
+
+
+class MatrizTest(BaseDatos):
+
+    def test_niveles_puntaje_y_top_k(self):
+        self.generar()
+        recursos = list(Recurso.objects.filter(activo=True).order_by('id'))
+        cids = list(Conocimiento.objects.order_by('id').values_list('id', flat=True)[:3])
+        esperado = [[dict(r.habilidades.values_list('conocimiento_id', 'nivel')).get(c, 0) for c in cids] for r in recursos]
+        self.assertEqual(matriz.niveles([r.id for r in recursos], cids).tolist(), esperado)
+        self.assertEqual(matriz.puntaje(np.array([[5, 0], [3, 4], [1, 1]])).tolist(), [50, 70, 20])
+
+        # De mayor a menor match, a igual match el id menor; cortar en k no cambia el orden
+        ranking = matriz.top_k(cids, k=len(recursos))
+        self.assertEqual(ranking, sorted(ranking, key=lambda x: (-x[1], x[0])))
+        for k in range(1, len(ranking) + 1):
+            self.assertEqual(matriz.top_k(cids, k=k), ranking[:k])
+        # Sin requisitos empatan todos en 100
+        self.assertEqual(matriz.top_k([], k=3), [(r.id, 100) for r in recursos[:3]])
+
+        # Un cambio de habilidad llega a la matriz por las señales
+        with self.captureOnCommitCallbacks(execute=True):
+            Habilidad.objects.update_or_create(recurso=recursos[0], conocimiento_id=cids[0], defaults={'nivel': 5})
+        self.assertEqual(matriz.niveles([recursos[0].id], cids[:1]).tolist(), [[5]])
+        expertos = Habilidad.objects.filter(conocimiento_id=cids[0], nivel=5, recurso__activo=True).values_list('recurso_id', flat=True)
+        self.assertEqual(matriz.top_k(cids[:1], k=1), [(min(expertos), 100)])
+
+
+class ConflictosTest(BaseDatos):
+
+    def test_barrido_por_recurso(self):
+        dia = lambda d: date(2031, 3, d)
+        intervalos = [Intervalo(dia(i), dia(f), n, str(n)) for n, (i, f) in enumerate([(1, 5), (3, 7), (4, 4), (10, 12), (12, 12)])]
+        resultado = [(c.desde, c.hasta, c.profundidad, [i.id for i in c.tareas]) for c in conflictos.barrer(7, intervalos)]
+        self.assertEqual(resultado, [(dia(3), dia(5), 3, [0, 1, 2]), (dia(12), dia(12), 2, [3, 4])])
+
+    def test_detectar_y_verificar(self):
+        self.generar()
+        recurso = Recurso.objects.first()
+        proyecto = Proyecto.objects.first()
+        existente = Tarea.objects.create(nombre="Existente", proyecto=proyecto, asignado_a=recurso,
+                                         fecha_inicio=date(2031, 3, 1), fecha_fin=date(2031, 3, 10))
+        Tarea.objects.create(nombre="Encima", proyecto=proyecto, asignado_a=recurso,
+                             fecha_inicio=date(2031, 3, 8), fecha_fin=date(2031, 3, 12))
+        self.assertIn((recurso.id, date(2031, 3, 8), date(2031, 3, 10)),
+                      [(c.recurso_id, c.desde, c.hasta) for c in conflictos.detectar([recurso.id], date(2031, 1, 1))])
+
+        # Lote grande en memoria: el barrido da lo mismo que comparar todos los pares
+        azar = random.Random(3)
+        recursos = list(Recurso.objects.values_list('id', flat=True)[:4])
+        lote = []
+        for n in range(300):
+            inicio = date(2032, 1, 1) + timedelta(days=azar.randint(0, 300))
+            lote.append(Tarea(id=10 ** 6 + n, nombre=f"T{n}", proyecto=proyecto, asignado_a_id=azar.choice(recursos),
+                              fecha_inicio=inicio, fecha_fin=inicio + timedelta(days=azar.randint(0, 10)), progreso=0))
+        lote.append(Tarea(id=existente.id, nombre="Existente", proyecto=proyecto, asignado_a_id=recurso.id,
+                          fecha_inicio=date(2031, 3, 11), fecha_fin=date(2031, 3, 11), progreso=0))
+
+        esperado = {}
+        for t in lote:
+            cruces = {i.id for i in indice.solapadas(t.asignado_a_id, t.fecha_inicio, t.fecha_fin)} - {x.id for x in lote}
+            cruces |= {o.id for o in lote if o is not t and o.asignado_a_id == t.asignado_a_id
+                       and o.fecha_inicio <= t.fecha_fin and o.fecha_fin >= t.fecha_inicio}
+            if cruces:
+                esperado[t.id] = cruces
+        obtenido = {v['tarea'].id: {i.id for i in v['cruces']} for v in conflictos.verificar(lote)}
+        self.assertEqual(obtenido, esperado)
+        self.assertIn(existente.id, obtenido)
+
+
+class AsignacionTest(BaseDatos):
+
+    def cruces(self, tarea):
+        return Tarea.objects.filter(
+            asignado_a=tarea.asignado_a_id, progreso__lt=100, fecha_inicio__lte=tarea.fecha_fin, fecha_fin__gte=tarea.fecha_inicio
+        ).exclude(id=tarea.id)
+
+    def test_proponer_y_aplicar_sin_cruces(self):
+        self.generar()
+        tareas = list(asignacion.tareas_sin_asignar())
+        propuesta, sin_candidato = asignacion.proponer(tareas)
+        self.assertTrue(propuesta)
+        self.assertEqual(len(propuesta) + len(sin_candidato), len(tareas))
+        self.assertTrue(all(p['recurso'] for p in propuesta))
+
+        asignadas, omitidas = asignacion.aplicar([(p['tarea'].id, p['recurso_id']) for p in propuesta])
+        self.assertEqual((len(asignadas), omitidas), (len(propuesta), []))
+        for tarea in Tarea.objects.filter(id__in=[t.id for t in asignadas]):
+            with self.subTest(tarea=tarea.id):
+                self.assertFalse(self.cruces(tarea).exists())
+        # Aplicarla de nuevo no hace nada: las tareas ya tienen responsable
+        self.assertEqual(len(asignacion.aplicar([(t.id, t.asignado_a_id) for t in asignadas])[1]), len(asignadas))
+
+    def test_aplicar_verifica_contra_la_base(self):
+        self.generar()
+        propuesta, _ = asignacion.proponer(asignacion.tareas_sin_asignar())
+        elegida = propuesta[0]
+        # Otro proceso le da al recurso una tarea encima, sin pasar por el índice en memoria de este
+        otra = Tarea.objects.exclude(id=elegida['tarea'].id).filter(progreso__lt=100).first()
+        Tarea.objects.filter(id=otra.id).update(
+            asignado_a=elegida['recurso_id'], fecha_inicio=elegida['tarea'].fecha_inicio, fecha_fin=elegida['tarea'].fecha_fin
+        )
+        asignadas, omitidas = asignacion.aplicar([(elegida['tarea'].id, elegida['recurso_id'])])
+        self.assertEqual((asignadas, omitidas), ([], [elegida['tarea'].id]))
+
+        with self.assertRaises(asignacion.ErrorAsignacion):
+            asignacion.aplicar([(elegida['tarea'].id, 1), (elegida['tarea'].id, 2)])
+
+
+class HuecosTest(BaseDatos):
+
+    def primer_hueco(self, recurso_id, dias, desde, hasta, excluir=()):
+        """Referencia día por día: primera ventana de 'dias' días hábiles sin tareas abiertas ni ausencias"""
+        ocupados = set()
+        tareas = Tarea.objects.filter(asignado_a=recurso_id, progreso__lt=100).exclude(id__in=excluir)
+        periodos = [(t.fecha_inicio, t.fecha_fin) for t in tareas]
+        periodos += list(Ausencia.objects.filter(recurso=recurso_id).values_list('desde', 'hasta'))
+        for d0, d1 in periodos:
+            ocupados.update(d0 + timedelta(days=n) for n in range((d1 - d0).days + 1))
+        feriados = set(Feriado.objects.values_list('fecha', flat=True))
+        habil = lambda dia: dia.weekday() < 5 and dia not in feriados
+        inicio = desde
+        while inicio <= hasta:
+            if habil(inicio) and inicio not in ocupados:
+                dia, habiles = inicio, 0
+                while dia <= hasta and dia not in ocupados:
+                    habiles += habil(dia)
+                    if habiles == dias:
+                        return inicio, dia
+                    dia += timedelta(days=1)
+            inicio += timedelta(days=1)
+        return None
+
+    def test_coincide_con_la_busqueda_dia_por_dia(self):
+        self.generar()
+        hoy = date.today()
+        ids = list(Recurso.objects.values_list('id', flat=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            Feriado.objects.create(fecha=hoy + timedelta(days=9), nombre="Feriado de prueba")
+        Ausencia.objects.create(recurso_id=ids[0], desde=hoy + timedelta(days=2), hasta=hoy + timedelta(days=20))
+        for dias in (1, 5, 30):
+            encontrados = huecos.primeros_huecos(ids, dias, hoy, hoy + timedelta(days=180))
+            for recurso_id in ids:
+                with self.subTest(dias=dias, recurso=recurso_id):
+                    self.assertEqual(encontrados.get(recurso_id), self.primer_hueco(recurso_id, dias, hoy, hoy + timedelta(days=180)))
+
+    def test_api(self):
+        self.generar()
+        tarea = Tarea.objects.filter(asignado_a__isnull=False, progreso__lt=100).first()
+        datos = self.client.get(f'/api/huecos/?tarea_id={tarea.id}&k=50').json()
+        inicios = [(c['inicio'], -c['match']) for c in datos['candidatos']]
+        self.assertEqual(inicios, sorted(inicios))
+        # La propia tarea no cuenta como ocupación de su responsable
+        propio = next((c for c in datos['candidatos'] if c['id'] == tarea.asignado_a_id), None)
+        if propio:
+            esperado = self.primer_hueco(tarea.asignado_a_id, datos['dias'], date.today(), date.fromisoformat(datos['hasta']), [tarea.id])
+            self.assertEqual(propio['inicio'], esperado[0].isoformat())
+
+        for url in ('/api/huecos/', '/api/huecos/?dias=0', '/api/huecos/?dias=5&horizonte=5000', '/api/huecos/?dias=x'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 400)
+
+
+class ReprogramacionTest(BaseDatos):
+
+    def setUp(self):
+        super().setUp()
+        self.proyecto = Proyecto.objects.create(nombre="Cascada", fecha_inicio=date(2031, 3, 3), fecha_fin_estimada=date(2031, 3, 31))
+        # A (lu-ma) -> B (mi-ju) -> C (vi)
+        self.a = self.tarea("A", date(2031, 3, 3), date(2031, 3, 4))
+        self.b = self.tarea("B", date(2031, 3, 5), date(2031, 3, 6), predecesora=self.a)
+        self.c = self.tarea("C", date(2031, 3, 7), date(2031, 3, 7), predecesora=self.b)
+
+    def tarea(self, nombre, inicio, fin, **campos):
+        return Tarea.objects.create(proyecto=self.proyecto, nombre=nombre, fecha_inicio=inicio, fecha_fin=fin, **campos)
+
+    def fechas(self, *tareas):
+        return [tuple(Tarea.objects.filter(id=t.id).values_list('fecha_inicio', 'fecha_fin').get()) for t in tareas]
+
+    def test_empuja_la_cadena_de_sucesoras(self):
+        movidas = reprogramar([{'id': self.a.id, 'start': '2031-03-04', 'end': '2031-03-05'}])
+        self.assertEqual({t.id for t in movidas}, {self.a.id, self.b.id, self.c.id})
+        self.assertEqual(self.fechas(self.b, self.c), [(date(2031, 3, 6), date(2031, 3, 7)), (date(2031, 3, 10), date(2031, 3, 10))])
+
+        # Si la sucesora ya empieza después, no se toca
+        movidas = reprogramar([{'id': self.a.id, 'start': '2031-03-03', 'end': '2031-03-03'}])
+        self.assertEqual([t.id for t in movidas], [self.a.id])
+
+    def test_fechas_pedidas_no_se_empujan(self):
+        # Cambios coherentes entre sí: cada tarea queda con lo pedido
+        reprogramar([
+            {'id': self.a.id, 'start': '2031-03-10', 'end': '2031-03-11'},
+            {'id': self.b.id, 'start': '2031-03-12', 'end': '2031-03-14'},
+        ])
+        self.assertEqual(self.fechas(self.b, self.c), [(date(2031, 3, 12), date(2031, 3, 14)), (date(2031, 3, 17), date(2031, 3, 17))])
+
+        # B pedida antes del nuevo fin de A: error y no se guarda nada
+        antes = self.fechas(self.a, self.b, self.c)
+        with self.assertRaisesMessage(ErrorReprogramacion, f"La tarea {self.b.id} empieza antes"):
+            reprogramar([
+                {'id': self.a.id, 'start': '2031-03-17', 'end': '2031-03-18'},
+                {'id': self.b.id, 'start': '2031-03-12', 'end': '2031-03-14'},
+            ])
+        self.assertEqual(self.fechas(self.a, self.b, self.c), antes)
+
+    def test_ciclo_no_se_recorre_sin_fin(self):
+        Tarea.objects.filter(id=self.a.id).update(predecesora=self.c)  # A -> B -> C -> A
+        movidas = reprogramar([{'id': self.a.id, 'start': '2031-03-04', 'end': '2031-03-05'}])
+        self.assertEqual(sorted(t.id for t in movidas), sorted([self.a.id, self.b.id, self.c.id]))
+        self.assertEqual(self.fechas(self.a), [(date(2031, 3, 4), date(2031, 3, 5))])
+
+        with self.assertRaises(ErrorReprogramacion):
+            reprogramar([{'id': self.a.id, 'start': '2031-03-05', 'end': '2031-03-04'}])
+
+
+class CalendarioTest(BaseDatos):
+    # Lunes 10 de marzo de 2031 feriado: entre el viernes 7 y el martes 11 no hay ningún día hábil
+    FERIADO = date(2031, 3, 10)
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            Feriado.objects.create(fecha=self.FERIADO, nombre="Feriado de prueba")
+        self.proyecto = Proyecto.objects.create(nombre="Calendario", fecha_inicio=date(2031, 3, 3), fecha_fin_estimada=date(2031, 3, 31))
+
+    def tarea(self, nombre, inicio, fin, **campos):
+        return Tarea.objects.create(proyecto=self.proyecto, nombre=nombre, fecha_inicio=inicio, fecha_fin=fin, **campos)
+
+    def test_feriados_chile(self):
+        for fecha, nombre in [
+            (date(2026, 4, 3), "Viernes Santo"), (date(2026, 4, 4), "Sábado Santo"),
+            (date(2022, 6, 27), "San Pedro y San Pablo"),  # miércoles 29 -> lunes anterior
+            (date(2023, 10, 27), "Día de las Iglesias Evangélicas y Protestantes"),  # martes 31 -> viernes anterior
+            (date(2024, 9, 20), "Feriado adicional de Fiestas Patrias"),
+            (date(2023, 1, 2), "Feriado adicional de Año Nuevo"),
+        ]:
+            with self.subTest(fecha=fecha):
+                self.assertIn((fecha, nombre), feriados_chile(fecha.year))
+        self.assertNotIn(date(2025, 9, 17), dict(feriados_chile(2025)))
+
+    def test_cuentas_con_fechas_y_arreglos(self):
+        self.assertEqual(calendario.dias_habiles(date(2031, 3, 3), date(2031, 3, 14)), 9)
+        self.assertEqual(calendario.sumar(date(2031, 3, 7), 1), date(2031, 3, 11))
+        self.assertEqual(calendario.siguiente_habil(self.FERIADO), date(2031, 3, 11))
+        inicios, fines = calendario.mover([date(2031, 3, 3), date(2031, 3, 6)], [date(2031, 3, 4), date(2031, 3, 6)],
+                                          [date(2031, 3, 7), date(2031, 3, 8)])
+        self.assertEqual(inicios.tolist(), [date(2031, 3, 7), date(2031, 3, 11)])
+        self.assertEqual(fines.tolist(), [date(2031, 3, 11), date(2031, 3, 11)])
+        self.assertEqual(calendario.fecha(calendario.numero(self.FERIADO)), date(2031, 3, 11))
+
+        # Borrar el feriado recarga el calendario
+        with self.captureOnCommitCallbacks(execute=True):
+            Feriado.objects.all().delete()
+        self.assertTrue(calendario.es_habil(self.FERIADO))
+
+    def test_reprogramar_empuja_saltando_fin_de_semana_y_feriado(self):
+        a = self.tarea("A", date(2031, 3, 3), date(2031, 3, 4))
+        b = self.tarea("B", date(2031, 3, 5), date(2031, 3, 6), predecesora=a)
+        reprogramar([{'id': a.id, 'start': '2031-03-06', 'end': '2031-03-07'}])
+        b.refresh_from_db()
+        self.assertEqual((b.fecha_inicio, b.fecha_fin), (date(2031, 3, 11), date(2031, 3, 12)))
+
+    def test_ruta_critica_en_dias_habiles(self):
+        a = self.tarea("A", date(2031, 3, 6), date(2031, 3, 6))
+        b = self.tarea("B", date(2031, 3, 11), date(2031, 3, 12), predecesora=a)
+        c = self.tarea("C", date(2031, 3, 3), date(2031, 3, 12))
+        resultado = ruta_critica.analizar_proyecto(self.proyecto.id)
+        tareas = resultado['tareas']
+        # A puede atrasarse sólo hasta el viernes: el fin de semana y el feriado no son holgura
+        self.assertEqual((tareas[a.id]['holgura'], tareas[a.id]['lf']), (1, date(2031, 3, 7).toordinal()))
+        self.assertTrue(tareas[b.id]['critica'] and tareas[c.id]['critica'])
+        self.assertEqual(resultado['fin_proyecto'], date(2031, 3, 12).toordinal())
+
+    def test_capacidad_por_dias_habiles_y_ausencias(self):
+        recurso = Recurso.objects.create(nombre="Calendario", perfil=Perfil.objects.create(nombre="Calendario"))
+        self.tarea("Semana completa", date(2031, 3, 3), date(2031, 3, 9), asignado_a=recurso)
+        Ausencia.objects.create(recurso=recurso, desde=date(2031, 3, 11), hasta=date(2031, 3, 12))
+        # Una ausencia que se pisa con otra no cuenta dos veces el mismo día
+        Ausencia.objects.create(recurso=recurso, desde=date(2031, 3, 12), hasta=date(2031, 3, 12), motivo='PERMISO')
+        mapa = capacidad.matriz_capacidad(Recurso.objects.filter(id=recurso.id), date(2031, 3, 3), date(2031, 3, 16))
+        self.assertEqual(mapa['habiles'].tolist(), [5, 4])
+        self.assertEqual(mapa['carga'].tolist(), [[1.0, 0.5]])
+        self.assertEqual(mapa['pico'].tolist(), [[1, 1]])
+
+        # En la búsqueda de disponibilidad la ausencia deja al recurso ocupado hasta el día hábil siguiente
+        candidato, = views.evaluar_candidatos([recurso], [], date(2031, 3, 12), date(2031, 3, 13))
+        self.assertEqual((candidato['ocupado'], candidato['fecha_liberacion'], candidato['tarea_actual']),
+                         (True, date(2031, 3, 13), "Vacaciones"))
+
+
+class _CompararVistas:
+    """Las versiones async muestran exactamente lo mismo que las síncronas"""
+    URLS = {
+        'index': '/', 'ver_recursos': '/recursos/?page=2', 'vista_capacidad': '/capacidad/?escala=dia',
+        'vista_conflictos': '/conflictos/', 'vista_gantt': '/gantt/?proyecto=1&orden=recurso',
+        'gantt_datos_api': '/api/gantt/?desde=2000-01-01&hasta=2100-01-01&limite=20',
+        'estados_api': '/api/estados/?agrupar=proyecto',
+    }
+
+    def pedir(self, vista, url):
+        request = RequestFactory().get(url)
+        request.user = AnonymousUser()
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        respuesta = async_to_sync(vista)(request) if iscoroutinefunction(vista) else vista(request)
+        self.assertEqual(respuesta.status_code, 200, url)
+        return respuesta.content
+
+    def test_mismo_resultado(self):
+        self.generar(recursos=40)
+        for nombre, url in self.URLS.items():
+            with self.subTest(vista=nombre):
+                cache.clear()
+                sincrona = self.pedir(getattr(views, nombre), url)
+                cache.clear()
+                self.assertEqual(self.pedir(getattr(vistas_asincronas, nombre), url), sincrona)
+
+
+class VistasAsincronasTest(_CompararVistas, BaseDatos):
+    """Dentro de la transacción del test las consultas van una tras otra, en el hilo de la petición"""
+
+
+class VistasAsincronasParalelasTest(_CompararVistas, _Datos, TransactionTestCase):
+    """Fuera de una transacción van en paralelo, cada una en su hilo y con su conexión"""
@@ -1,18 +1,42 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 from django.contrib.auth import views as auth_views
 
+# VISTAS_ASINCRONAS: las pantallas con consultas independientes usan sus versiones async (para ASGI)
+if getattr(settings, 'VISTAS_ASINCRONAS', False):
+    from . import vistas_asincronas as pantallas
+else:
+    pantallas = views
+
 urlpatterns = [
     # Pantallas Principales
-    path('', views.index, name='index'), 
-    path('gantt/', views.vista_gantt, name='gantt'),
+    path('', pantallas.index, name='index'), 
+    path('gantt/', pantallas.vista_gantt, name='gantt'),
     path('buscar/', views.buscar_disponibilidad, name='buscar'),
-    path('recursos/', views.ver_recursos, name='recursos'),
+    path('recursos/', pantallas.ver_recursos, name='recursos'),
     path('proyectos-lista/', views.lista_proyectos, name='lista_proyectos'),
+    path('proyectos-lista/<int:proyecto_id>/tareas/', views.tareas_proyecto, name='tareas_proyecto'),
     path('reporte/', views.reporte_recurso, name='reporte_recurso'),
+    path('reporte/trabajos/<int:trabajo_id>/descargar/', views.descargar_reporte, name='descargar_reporte'),
+    path('capacidad/', pantallas.vista_capacidad, name='capacidad'),
+    path('conflictos/', pantallas.vista_conflictos, name='conflictos'),
     path('logout/', auth_views.LogoutView.as_view(next_page='/admin/'), name='logout'),
     
     # Funcionalidades / API 
     path('api/actualizar_tarea/', views.actualizar_tarea_api, name='actualizar_tarea_api'),
+    path('api/reprogramar_tareas/', views.reprogramar_tareas_api, name='reprogramar_tareas_api'),
+    path('api/ruta_critica/', views.ruta_critica_api, name='ruta_critica_api'),
+    path('api/gantt/', pantallas.gantt_datos_api, name='gantt_datos_api'),
+    path('api/ranking/', views.ranking_candidatos_api, name='ranking_candidatos_api'),
+    path('api/huecos/', views.huecos_api, name='huecos_api'),
+    path('api/capacidad/', views.capacidad_api, name='capacidad_api'),
+    path('api/conflictos/', views.conflictos_api, name='conflictos_api'),
+    path('api/estados/', pantallas.estados_api, name='estados_api'),
+    path('api/reportes/', views.solicitar_reporte_api, name='solicitar_reporte_api'),
+    path('api/reportes/<int:trabajo_id>/', views.estado_reporte_api, name='estado_reporte_api'),
+    path('api/autocompletar/<str:tipo>/', views.autocompletar_api, name='autocompletar_api'),
     path('asignar/<int:tarea_id>/<int:recurso_id>/', views.asignar_recurso, name='asignar_recurso'),
+    path('asignacion/', views.asignacion_masiva, name='asignacion_masiva'),
+    path('asignacion/aplicar/', views.aplicar_asignacion, name='aplicar_asignacion'),
 ]
\ No newline at end of file
@@ -1,62 +1,153 @@
 from django.shortcuts import render, get_object_or_404
 from django.views.decorators.http import require_POST
 from django.core.serializers.json import DjangoJSONEncoder
-from .models import Tarea, Proyecto
+from .models import Tarea, Proyecto, TrabajoReporte
+from .candidatos import evaluar_candidatos
+from .exportar import exportar_reporte_excel
+from . import ruta_critica
+from .tablero import resumen_tablero
+from .reprogramacion import reprogramar, ErrorReprogramacion, ConflictoAgenda
+from . import asignacion, capacidad, conflictos, huecos, reportes
+from .calendario import calendario
+from .autocompletar import autocompletar, CATALOGOS, LIMITE_POR_DEFECTO as LIMITE_AUTOCOMPLETAR, LIMITE_MAXIMO as MAXIMO_AUTOCOMPLETAR
+from .gantt import filas_gantt, leer_cursor, ventana_por_defecto, ORDENES, LIMITE_POR_DEFECTO, LIMITE_MAXIMO
+from rrhh.matriz import matriz
 from rrhh.models import Recurso, Perfil, Habilidad
-from django.http import JsonResponse
+from django.http import JsonResponse, FileResponse, Http404
 from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import redirect
+from django.urls import reverse
 from django.contrib import messages
-from django.db.models import Count, Q, Avg
+from django.db.models import Count, Q, Avg, Case, When, Value, F, IntegerField, Window
+from django.db.models.functions import RowNumber
+from django.core.paginator import Paginator
 from django.utils import timezone
-from datetime import date
+from django.utils.http import url_has_allowed_host_and_scheme
+from datetime import date, timedelta
 from django.http import HttpResponse
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 import json
+import os
+import numpy as np
+
+# Tarjetas por página en "Estado del Personal"
+RECURSOS_POR_PAGINA = 30
+CONFLICTOS_POR_PAGINA = 50
 
 def vista_gantt(request):
     # 1. Capturar filtros de la URL
-    proyecto_id = request.GET.get('proyecto')
-    recurso_id = request.GET.get('recurso')
-    
-    # 2. Consulta Base
-    tareas = Tarea.objects.all().select_related('proyecto', 'asignado_a')
-    
-    # 3. Aplicar Filtros
-    if proyecto_id:
-        tareas = tareas.filter(proyecto_id=proyecto_id)
-    if recurso_id:
-        tareas = tareas.filter(asignado_a_id=recurso_id)
-        
-    # 4. Preparar datos para JavaScript (Frappe Gantt format)
-    gantt_data = []
-    for t in tareas:
-        gantt_data.append({
-            'id': str(t.id),
-            'name': f"{t.nombre}",
-            'start': t.fecha_inicio.strftime("%Y-%m-%d"),
-            'end': t.fecha_fin.strftime("%Y-%m-%d"),
-            'progress': t.progreso,
-            # Usamos colores diferentes según el proyecto (truco visual)
-            'custom_class': f'bar-project-{t.proyecto.id % 5}', 
-            # Información extra para el tooltip
-            'proyecto': t.proyecto.nombre,
-            'responsable': t.asignado_a.nombre if t.asignado_a else "Sin asignar"
-        })
-        
-    # 5. Listas para los selectores del filtro
-    proyectos = Proyecto.objects.all()
-    recursos = Recurso.objects.all()
+    filtros = _filtros_gantt(request)
 
-    contexto = {
-        'gantt_data': json.dumps(gantt_data, cls=DjangoJSONEncoder),
-        'proyectos': proyectos,
-        'recursos': recursos,
-        'filtros': {'proyecto': proyecto_id, 'recurso': recurso_id} # Para mantener seleccionado el filtro
+    # 2. Los filtros son buscadores (autocompletar_api): sólo se envía el nombre de lo ya elegido
+    proyecto = _elegido('proyecto', filtros['proyecto'])
+    recurso = _elegido('recurso', filtros['recurso'])
+
+    return render(request, 'proyectos/gantt.html', _contexto_gantt(filtros, proyecto, recurso))
+
+def _filtros_gantt(request):
+    orden = request.GET.get('orden', 'proyecto')
+    return {
+        'proyecto': request.GET.get('proyecto'),
+        'recurso': request.GET.get('recurso'),
+        'orden': orden if orden in ORDENES else 'proyecto',
     }
-    
-    return render(request, 'proyectos/gantt.html', contexto)
+
+def _contexto_gantt(filtros, proyecto, recurso):
+    # Las barras ya NO van incrustadas en la página: el JS las pide por ventanas
+    # de fechas a gantt_datos_api a medida que el usuario hace scroll o zoom
+    desde, hasta = ventana_por_defecto()
+    return {
+        'seleccion': {'proyecto': proyecto, 'recurso': recurso},
+        'ventana': {'desde': desde.isoformat(), 'hasta': hasta.isoformat()},
+        'filtros': filtros,  # Para mantener seleccionado el filtro
+    }
+
+def _elegido(tipo, valor):
+    """Entrada del autocompletar para el id recibido en un filtro (None si no hay o no existe)"""
+    try:
+        encontradas = autocompletar.por_id(tipo, [int(valor)]) if valor else []
+    except ValueError:
+        return None
+    return encontradas[0] if encontradas else None
+
+def autocompletar_api(request, tipo):
+    """Buscador por prefijo (sin tildes ni mayúsculas) de recursos, proyectos o conocimientos"""
+    if tipo not in CATALOGOS:
+        return JsonResponse({'status': 'error', 'mensaje': 'Tipo desconocido'}, status=404)
+    try:
+        limite = min(int(request.GET.get('limite', LIMITE_AUTOCOMPLETAR)), MAXIMO_AUTOCOMPLETAR)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'mensaje': 'Parámetros inválidos'}, status=400)
+
+    filtro = None
+    if tipo == 'recurso' and request.GET.get('activos') == '1':
+        filtro = lambda entrada: entrada['activo']
+
+    resultados = autocompletar.buscar(tipo, request.GET.get('q', ''), max(limite, 1), filtro)
+    return JsonResponse({'status': 'ok', 'resultados': resultados})
+
+def gantt_datos_api(request):
+    """Barras del Gantt para una ventana de fechas, paginadas por keyset (proyecto o recurso)"""
+    try:
+        parametros = _parametros_gantt(request)
+    except ValueError as error:
+        return JsonResponse({'status': 'error', 'mensaje': str(error)}, status=400)
+
+    filas, siguiente = filas_gantt(**parametros)
+    return JsonResponse({'status': 'ok', 'tareas': filas, 'siguiente': siguiente})
+
+def _parametros_gantt(request):
+    """Argumentos de filas_gantt leídos de la URL (ValueError con el mensaje para el usuario)"""
+    desde_defecto, hasta_defecto = ventana_por_defecto()
+    try:
+        desde = date.fromisoformat(request.GET.get('desde') or desde_defecto.isoformat())
+        hasta = date.fromisoformat(request.GET.get('hasta') or hasta_defecto.isoformat())
+        limite = min(int(request.GET.get('limite', LIMITE_POR_DEFECTO)), LIMITE_MAXIMO)
+        cursor = leer_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+    except ValueError:
+        raise ValueError('Parámetros inválidos')
+
+    orden = request.GET.get('orden', 'proyecto')
+    if orden not in ORDENES:
+        raise ValueError('Orden inválido')
+
+    return {
+        'desde': desde, 'hasta': hasta,
+        'proyecto_id': request.GET.get('proyecto') or None,
+        'recurso_id': request.GET.get('recurso') or None,
+        'orden': orden, 'cursor': cursor, 'limite': max(limite, 1),
+    }
+
+def ruta_critica_api(request):
+    """Fechas tempranas/tardías, holgura y ruta crítica de uno o más proyectos (?proyecto=1&proyecto=2)"""
+    try:
+        proyectos_ids = [int(p) for p in request.GET.getlist('proyecto') if p]
+    except ValueError:
+        return JsonResponse({'status': 'error', 'mensaje': 'Parámetros inválidos'}, status=400)
+    if not proyectos_ids:
+        return JsonResponse({'status': 'error', 'mensaje': 'Debe indicar al menos un proyecto'}, status=400)
+
+    resultados = ruta_critica.analizar(proyectos_ids)
+
+    proyectos = {}
+    tareas = []
+    for pid, resultado in resultados.items():
+        proyectos[pid] = {
+            'fin_proyecto': ruta_critica.a_fecha(resultado['fin_proyecto']),
+            'ciclos': resultado['ciclos'],
+        }
+        for tid, t in resultado['tareas'].items():
+            tareas.append({
+                'id': str(tid),
+                'proyecto': pid,
+                'inicio_temprano': ruta_critica.a_fecha(t['es']),
+                'fin_temprano': ruta_critica.a_fecha(t['ef']),
+                'inicio_tardio': ruta_critica.a_fecha(t['ls']),
+                'fin_tardio': ruta_critica.a_fecha(t['lf']),
+                'holgura': t['holgura'],
+                'critica': t['critica'],
+            })
+
+    return JsonResponse({'status': 'ok', 'proyectos': proyectos, 'tareas': tareas})
 
 def buscar_disponibilidad(request):
     # ---INICIALIZACIÓN ---
@@ -91,64 +182,10 @@ def buscar_disponibilidad(request):
             if perfil_id:
                 recursos = recursos.filter(perfil_id=perfil_id)
 
-            # B. IDENTIFICAMOS A LOS OCUPADOS (Solo para marcar, no para borrar)
-            ocupados_ids = Tarea.objects.filter(
-                fecha_inicio__lte=fecha_fin_req,
-                fecha_fin__gte=fecha_inicio_req,
-                progreso__lt=100
-            ).values_list('asignado_a_id', flat=True)
-
-            # C. PROCESAMOS A CADA RECURSO
-            for recurso in recursos:
-                # 1. Calculamos Disponibilidad Básica
-                esta_ocupado = recurso.id in ocupados_ids
-                
-                # --- CALCULAR CUÁNDO SE LIBERA ---
-                fecha_liberacion = None
-                nombre_tarea_actual = ""
-                
-                if esta_ocupado:
-                    # Buscamos la tarea que termina más tarde dentro del rango conflicto
-                    ultima_tarea = Tarea.objects.filter(
-                        asignado_a=recurso,
-                        progreso__lt=100,
-                        fecha_fin__gte=fecha_inicio_req  # Tareas que terminan después del inicio buscado
-                    ).order_by('-fecha_fin').first()
-                    
-                    if ultima_tarea:
-                        fecha_liberacion = ultima_tarea.fecha_fin
-                        nombre_tarea_actual = ultima_tarea.nombre
-                
-                # 2. Calculamos Match Técnico 
-                match_score = 0
-                detalles = []
-                
-                if requisitos:
-                    puntos_totales = 0
-                    for req in requisitos:
-                        habilidad = Habilidad.objects.filter(recurso=recurso, conocimiento=req).first()
-                        if habilidad:
-                            puntos = (habilidad.nivel / 5) * 100
-                            puntos_totales += puntos
-                            detalles.append({'skill': req.nombre, 'nivel': habilidad.get_nivel_display(), 'cumple': True})
-                        else:
-                            detalles.append({'skill': req.nombre, 'nivel': '---', 'cumple': False})
-                    match_score = round(puntos_totales / len(requisitos))
-                else:
-                    match_score = 100 
-
-                candidatos_finales.append({
-                    'perfil': recurso,
-                    'match': match_score,
-                    'ocupado': esta_ocupado,
-                    'fecha_liberacion': fecha_liberacion, 
-                    'tarea_actual': nombre_tarea_actual,  
-                    'detalles': detalles
-                })
-
-            # D. ORDENAMIENTO INTELIGENTE
-            # Primero por Match (Mayor a menor), luego por Disponibilidad (Libres primero)
-            candidatos_finales.sort(key=lambda x: (not x['ocupado'], x['match']), reverse=True)
+            # B. OCUPACIÓN, LIBERACIÓN Y MATCH TÉCNICO DE TODOS LOS CANDIDATOS
+            # El motor resuelve todo en un número fijo de consultas y ordena en memoria
+            # (Primero por Match, luego por Disponibilidad)
+            candidatos_finales = evaluar_candidatos(recursos, requisitos, fecha_inicio_req, fecha_fin_req)
 
             if not candidatos_finales:
                  mensaje = "No se encontraron recursos activos con ese perfil."
@@ -164,6 +201,78 @@ def buscar_disponibilidad(request):
     }
     return render(request, 'proyectos/buscar.html', contexto)
 
+def ranking_candidatos_api(request):
+    """Top-K de recursos activos para un set de requisitos (los de una tarea o una lista explícita)"""
+    tarea_id = request.GET.get('tarea_id')
+    try:
+        k = max(1, int(request.GET.get('k', 10)))
+        nivel_minimo = request.GET.get('nivel_minimo')
+        nivel_minimo = int(nivel_minimo) if nivel_minimo else None
+
+        if tarea_id:
+            conocimientos_ids = list(Tarea.requisitos.through.objects.filter(
+                tarea_id=tarea_id
+            ).values_list('conocimiento_id', flat=True))
+        else:
+            conocimientos_ids = [int(c) for c in request.GET.getlist('conocimiento')]
+    except ValueError:
+        return JsonResponse({'status': 'error', 'mensaje': 'Parámetros inválidos'}, status=400)
+
+    # Filtro opcional: sólo quienes cubren TODOS los requisitos con el nivel mínimo
+    recursos_ids = matriz.cubren(conocimientos_ids, nivel_minimo) if nivel_minimo else None
+    ranking = matriz.top_k(conocimientos_ids, k, recursos_ids)
+
+    nombres = Recurso.objects.in_bulk([rid for rid, _ in ranking])
+    candidatos = [
+        {'id': rid, 'nombre': nombres[rid].nombre, 'match': match}
+        for rid, match in ranking if rid in nombres
+    ]
+    return JsonResponse({'status': 'ok', 'requisitos': conocimientos_ids, 'candidatos': candidatos})
+
+def huecos_api(request):
+    """
+    Primer hueco libre: los K candidatos activos que antes pueden tomar una tarea de N días hábiles
+    (sin tareas abiertas encima), y a igual fecha los de mejor match técnico.
+    ?dias=N o ?tarea_id= (sus requisitos y su duración en días hábiles; su propia asignación no cuenta
+    como ocupación). Opcionales: desde, horizonte (días), perfil, conocimiento (varios), nivel_minimo, k.
+    """
+    try:
+        tarea = get_object_or_404(Tarea, id=int(request.GET['tarea_id'])) if request.GET.get('tarea_id') else None
+        desde = date.fromisoformat(request.GET['desde']) if request.GET.get('desde') else timezone.localdate()
+        horizonte = int(request.GET.get('horizonte', huecos.HORIZONTE_POR_DEFECTO))
+        k = int(request.GET.get('k', 10))
+        nivel_minimo = int(request.GET['nivel_minimo']) if request.GET.get('nivel_minimo') else None
+        perfil_id = int(request.GET['perfil']) if request.GET.get('perfil') else None
+        if tarea:
+            requisitos = list(tarea.requisitos.values_list('id', flat=True))
+            dias = max(1, calendario.dias_habiles(tarea.fecha_inicio, tarea.fecha_fin))
+        else:
+            requisitos, dias = [int(c) for c in request.GET.getlist('conocimiento')], None
+        if request.GET.get('dias') or dias is None:
+            dias = int(request.GET['dias'])
+    except (KeyError, ValueError):
+        return JsonResponse({'status': 'error', 'mensaje': 'Parámetros inválidos'}, status=400)
+    if not (1 <= horizonte <= huecos.HORIZONTE_MAXIMO and 1 <= dias <= horizonte and k >= 1):
+        return JsonResponse({'status': 'error', 'mensaje': 'Parámetros inválidos'}, status=400)
+    hasta = desde + timedelta(days=horizonte - 1)
+
+    recursos = Recurso.objects.filter(activo=True)
+    if perfil_id:
+        recursos = recursos.filter(perfil_id=perfil_id)
+    recursos_ids = list(recursos.values_list('id', flat=True))
+    if nivel_minimo:
+        recursos_ids = matriz.cubren(requisitos, nivel_minimo, recursos_ids)
+
+    resultado = huecos.buscar(recursos_ids, dias, desde, hasta, requisitos, k, excluir=[tarea.id] if tarea else ())
+    nombres = Recurso.objects.select_related('perfil').in_bulk([c['recurso_id'] for c in resultado])
+    candidatos = [
+        {'id': c['recurso_id'], 'nombre': nombres[c['recurso_id']].nombre, 'perfil': nombres[c['recurso_id']].perfil.nombre,
+         'match': c['match'], 'inicio': c['inicio'], 'fin': c['fin']}
+        for c in resultado if c['recurso_id'] in nombres
+    ]
+    return JsonResponse({'status': 'ok', 'dias': dias, 'desde': desde, 'hasta': hasta,
+                         'requisitos': requisitos, 'candidatos': candidatos})
+
 # 2. PONEMOS @require_POST (Para que solo acepte envíos de datos, no visitas por navegador)
 @require_POST
 def actualizar_tarea_api(request):
@@ -177,6 +286,16 @@ def actualizar_tarea_api(request):
         tarea = Tarea.objects.get(id=tarea_id)
         tarea.fecha_inicio = nueva_fecha_inicio[:10]
         tarea.fecha_fin = nueva_fecha_fin[:10]
+
+        # Chequeo previo contra el índice: no dejar al responsable con tareas cruzadas sin avisar
+        if conflictos.verificacion_activa() and not data.get('forzar'):
+            verificacion = conflictos.verificar([tarea])
+            if verificacion:
+                return JsonResponse({
+                    'status': 'conflicto', 'mensaje': 'El responsable quedaría con tareas cruzadas.',
+                    'conflictos': conflictos.a_json(verificacion)
+                }, status=409)
+
         tarea.save()
         
         return JsonResponse({'status': 'ok'})
@@ -185,11 +304,50 @@ def actualizar_tarea_api(request):
     except Exception as e:
         return JsonResponse({'status': 'error', 'mensaje': str(e)}, status=400)
 
+@require_POST
+def reprogramar_tareas_api(request):
+    """
+    Recibe varios cambios de fecha {"cambios": [{"id", "start", "end"}, ...]},
+    empuja las sucesoras que correspondan y devuelve TODAS las tareas que se movieron
+    para que el Gantt se actualice sin recargar.
+    Si algún responsable queda con tareas cruzadas responde 409 con el detalle,
+    salvo que venga "forzar": true.
+    """
+    try:
+        data = json.loads(request.body)
+        verificar = conflictos.verificacion_activa() and not data.get('forzar')
+        movidas = reprogramar(data.get('cambios', []), verificar_conflictos=verificar)
+    except ConflictoAgenda as e:
+        return JsonResponse({
+            'status': 'conflicto', 'mensaje': str(e), 'conflictos': conflictos.a_json(e.verificacion)
+        }, status=409)
+    except ErrorReprogramacion as e:
+        return JsonResponse({'status': 'error', 'mensaje': str(e)}, status=400)
+    except (ValueError, AttributeError):
+        return JsonResponse({'status': 'error', 'mensaje': 'JSON inválido'}, status=400)
+
+    return JsonResponse({
+        'status': 'ok',
+        'movidas': [
+            {'id': str(t.id), 'start': t.fecha_inicio.isoformat(), 'end': t.fecha_fin.isoformat()}
+            for t in movidas
+        ]
+    })
+
 def asignar_recurso(request, tarea_id, recurso_id):
     tarea = Tarea.objects.get(id=tarea_id)
     recurso = Recurso.objects.get(id=recurso_id)
     
     tarea.asignado_a = recurso
+
+    # Chequeo previo: si se le cruza con otra tarea abierta, no se asigna (salvo ?forzar=1)
+    if conflictos.verificacion_activa() and not request.GET.get('forzar'):
+        verificacion = conflictos.verificar([tarea])
+        if verificacion:
+            cruces = ", ".join(f"{i.nombre} ({i.inicio:%d/%m} - {i.fin:%d/%m})" for i in verificacion[0]['cruces'])
+            messages.error(request, f"No se asignó: a {recurso.nombre} se le cruzaría con {cruces}.")
+            return redirect(f"{reverse('buscar')}?tarea_id={tarea.id}")
+
     tarea.save()
 
     messages.success(request, f"¡Éxito! La tarea '{tarea.nombre}' ha sido asignada a {recurso.nombre}.")
@@ -197,95 +355,375 @@ def asignar_recurso(request, tarea_id, recurso_id):
     # Nos devuelve al Gantt para ver el cambio
     return redirect('gantt')
 
-def index(request):
-    # Contadores para el Dashboard
-    total_proyectos = Proyecto.objects.count()
-    total_tareas = Tarea.objects.count()
-    total_recursos = Recurso.objects.count()
-    
-    # Calculamos progreso promedio (opcional)
-    # Esto es solo un ejemplo, puedes simplificarlo
-    tareas_completadas = Tarea.objects.filter(progreso=100).count()
-
-    # --- Agrupar por Centro de Costo ---
-    # Esto crea una lista como: [{'centro_costo': 'TI', 'total': 5}, {'centro_costo': 'Obras', 'total': 2}]
-    centros_unicos = Proyecto.objects.values_list('centro_costo', flat=True).distinct()
-
-    datos_agrupados = []
-    for cc in centros_unicos:
-        # Buscamos los proyectos de este centro
-        proyectos = Proyecto.objects.filter(centro_costo=cc)
-        
-        datos_agrupados.append({
-            'nombre_cc': cc,
-            'cantidad': proyectos.count(),
-            'lista_proyectos': proyectos 
-        })
-    
+def asignacion_masiva(request):
+    """
+    Propuesta de asignación automática para las tareas sin responsable de un proyecto
+    y/o una ventana de fechas. Sólo muestra la propuesta: se guarda con aplicar_asignacion.
+    """
+    proyecto_id = request.GET.get('proyecto')
+    desde = request.GET.get('desde')
+    hasta = request.GET.get('hasta')
+    perfil_id = request.GET.get('perfil')
+    match_minimo = request.GET.get('match_minimo') or '0'
+
+    propuesta, sin_candidato, total = [], [], 0
+    buscado = bool(proyecto_id or desde or hasta)
+    if buscado:
+        try:
+            desde = date.fromisoformat(desde) if desde else None
+            hasta = date.fromisoformat(hasta) if hasta else None
+            minimo = int(match_minimo)
+        except ValueError:
+            messages.error(request, "Filtros inválidos.")
+            return redirect('asignacion_masiva')
+
+        tareas = asignacion.tareas_sin_asignar(proyecto_id, desde, hasta)
+        total = tareas.count()
+        recursos_ids = list(Recurso.objects.filter(perfil_id=perfil_id).values_list('id', flat=True)) if perfil_id else None
+        propuesta, sin_candidato = asignacion.proponer(tareas, recursos_ids=recursos_ids, match_minimo=minimo)
+
     contexto = {
-        'total_proyectos': total_proyectos,
-        'total_tareas': total_tareas,
-        'total_recursos': total_recursos,
-        'tareas_completadas': tareas_completadas,
-        'proyectos_por_cc': datos_agrupados,
+        'propuesta': propuesta,
+        'sin_candidato': sin_candidato,
+        'total': total,
+        'buscado': buscado,
+        'limite': asignacion.LIMITE_TAREAS,
+        # El proyecto se elige con el buscador (autocompletar_api): sólo se envía el ya elegido
+        'seleccion': {'proyecto': _elegido('proyecto', proyecto_id)},
+        'perfiles': Perfil.objects.all(),
+        'filtros': {
+            'desde': desde.isoformat() if desde else '',
+            'hasta': hasta.isoformat() if hasta else '',
+            'perfil': int(perfil_id) if perfil_id else '',
+            'match_minimo': match_minimo,
+        },
     }
+    return render(request, 'proyectos/asignacion.html', contexto)
+
+@require_POST
+def aplicar_asignacion(request):
+    """Guarda las filas marcadas de la propuesta (campos 'asignacion' = 'tarea_id:recurso_id')"""
+    try:
+        pares = [valor.split(':') for valor in request.POST.getlist('asignacion')]
+        asignadas, omitidas = asignacion.aplicar(pares)
+    except (asignacion.ErrorAsignacion, ValueError) as e:
+        messages.error(request, f"No se pudo aplicar la asignación: {e}")
+        return redirect('asignacion_masiva')
+
+    messages.success(request, f"Se asignaron {len(asignadas)} tarea(s).")
+    if omitidas:
+        messages.warning(
+            request,
+            f"{len(omitidas)} tarea(s) se omitieron porque cambiaron desde la propuesta "
+            f"(ya tienen responsable o el recurso quedó ocupado)."
+        )
+    # Volvemos a la misma búsqueda para ver lo que quedó pendiente
+    volver = request.POST.get('volver')
+    if volver and url_has_allowed_host_and_scheme(volver, allowed_hosts={request.get_host()}):
+        return redirect(volver)
+    return redirect('asignacion_masiva')
+
+def index(request):
+    # Contadores y agrupación por Centro de Costo / Unidad de Negocio para el Dashboard.
+    # Salen de UNA consulta agrupada y quedan en cache hasta que cambie un Proyecto,
+    # una Tarea o un Recurso (ver tablero.py y signals.py)
+    contexto = resumen_tablero()
     
     return render(request, 'proyectos/index.html', contexto)
 
-def ver_recursos(request):
-    hoy = timezone.now().date()
-    recursos = Recurso.objects.all()
+def _recursos_filtrados(perfil_id, activo):
+    recursos = Recurso.objects.select_related('perfil').order_by('nombre', 'id')
+    if perfil_id:
+        recursos = recursos.filter(perfil_id=perfil_id)
+    if activo in ('0', '1'):
+        recursos = recursos.filter(activo=(activo == '1'))
+    return recursos
+
+def _tareas_abiertas(recursos_ids, hoy):
+    """
+    UNA consulta con ventana sobre las tareas abiertas de los recursos dados. Devuelve (activas, futuras):
+    - ACTIVAS: ya empezaron, no ha pasado su fecha fin y no están al 100% (todas)
+    - FUTURAS: empiezan DESPUÉS de hoy (sólo las 3 próximas por recurso, vía ROW_NUMBER)
+    """
+    es_futura = Case(When(fecha_inicio__gt=hoy, then=Value(1)), default=Value(0), output_field=IntegerField())
+    numero_futura = Case(
+        When(fecha_inicio__gt=hoy, then=Window(
+            RowNumber(),
+            partition_by=[F('asignado_a_id'), es_futura],
+            order_by=[F('fecha_inicio').asc(), F('id').asc()],
+        )),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    tareas = Tarea.objects.filter(
+        asignado_a__in=recursos_ids,
+        progreso__lt=100,
+        fecha_fin__gte=hoy
+    ).annotate(numero_futura=numero_futura).filter(
+        numero_futura__lte=3
+    ).select_related('proyecto').order_by('asignado_a_id', 'fecha_inicio', 'id')
+
+    activas, futuras = {}, {}
+    for t in tareas:
+        destino = futuras if t.numero_futura else activas
+        destino.setdefault(t.asignado_a_id, []).append(t)
+    return activas, futuras
+
+def _contexto_recursos(pagina, recursos_pagina, activas, futuras, perfiles, perfil_id, activo):
     info_recursos = []
-    
-    for r in recursos:
-        # 1. Tareas ACTIVAS (Las que hacen que esté "Ocupado" HOY)
-        # Criterio: Ya empezó, no ha terminado su fecha fin, y no está al 100%
-        tareas_activas = Tarea.objects.filter(
-            asignado_a=r,
-            fecha_inicio__lte=hoy,
-            fecha_fin__gte=hoy,
-            progreso__lt=100
-        )
+    for r in recursos_pagina:
+        tareas_activas = activas.get(r.id, [])
 
-        # 2. Tareas FUTURAS (Solo informativas, no afectan el estado de hoy)
-        # Criterio: Empiezan DESPUÉS de hoy
-        tareas_futuras = Tarea.objects.filter(
-            asignado_a=r,
-            fecha_inicio__gt=hoy,
-            progreso__lt=100
-        ).order_by('fecha_inicio')[:3] 
-        
         # Determinar el estado según las tareas ACTIVAS
-        estado_actual = 'Ocupado' if tareas_activas.exists() else 'Disponible'
+        estado_actual = 'Ocupado' if tareas_activas else 'Disponible'
 
         info_recursos.append({
             'perfil': r,
             'estado': estado_actual,
             'tareas_activas': tareas_activas,
-            'tareas_futuras': tareas_futuras 
+            'tareas_futuras': futuras.get(r.id, [])
         })
     
-    contexto = {'lista_recursos': info_recursos}
+    return {
+        'lista_recursos': info_recursos,
+        'pagina': pagina,
+        'perfiles': perfiles,
+        'filtros': {'perfil': int(perfil_id) if perfil_id else '', 'activo': activo},
+    }
+
+def ver_recursos(request):
+    hoy = timezone.localdate()
+
+    # 1. Filtros y paginación: el costo depende del tamaño de la página, no de la dotación
+    perfil_id = request.GET.get('perfil')
+    activo = request.GET.get('activo', '')
+
+    recursos = _recursos_filtrados(perfil_id, activo)
+    pagina = Paginator(recursos, RECURSOS_POR_PAGINA).get_page(request.GET.get('page'))
+    recursos_pagina = list(pagina.object_list)
+
+    # 2. Tareas activas y próximas de los recursos de la página (una consulta)
+    activas, futuras = _tareas_abiertas([r.id for r in recursos_pagina], hoy)
+
+    contexto = _contexto_recursos(pagina, recursos_pagina, activas, futuras, Perfil.objects.all(), perfil_id, activo)
     return render(request, 'proyectos/recursos.html', contexto)
 
-def lista_proyectos(request):
-    # Traemos proyectos con sus tareas pre-cargadas para optimizar velocidad
-    proyectos = Proyecto.objects.prefetch_related('tareas__asignado_a').all()
-    
-    # Calculamos el avance promedio del proyecto (Opcional, pero útil)
-    for p in proyectos:
-        total_tareas = p.tareas.count()
-        if total_tareas > 0:
-            suma_progreso = sum(t.progreso for t in p.tareas.all())
-            p.avance_total = round(suma_progreso / total_tareas)
-        else:
-            p.avance_total = 0
+def _parametros_capacidad(request):
+    """Filtros comunes de la página y la API de capacidad. Lanza ValueError si alguno es inválido"""
+    desde_defecto, hasta_defecto = capacidad.ventana_por_defecto()
+    desde = date.fromisoformat(request.GET.get('desde') or desde_defecto.isoformat())
+    hasta = date.fromisoformat(request.GET.get('hasta') or hasta_defecto.isoformat())
+    escala = request.GET.get('escala', 'semana')
+    if hasta < desde or (hasta - desde).days > capacidad.DIAS_MAXIMOS or escala not in capacidad.ESCALAS:
+        raise ValueError
+
+    perfil_id = request.GET.get('perfil')
+    recursos = Recurso.objects.filter(activo=True)
+    if perfil_id:
+        recursos = recursos.filter(perfil_id=int(perfil_id))
+
+    return {
+        'recursos': recursos, 'desde': desde, 'hasta': hasta, 'escala': escala,
+        'unidad_negocio': request.GET.get('unidad_negocio') or None,
+        'centro_costo': request.GET.get('centro_costo') or None,
+        'perfil': int(perfil_id) if perfil_id else '',
+    }
 
+def capacidad_api(request):
+    """Matriz recurso x semana (o día) con la carga promedio (%) y las celdas sobreasignadas"""
+    try:
+        p = _parametros_capacidad(request)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'mensaje': 'Parámetros inválidos'}, status=400)
+
+    mapa = capacidad.matriz_capacidad(
+        p['recursos'], p['desde'], p['hasta'], p['escala'],
+        unidad_negocio=p['unidad_negocio'], centro_costo=p['centro_costo']
+    )
+    return JsonResponse({
+        'status': 'ok',
+        'escala': p['escala'],
+        'columnas': [c.isoformat() for c in mapa['columnas']],
+        'recursos': [{'id': rid, 'nombre': nombre, 'perfil': perfil} for rid, nombre, perfil in mapa['recursos']],
+        'habiles': mapa['habiles'].tolist(),
+        'carga': np.rint(mapa['carga'] * 100).astype(int).tolist(),
+        'sobreasignado': capacidad.sobreasignados(mapa).tolist(),
+    })
+
+def vista_capacidad(request):
+    """Mapa de calor de la carga del personal en el tiempo, con las celdas sobreasignadas en rojo"""
+    try:
+        p = _parametros_capacidad(request)
+    except ValueError:
+        messages.warning(request, "Filtros inválidos: se muestra la ventana por defecto.")
+        return redirect('capacidad')
+
+    mapa = _mapa_capacidad(p)
+    contexto = _contexto_capacidad(request, p, mapa, Perfil.objects.all(), _centros_costo())
+    return render(request, 'proyectos/capacidad.html', contexto)
+
+def _mapa_capacidad(p):
+    return capacidad.matriz_capacidad(
+        p['recursos'], p['desde'], p['hasta'], p['escala'],
+        unidad_negocio=p['unidad_negocio'], centro_costo=p['centro_costo']
+    )
+
+def _centros_costo():
+    return Proyecto.objects.order_by('centro_costo').values_list('centro_costo', flat=True).distinct()
+
+def _contexto_capacidad(request, p, mapa, perfiles, centros_costo):
+    porcentajes = np.rint(mapa['carga'] * 100).astype(int)
+    sobre = capacidad.sobreasignados(mapa)
+
+    # La matriz se calcula para todo el filtro (para los totales), pero se dibuja una página de filas
+    pagina = Paginator(range(len(mapa['recursos'])), RECURSOS_POR_PAGINA).get_page(request.GET.get('page'))
+    filas = [
+        {'recurso': mapa['recursos'][i], 'celdas': list(zip(porcentajes[i].tolist(), sobre[i].tolist()))}
+        for i in pagina.object_list
+    ]
+    totales = list(zip(
+        np.rint(porcentajes.mean(axis=0)).astype(int).tolist() if len(porcentajes) else [0] * len(mapa['columnas']),
+        sobre.sum(axis=0).tolist(),
+    ))
+
+    return {
+        'columnas': mapa['columnas'],
+        'filas': filas,
+        'totales': totales,
+        'pagina': pagina,
+        'perfiles': perfiles,
+        'unidades': Proyecto.OPCIONES_UNIDAD,
+        'centros_costo': centros_costo,
+        'filtros': {
+            'perfil': p['perfil'], 'unidad_negocio': p['unidad_negocio'] or '', 'centro_costo': p['centro_costo'] or '',
+            'escala': p['escala'], 'desde': p['desde'].isoformat(), 'hasta': p['hasta'].isoformat(),
+        },
+    }
+
+def _buscar_conflictos(request):
+    """Conflictos según los filtros de la página / API (desde, hasta, perfil). Lanza ValueError si son inválidos"""
+    desde = request.GET.get('desde')
+    hasta = request.GET.get('hasta')
+    perfil_id = request.GET.get('perfil')
+    desde = date.fromisoformat(desde) if desde else None
+    hasta = date.fromisoformat(hasta) if hasta else None
+
+    recursos_ids = None
+    if perfil_id:
+        recursos_ids = list(Recurso.objects.filter(perfil_id=int(perfil_id)).values_list('id', flat=True))
+
+    lista = conflictos.detectar(recursos_ids, desde, hasta)
+    filtros = {
+        'desde': desde.isoformat() if desde else '', 'hasta': hasta.isoformat() if hasta else '',
+        'perfil': int(perfil_id) if perfil_id else '',
+    }
+    return lista, filtros
+
+def conflictos_api(request):
+    """Tramos en que un recurso tiene 2+ tareas abiertas a la vez, con profundidad y días"""
+    try:
+        lista, _ = _buscar_conflictos(request)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'mensaje': 'Parámetros inválidos'}, status=400)
+
+    nombres = _nombres_recursos({c.recurso_id for c in lista})
+    return JsonResponse({
+        'status': 'ok',
+        'conflictos': [
+            {
+                'recurso_id': c.recurso_id,
+                'recurso': nombres.get(c.recurso_id, ''),
+                'desde': c.desde.isoformat(),
+                'hasta': c.hasta.isoformat(),
+                'dias': c.dias,
+                'profundidad': c.profundidad,
+                'tareas': [{'id': str(i.id), 'nombre': i.nombre} for i in c.tareas],
+            }
+            for c in lista
+        ],
+    })
+
+def vista_conflictos(request):
+    """Reporte de doble asignación: cada tramo con tareas cruzadas de un mismo recurso"""
+    try:
+        lista, filtros = _buscar_conflictos(request)
+    except ValueError:
+        messages.error(request, "Filtros inválidos.")
+        return redirect('conflictos')
+
+    pagina = Paginator(lista, CONFLICTOS_POR_PAGINA).get_page(request.GET.get('page'))
+    nombres = _nombres_recursos({c.recurso_id for c in pagina.object_list})
+    return render(request, 'proyectos/conflictos.html', _contexto_conflictos(lista, filtros, pagina, nombres, Perfil.objects.all()))
+
+def _nombres_recursos(ids):
+    return dict(Recurso.objects.filter(id__in=ids).values_list('id', 'nombre'))
+
+def _contexto_conflictos(lista, filtros, pagina, nombres, perfiles):
+    return {
+        'conflictos': [{'conflicto': c, 'recurso': nombres.get(c.recurso_id, '')} for c in pagina.object_list],
+        'total': len(lista),
+        'recursos_afectados': len({c.recurso_id for c in lista}),
+        'pagina': pagina,
+        'perfiles': perfiles,
+        'filtros': filtros,
+    }
+
+def lista_proyectos(request):
+    # El avance, los conteos y las fechas vienen ya calculados en el Proyecto (ver agregados.py):
+    # el listado no carga ninguna tarea. La tabla de tareas se pide al expandir cada proyecto.
+    # Las atrasadas dependen del día, así que se cuentan en vivo en la misma consulta (como en tablero.py)
+    hoy = timezone.localdate()
+    proyectos = Proyecto.objects.annotate(
+        tareas_atrasadas=Count('tareas', filter=Q(tareas__progreso__lt=100, tareas__fecha_fin__lt=hoy))
+    )
     return render(request, 'proyectos/lista_proyectos.html', {'proyectos': proyectos})
 
+def tareas_proyecto(request, proyecto_id):
+    """Tabla de tareas de UN proyecto (fragmento HTML que se carga al expandirlo en el listado)"""
+    proyecto = get_object_or_404(Proyecto, id=proyecto_id)
+    tareas = proyecto.tareas.con_estado().select_related('asignado_a').order_by('fecha_inicio', 'id')
+    # ?estado=ATRASADO,EN_CURSO filtra en la base de datos
+    estados = [e for e in request.GET.get('estado', '').split(',') if e]
+    if estados:
+        tareas = tareas.filter(estado__in=estados)
+    return render(request, 'proyectos/_tareas_proyecto.html', {'tareas': tareas})
+
+# Agrupaciones de /api/estados/: campos del GROUP BY
+AGRUPACIONES_ESTADO = {
+    'proyecto': ('proyecto', 'proyecto__nombre'),
+    'recurso': ('asignado_a', 'asignado_a__nombre'),
+    'centro_costo': ('proyecto__centro_costo',),
+    'unidad_negocio': ('proyecto__unidad_negocio',),
+}
+
+def estados_api(request):
+    """
+    Cantidad de tareas por estado (total, completado, atrasado, en_curso, iniciando, pendiente),
+    en una sola consulta. ?agrupar=proyecto|recurso|centro_costo|unidad_negocio da una fila por grupo;
+    ?proyecto=, ?recurso= y ?centro_costo= acotan las tareas.
+    """
+    try:
+        tareas, agrupar = _filtros_estados(request)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'mensaje': 'Parámetros inválidos'}, status=400)
+
+    if not agrupar:
+        return JsonResponse({'status': 'ok', 'estados': tareas.conteo_estados()})
+    return JsonResponse({'status': 'ok', 'agrupar': agrupar,
+                         'grupos': list(tareas.conteo_estados(*AGRUPACIONES_ESTADO[agrupar]))})
+
+def _filtros_estados(request):
+    """Tareas acotadas por los filtros de estados_api y la agrupación pedida (ValueError si no son válidos)"""
+    agrupar = request.GET.get('agrupar')
+    if agrupar and agrupar not in AGRUPACIONES_ESTADO:
+        raise ValueError(agrupar)
+    filtros = {campo: int(request.GET[parametro]) for parametro, campo in
+               (('proyecto', 'proyecto_id'), ('recurso', 'asignado_a_id')) if request.GET.get(parametro)}
+    if request.GET.get('centro_costo'):
+        filtros['proyecto__centro_costo'] = request.GET['centro_costo']
+    return Tarea.objects.filter(**filtros), agrupar
+
 def reporte_recurso(request):
-    recursos = Recurso.objects.all()
-    
     # Filtros recibidos
     recurso_id = request.GET.get('recurso')
     fecha_inicio = request.GET.get('fecha_inicio')
@@ -302,108 +740,19 @@ def reporte_recurso(request):
         else:
             recursos_filtrados = [] # Al entrar por primera vez, no mostramos nada
 
-    datos_reporte = []
-
-    # 2. Procesamos la información para cada recurso encontrado
-    for recurso in recursos_filtrados:
-        tareas = Tarea.objects.filter(asignado_a=recurso).order_by('-fecha_fin')
-        
-        if fecha_inicio:
-            tareas = tareas.filter(fecha_inicio__gte=fecha_inicio)
-        if fecha_fin:
-            tareas = tareas.filter(fecha_fin__lte=fecha_fin)
-            
-        # Estadísticas
-        total_tareas = tareas.count()
-        completadas = tareas.filter(progreso=100).count()
-        pendientes = total_tareas - completadas
-        rendimiento = round((completadas / total_tareas * 100), 1) if total_tareas > 0 else 0
-        
-        datos_reporte.append({
-            'recurso': recurso,
-            'tareas': tareas,
-            'stats': {
-                'total': total_tareas,
-                'completadas': completadas,
-                'pendientes': pendientes,
-                'rendimiento': rendimiento
-            }
-        })
-
-    # ... (código anterior en views.py) ...
-
     # --- LÓGICA DE EXCEL ---
-    if exportar_excel and datos_reporte:
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Reporte de Recursos"
-
-        # Estilos para el Excel
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="0d6efd", end_color="0d6efd", fill_type="solid")
-        
-        # Encabezados
-        headers = ['Ingeniero/Recurso', 'Cargo/Perfil', 'Proyecto', 'Tarea', 'Inicio', 'Fin', 'Estado', 'Progreso (%)']
-        ws.append(headers)
-
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-
-        # Llenar datos
-        hoy = date.today()
-        for data in datos_reporte:
-            r_nombre = data['recurso'].nombre
-            
-            # --- CORRECCIÓN AQUÍ: DETECCIÓN SEGURA DEL CARGO ---
-            # Intentamos obtener 'cargo', si no existe, intentamos 'perfil', si no, ponemos 'N/A'
-            try:
-                r_cargo = data['recurso'].cargo
-            except AttributeError:
-                try:
-                    # Si tu modelo usa 'perfil' en vez de cargo
-                    r_cargo = str(data['recurso'].perfil) 
-                except AttributeError:
-                    r_cargo = "No especificado"
-            # ---------------------------------------------------
-
-            if not data['tareas']:
-                ws.append([r_nombre, r_cargo, "Sin tareas", "-", "-", "-", "-", "-"])
-                continue
-
-            for t in data['tareas']:
-                estado = "En Curso"
-                if t.progreso == 100: estado = "Finalizado"
-                elif t.fecha_fin < hoy: estado = "Atrasado"
-
-                ws.append([
-                    r_nombre,
-                    r_cargo,
-                    t.proyecto.nombre,
-                    t.nombre,
-                    t.fecha_inicio,
-                    t.fecha_fin,
-                    estado,
-                    t.progreso
-                ])
-
-        # Ajuste de columnas
-        ws.column_dimensions['A'].width = 25
-        ws.column_dimensions['B'].width = 20
-        ws.column_dimensions['C'].width = 25
-        ws.column_dimensions['D'].width = 30
-
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = 'attachment; filename=Reporte_Recursos_RMS.xlsx'
-        wb.save(response)
-        return response
+    # Se genera en streaming desde una sola consulta (ver exportar.py), sin pasar por datos_reporte
+    if exportar_excel and recursos_filtrados.exists():
+        return exportar_reporte_excel(recursos_filtrados, fecha_inicio, fecha_fin)
+
+    # 2. Tareas y estadísticas de cada recurso encontrado (ver reportes.py)
+    datos_reporte = reportes.datos_reporte(recursos_filtrados, fecha_inicio, fecha_fin)
 
     # --- LÓGICA NORMAL (HTML) ---
     contexto = {
-        'recursos': recursos,
+        'seleccion': _elegido('recurso', recurso_id),
         'lista_reportes': datos_reporte, 
         'mostrar_reporte': len(datos_reporte) > 0,
-        'hoy': date.today(),
         'filtros': {
             'recurso': int(recurso_id) if recurso_id else "",
             'fecha_inicio': fecha_inicio,
@@ -411,4 +760,37 @@ def reporte_recurso(request):
         }
     }
 
-    return render(request, 'proyectos/reporte_recurso.html', contexto)
\ No newline at end of file
+    return render(request, 'proyectos/reporte_recurso.html', contexto)
+
+def _trabajo_json(trabajo):
+    datos = reportes.a_json(trabajo)
+    datos['url_estado'] = reverse('estado_reporte_api', args=[trabajo.id])
+    datos['url_descarga'] = reverse('descargar_reporte', args=[trabajo.id]) if trabajo.estado == TrabajoReporte.TERMINADO else None
+    return datos
+
+@require_POST
+def solicitar_reporte_api(request):
+    """
+    Encola el reporte de recursos (formato excel/html, mismos filtros que /reporte/) para el comando
+    procesar_reportes. Si ya hay uno igual en cola o generado y vigente, devuelve ese.
+    """
+    try:
+        trabajo, nuevo = reportes.solicitar(request.POST.get('formato', 'excel'), request.POST, request.user)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'mensaje': 'Parámetros inválidos'}, status=400)
+    return JsonResponse({'status': 'ok', 'nuevo': nuevo, 'trabajo': _trabajo_json(trabajo)}, status=202 if nuevo else 200)
+
+def estado_reporte_api(request, trabajo_id):
+    trabajo = get_object_or_404(TrabajoReporte, id=trabajo_id)
+    return JsonResponse({'status': 'ok', 'trabajo': _trabajo_json(trabajo)})
+
+def descargar_reporte(request, trabajo_id):
+    trabajo = get_object_or_404(TrabajoReporte, id=trabajo_id)
+    if trabajo.estado != TrabajoReporte.TERMINADO or not os.path.exists(reportes.ruta_absoluta(trabajo)):
+        raise Http404("El reporte no está listo o ya venció")
+    return FileResponse(
+        open(reportes.ruta_absoluta(trabajo), 'rb'),
+        as_attachment=True,
+        filename=f"Reporte_Recursos_RMS.{reportes.EXTENSIONES[trabajo.formato]}",
+        content_type=reportes.TIPOS[trabajo.formato],
+    )
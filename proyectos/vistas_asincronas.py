@@ -0,0 +1,171 @@
+"""
+Versiones async de las pantallas que hacen varias consultas independientes entre sí:
+en vez de una tras otra, se lanzan al mismo tiempo con asyncio.gather.
+Las que son una sola consulta del ORM (barras del Gantt, conteo de estados) usan el ORM async.
+
+Se activan con VISTAS_ASINCRONAS = True en settings (ver urls.py) y rinden sirviendo con ASGI
+(uvicorn sistema_recursos.asgi:application). Con WSGI también funcionan, pero sin ganancia.
+La lógica es la de views.py: aquí sólo cambia cómo se reparten las consultas.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import close_old_connections, connection
+from django.http import JsonResponse
+from django.shortcuts import render, redirect
+from django.utils import timezone
+
+from . import tablero
+from . import views
+from .gantt import afilas_gantt
+from rrhh.models import Perfil, Recurso
+from sistema_recursos.instrumentacion import medido
+
+
+def _con_conexion_propia(funcion):
+    """
+    Para los hilos de thread_sensitive=False: cada uno usa su propia conexión, que se cierra al
+    terminar salvo que CONN_MAX_AGE permita reutilizarla (lo mismo que hace Django por petición).
+    """
+    def ejecutar():
+        close_old_connections()
+        try:
+            return funcion()
+        finally:
+            close_old_connections()
+    return ejecutar
+
+
+async def _en_transaccion():
+    return await sync_to_async(lambda: connection.in_atomic_block)()
+
+
+async def en_paralelo(*funciones):
+    """
+    Ejecuta al mismo tiempo funciones síncronas con consultas independientes entre sí, cada una
+    en su hilo y con su conexión, y devuelve sus resultados en el mismo orden.
+    Dentro de una transacción (tests, ATOMIC_REQUESTS) otra conexión no vería los datos sin
+    confirmar: ahí se ejecutan una tras otra en el hilo de la petición.
+    """
+    if await _en_transaccion():
+        return [await sync_to_async(medido(funcion))() for funcion in funciones]
+    return await asyncio.gather(*(
+        sync_to_async(_con_conexion_propia(medido(funcion)), thread_sensitive=False)()
+        for funcion in funciones
+    ))
+
+
+async def en_hilo(funcion, *args, **kwargs):
+    """
+    Código síncrono (ORM, render) fuera del event loop. También en un hilo propio: con
+    thread_sensitive=True todas las peticiones harían cola en el mismo hilo.
+    """
+    resultado, = await en_paralelo(lambda: funcion(*args, **kwargs))
+    return resultado
+
+
+def _lista(queryset):
+    return lambda: list(queryset)
+
+
+async def index(request):
+    # Igual que views.index; si el resumen no está en cache, los proyectos y el total de recursos en paralelo
+    clave = tablero.clave_cache()
+    contexto = await cache.aget(clave)
+    if contexto is None:
+        proyectos, total_recursos = await en_paralelo(tablero.proyectos_con_conteos, Recurso.objects.count)
+        contexto = tablero.armar(proyectos, total_recursos)
+        await cache.aset(clave, contexto, tablero.DURACION)
+    return await en_hilo(render, request, 'proyectos/index.html', contexto)
+
+
+async def ver_recursos(request):
+    hoy = timezone.localdate()
+    perfil_id = request.GET.get('perfil')
+    activo = request.GET.get('activo', '')
+    recursos = views._recursos_filtrados(perfil_id, activo)
+
+    # 1. Total, página pedida y perfiles a la vez (la página se pide antes de saber si existe)
+    try:
+        numero = max(1, int(request.GET.get('page') or 1))
+    except ValueError:
+        numero = 1
+    desde = (numero - 1) * views.RECURSOS_POR_PAGINA
+    total, recursos_pagina, perfiles = await en_paralelo(
+        recursos.count, _lista(recursos[desde:desde + views.RECURSOS_POR_PAGINA]), _lista(Perfil.objects.all())
+    )
+    paginador = Paginator(recursos, views.RECURSOS_POR_PAGINA)
+    paginador.count = total
+    pagina = paginador.get_page(numero)
+    if pagina.number != numero:
+        # Página fuera de rango: get_page devolvió la última
+        recursos_pagina = await en_hilo(list, pagina.object_list)
+
+    # 2. Tareas activas y próximas de los recursos de la página (depende de la página)
+    activas, futuras = await en_hilo(views._tareas_abiertas, [r.id for r in recursos_pagina], hoy)
+
+    contexto = views._contexto_recursos(pagina, recursos_pagina, activas, futuras, perfiles, perfil_id, activo)
+    return await en_hilo(render, request, 'proyectos/recursos.html', contexto)
+
+
+async def vista_capacidad(request):
+    try:
+        p = views._parametros_capacidad(request)
+    except ValueError:
+        await en_hilo(messages.warning, request, "Filtros inválidos: se muestra la ventana por defecto.")
+        return redirect('capacidad')
+
+    mapa, perfiles, centros_costo = await en_paralelo(
+        lambda: views._mapa_capacidad(p), _lista(Perfil.objects.all()), _lista(views._centros_costo())
+    )
+    contexto = views._contexto_capacidad(request, p, mapa, perfiles, centros_costo)
+    return await en_hilo(render, request, 'proyectos/capacidad.html', contexto)
+
+
+async def vista_conflictos(request):
+    try:
+        (lista, filtros), perfiles = await en_paralelo(
+            lambda: views._buscar_conflictos(request), _lista(Perfil.objects.all())
+        )
+    except ValueError:
+        await en_hilo(messages.error, request, "Filtros inválidos.")
+        return redirect('conflictos')
+
+    pagina = Paginator(lista, views.CONFLICTOS_POR_PAGINA).get_page(request.GET.get('page'))
+    nombres = await en_hilo(views._nombres_recursos, {c.recurso_id for c in pagina.object_list})
+    contexto = views._contexto_conflictos(lista, filtros, pagina, nombres, perfiles)
+    return await en_hilo(render, request, 'proyectos/conflictos.html', contexto)
+
+
+async def vista_gantt(request):
+    # Los nombres de lo ya elegido en los buscadores salen del catálogo de autocompletar, a la vez
+    filtros = views._filtros_gantt(request)
+    proyecto, recurso = await en_paralelo(
+        lambda: views._elegido('proyecto', filtros['proyecto']), lambda: views._elegido('recurso', filtros['recurso'])
+    )
+    return await en_hilo(render, request, 'proyectos/gantt.html', views._contexto_gantt(filtros, proyecto, recurso))
+
+
+async def gantt_datos_api(request):
+    try:
+        parametros = views._parametros_gantt(request)
+    except ValueError as error:
+        return JsonResponse({'status': 'error', 'mensaje': str(error)}, status=400)
+
+    filas, siguiente = await afilas_gantt(**parametros)
+    return JsonResponse({'status': 'ok', 'tareas': filas, 'siguiente': siguiente})
+
+
+async def estados_api(request):
+    try:
+        tareas, agrupar = views._filtros_estados(request)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'mensaje': 'Parámetros inválidos'}, status=400)
+
+    if not agrupar:
+        return JsonResponse({'status': 'ok', 'estados': await tareas.aconteo_estados()})
+    grupos = await tareas.aconteo_estados(*views.AGRUPACIONES_ESTADO[agrupar])
+    return JsonResponse({'status': 'ok', 'agrupar': agrupar, 'grupos': grupos})
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Perfil, Recurso, Conocimiento, Habilidad
+from sistema_recursos.admin_rendimiento import PaginadorEstimado
+from .models import Ausencia, Perfil, Recurso, Conocimiento, Habilidad
 
 # 1. Registro simple de Perfiles (Ingeniero, Técnico, etc.)
 admin.site.register(Perfil)
@@ -17,13 +18,33 @@ class HabilidadInline(admin.TabularInline):
     extra = 1  # Muestra una fila vacía lista para llenar
     autocomplete_fields = ['conocimiento'] # Permite buscar el conocimiento escribiendo
 
+# Vacaciones, licencias, etc. del empleado: en esos días no se le busca hueco y cuentan en su carga
+class AusenciaInline(admin.TabularInline):
+    model = Ausencia
+    extra = 0
+
 # 4. Configuración del Recurso (Empleado) + La Matriz
 @admin.register(Recurso)
 class RecursoAdmin(admin.ModelAdmin):
     # Tus columnas originales
     list_display = ('nombre', 'perfil', 'email', 'activo') 
+    list_select_related = ('perfil',)  # el perfil viene en la misma consulta de la lista
     list_filter = ('perfil', 'activo')
     search_fields = ('nombre', 'email')
+
+    # Tablas grandes: conteo estimado y sin el segundo COUNT(*) del total sin filtrar
+    paginator = PaginadorEstimado
+    show_full_result_count = False
     
     # ESTA LÍNEA ES LA CLAVE: Inserta la tabla de habilidades aquí
-    inlines = [HabilidadInline]
\ No newline at end of file
+    inlines = [HabilidadInline, AusenciaInline]
+
+# 5. Ausencias de todo el personal (para cargarlas o revisarlas por fecha)
+@admin.register(Ausencia)
+class AusenciaAdmin(admin.ModelAdmin):
+    list_display = ('recurso', 'motivo', 'desde', 'hasta')
+    list_select_related = ('recurso__perfil',)
+    list_filter = ('motivo',)
+    search_fields = ('recurso__nombre',)
+    date_hierarchy = 'desde'
+    autocomplete_fields = ['recurso']
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class RrhhConfig(AppConfig):
     name = 'rrhh'
+
+    def ready(self):
+        # Conecta los receptores de señales (matriz de habilidades, etc.)
+        from . import signals  # noqa: F401
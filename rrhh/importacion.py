@@ -0,0 +1,246 @@
+import csv
+import io
+import os
+
+from django.db import transaction
+from openpyxl import load_workbook
+
+from .matriz import matriz
+from .models import Recurso, Conocimiento, Habilidad
+
+LOTE = 2000
+
+# Avisos que se guardan como máximo (el resto sólo se cuenta)
+MAX_AVISOS = 500
+
+NIVELES_VALIDOS = {nivel for nivel, _ in Habilidad.NIVELES}
+
+
+class ErrorImportacion(Exception):
+    """Archivo que no se puede importar (formato desconocido, vacío, sin columnas reconocibles)"""
+
+
+def clave_nombre(texto):
+    """Nombre normalizado para comparar: sin espacios repetidos y sin distinguir mayúsculas"""
+    return ' '.join(str(texto).split()).casefold()
+
+
+def leer_filas(archivo, nombre, hoja=None):
+    """
+    Tuplas de valores de un .xlsx (openpyxl en modo read_only) o un .csv, fila por fila,
+    sin cargar el archivo entero. 'archivo' es un archivo binario abierto.
+    """
+    extension = os.path.splitext(nombre)[1].lower()
+
+    if extension in ('.xlsx', '.xlsm'):
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+        try:
+            if hoja and hoja not in libro.sheetnames:
+                raise ErrorImportacion(f"El libro no tiene la hoja '{hoja}'")
+            yield from (libro[hoja] if hoja else libro.active).iter_rows(values_only=True)
+        finally:
+            libro.close()
+
+    elif extension in ('.csv', '.txt'):
+        texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+        try:
+            muestra = texto.read(4096)
+            texto.seek(0)
+            try:
+                dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+            except csv.Error:
+                dialecto = csv.excel
+            yield from csv.reader(texto, dialecto)
+        finally:
+            texto.detach()
+
+    else:
+        raise ErrorImportacion(f"Formato no soportado: '{extension or nombre}' (use .xlsx o .csv)")
+
+
+class ResultadoImportacion:
+    """Diferencia entre el archivo y la Matriz de Habilidades actual"""
+
+    def __init__(self):
+        self.nuevas = []       # (recurso_id, conocimiento_id, nivel)
+        self.cambiadas = []    # (recurso_id, conocimiento_id, nivel_anterior, nivel)
+        self.eliminadas = []   # (habilidad_id, recurso_id, conocimiento_id, nivel_anterior)
+        self.sin_cambios = 0
+        self.filas = 0
+        self.celdas = 0
+        self.avisos = []
+        self.total_avisos = 0
+        self.recursos = {}       # id -> nombre, sólo los que aparecen en el archivo
+        self.conocimientos = {}  # id -> nombre
+        self.aplicado = False
+
+    def avisar(self, mensaje):
+        self.total_avisos += 1
+        if len(self.avisos) < MAX_AVISOS:
+            self.avisos.append(mensaje)
+
+    @property
+    def hay_cambios(self):
+        return bool(self.nuevas or self.cambiadas or self.eliminadas)
+
+    def detalle(self, limite=None):
+        """Cambios legibles (para la vista previa): dicts con recurso, conocimiento, antes y despues"""
+        cambios = (
+            [(r, c, None, n) for r, c, n in self.nuevas]
+            + [(r, c, antes, n) for r, c, antes, n in self.cambiadas]
+            + [(r, c, antes, None) for _, r, c, antes in self.eliminadas]
+        )
+        for recurso_id, conocimiento_id, antes, despues in cambios[:limite]:
+            yield {
+                'recurso': self.recursos[recurso_id],
+                'conocimiento': self.conocimientos[conocimiento_id],
+                'antes': antes,
+                'despues': despues,
+            }
+
+
+def mapas_recursos():
+    """{email o nombre normalizado: id}; los nombres repetidos quedan como None (ambiguos)"""
+    por_email, por_nombre, nombres = {}, {}, {}
+    for rid, nombre, email in Recurso.objects.values_list('id', 'nombre', 'email'):
+        nombres[rid] = nombre
+        if email:
+            por_email[clave_nombre(email)] = rid
+        clave = clave_nombre(nombre)
+        por_nombre[clave] = None if clave in por_nombre else rid
+    return por_email, por_nombre, nombres
+
+
+def mapa_conocimientos():
+    """{nombre normalizado: id}, aceptando también 'Categoría - Nombre' (como se muestra en el admin)"""
+    mapa, nombres = {}, {}
+    for cid, nombre, categoria in Conocimiento.objects.values_list('id', 'nombre', 'categoria'):
+        nombres[cid] = nombre
+        mapa[clave_nombre(nombre)] = cid
+        if categoria:
+            mapa.setdefault(clave_nombre(f"{categoria} - {nombre}"), cid)
+    return mapa, nombres
+
+
+def _leer_nivel(valor):
+    """None si la celda está vacía (no se toca), 0 para quitar la habilidad, 1-5 para fijar el nivel"""
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        return None
+    try:
+        numero = float(str(valor).strip().replace(',', '.'))
+    except ValueError:
+        raise ValueError(valor)
+    nivel = int(numero)
+    if nivel != numero or (nivel and nivel not in NIVELES_VALIDOS):
+        raise ValueError(valor)
+    return nivel
+
+
+def analizar(filas):
+    """
+    Compara una matriz ancha (1ª columna: recurso por email o nombre; encabezados: conocimientos;
+    celdas: nivel 1-5, 0 para quitar, vacío para no tocar) con la base de datos.
+    Nombres resueltos con mapas en memoria; habilidades actuales leídas en lotes. No escribe nada.
+    """
+    filas = iter(filas)
+    encabezado = next(filas, None)
+    if not encabezado or len(encabezado) < 2:
+        raise ErrorImportacion("El archivo está vacío o no tiene columnas de conocimientos")
+
+    resultado = ResultadoImportacion()
+    conocimientos_por_nombre, nombres_conocimientos = mapa_conocimientos()
+
+    columnas = []
+    for j, titulo in enumerate(encabezado[1:], 1):
+        if titulo is None or not str(titulo).strip():
+            continue
+        cid = conocimientos_por_nombre.get(clave_nombre(titulo))
+        if cid is None:
+            resultado.avisar(f"Columna '{titulo}': conocimiento inexistente, se ignora")
+            continue
+        columnas.append((j, cid, titulo))
+        resultado.conocimientos[cid] = nombres_conocimientos[cid]
+    if not columnas:
+        raise ErrorImportacion("Ninguna columna corresponde a un conocimiento registrado")
+
+    por_email, por_nombre, nombres_recursos = mapas_recursos()
+    deseadas = {}  # (recurso_id, conocimiento_id) -> nivel (0 = quitar)
+    vistos = set()
+
+    for numero, fila in enumerate(filas, 2):
+        if not fila or fila[0] is None or not str(fila[0]).strip():
+            continue
+        resultado.filas += 1
+        clave = clave_nombre(fila[0])
+        rid = por_email.get(clave) if '@' in clave else por_nombre.get(clave)
+        if rid is None:
+            motivo = "nombre repetido, use el email" if clave in por_nombre else "recurso inexistente"
+            resultado.avisar(f"Fila {numero} '{fila[0]}': {motivo}, se ignora")
+            continue
+        if rid in vistos:
+            resultado.avisar(f"Fila {numero} '{fila[0]}': recurso repetido, sus celdas reemplazan a las anteriores")
+        vistos.add(rid)
+        resultado.recursos[rid] = nombres_recursos[rid]
+
+        for j, cid, titulo in columnas:
+            try:
+                nivel = _leer_nivel(fila[j] if j < len(fila) else None)
+            except ValueError:
+                resultado.avisar(f"Fila {numero}, '{titulo}': nivel '{fila[j]}' no válido (1 a 5, 0 para quitar)")
+                continue
+            if nivel is not None:
+                resultado.celdas += 1
+                deseadas[(rid, cid)] = nivel
+
+    # Habilidades actuales de los recursos del archivo, en lotes para no pasar el límite de parámetros
+    actuales = {}
+    recursos_ids = list(vistos)
+    for i in range(0, len(recursos_ids), LOTE):
+        habilidades = Habilidad.objects.filter(recurso_id__in=recursos_ids[i:i + LOTE]).values_list(
+            'id', 'recurso_id', 'conocimiento_id', 'nivel'
+        )
+        for hid, rid, cid, nivel in habilidades.iterator(chunk_size=LOTE):
+            actuales[(rid, cid)] = (hid, nivel)
+
+    for (rid, cid), nivel in deseadas.items():
+        actual = actuales.get((rid, cid))
+        if actual is None:
+            if nivel:
+                resultado.nuevas.append((rid, cid, nivel))
+        elif nivel == 0:
+            resultado.eliminadas.append((actual[0], rid, cid, actual[1]))
+        elif nivel != actual[1]:
+            resultado.cambiadas.append((rid, cid, actual[1], nivel))
+        else:
+            resultado.sin_cambios += 1
+
+    return resultado
+
+
+def aplicar(resultado):
+    """Escribe la diferencia: upsert en lotes (bulk_create con update_conflicts) y borrado por id"""
+    with transaction.atomic():
+        habilidades = [Habilidad(recurso_id=r, conocimiento_id=c, nivel=n) for r, c, n in resultado.nuevas]
+        habilidades += [Habilidad(recurso_id=r, conocimiento_id=c, nivel=n) for r, c, _, n in resultado.cambiadas]
+        Habilidad.objects.bulk_create(
+            habilidades, batch_size=LOTE,
+            update_conflicts=True, unique_fields=['recurso', 'conocimiento'], update_fields=['nivel'],
+        )
+
+        ids = [hid for hid, *_ in resultado.eliminadas]
+        for i in range(0, len(ids), LOTE):
+            Habilidad.objects.filter(id__in=ids[i:i + LOTE]).delete()
+
+        # bulk_create no dispara señales: la matriz en memoria se recarga completa
+        transaction.on_commit(matriz.invalidar)
+
+    resultado.aplicado = True
+    return resultado
+
+
+def importar(archivo, nombre, hoja=None, simular=False):
+    """Lee el archivo, calcula la diferencia y (salvo en simulación) la aplica"""
+    resultado = analizar(leer_filas(archivo, nombre, hoja))
+    if not simular and resultado.hay_cambios:
+        aplicar(resultado)
+    return resultado
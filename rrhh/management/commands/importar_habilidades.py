@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rrhh.importacion import ErrorImportacion, importar
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga la Matriz de Habilidades desde un .xlsx o .csv ancho: una fila por recurso (email o nombre "
+        "en la 1ª columna), una columna por conocimiento y el nivel (1-5, 0 para quitar) en cada celda. "
+        "Ej: python manage.py importar_habilidades matriz.xlsx --simular"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument('--hoja', help="Hoja del libro Excel (por defecto, la activa)")
+        parser.add_argument('--simular', action='store_true', help="Sólo muestra la diferencia, no guarda nada")
+        parser.add_argument('--detalle', type=int, default=20, help="Cuántos cambios listar (0 = ninguno)")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar(archivo, options['archivo'], hoja=options['hoja'], simular=options['simular'])
+        except OSError as e:
+            raise CommandError(f"No se pudo leer {options['archivo']}: {e}")
+        except ErrorImportacion as e:
+            raise CommandError(str(e))
+
+        for aviso in resultado.avisos:
+            self.stderr.write(f"  ! {aviso}")
+        if resultado.total_avisos > len(resultado.avisos):
+            self.stderr.write(f"  ! ... y {resultado.total_avisos - len(resultado.avisos)} avisos más")
+
+        for cambio in resultado.detalle(options['detalle']):
+            antes = cambio['antes'] or '-'
+            despues = cambio['despues'] or 'quitar'
+            self.stdout.write(f"  {cambio['recurso']} / {cambio['conocimiento']}: {antes} -> {despues}")
+
+        resumen = (
+            f"{resultado.filas} filas, {resultado.celdas} celdas: {len(resultado.nuevas)} nuevas, "
+            f"{len(resultado.cambiadas)} cambiadas, {len(resultado.eliminadas)} quitadas, "
+            f"{resultado.sin_cambios} sin cambios ({time.perf_counter() - inicio:.1f} s)."
+        )
+        if options['simular']:
+            self.stdout.write(self.style.WARNING(f"Simulación, no se guardó nada. {resumen}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Matriz actualizada. {resumen}"))
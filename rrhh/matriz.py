@@ -0,0 +1,162 @@
+import threading
+import time
+
+import numpy as np
+from django.core.cache import cache
+
+CLAVE_VERSION = 'matriz_habilidades:version'
+
+# Cada cuántos segundos se revisa si otro proceso modificó la matriz
+INTERVALO_VERIFICACION = 1.0
+
+
+class MatrizHabilidades:
+    """
+    Representación densa (NumPy) de la Matriz de Habilidades: una fila por Recurso,
+    una columna por Conocimiento y el nivel (0 = no lo tiene) en cada celda.
+    Se carga una vez por proceso y se mantiene con las señales de Habilidad/Recurso/Conocimiento.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._niveles = None
+        self._version = None
+        self._verificado = 0.0
+
+    # --- CONSTRUCCIÓN Y MANTENIMIENTO ---
+
+    def _cargar(self):
+        from .models import Recurso, Conocimiento, Habilidad
+
+        recursos = list(Recurso.objects.order_by('id').values_list('id', 'activo'))
+        conocimientos = list(Conocimiento.objects.order_by('id').values_list('id', flat=True))
+
+        self.recursos_ids = np.array([r[0] for r in recursos], dtype=np.int64)
+        self.activos = np.array([r[1] for r in recursos], dtype=bool)
+        self._fila = {rid: i for i, rid in enumerate(self.recursos_ids.tolist())}
+        self._columna = {cid: j for j, cid in enumerate(conocimientos)}
+
+        niveles = np.zeros((len(recursos), len(conocimientos)), dtype=np.int8)
+        habilidades = Habilidad.objects.values_list('recurso_id', 'conocimiento_id', 'nivel')
+        filas, columnas, valores = [], [], []
+        for recurso_id, conocimiento_id, nivel in habilidades.iterator(chunk_size=10000):
+            filas.append(self._fila[recurso_id])
+            columnas.append(self._columna[conocimiento_id])
+            valores.append(nivel)
+        niveles[filas, columnas] = valores
+        self._niveles = niveles
+
+    def _asegurar(self):
+        ahora = time.monotonic()
+        if self._niveles is not None and ahora - self._verificado < INTERVALO_VERIFICACION:
+            return
+        version = cache.get(CLAVE_VERSION)
+        with self._lock:
+            if self._niveles is None or version != self._version:
+                self._cargar()
+                self._version = version
+            self._verificado = ahora
+
+    def _marcar_cambio(self):
+        try:
+            return cache.incr(CLAVE_VERSION)
+        except ValueError:
+            cache.set(CLAVE_VERSION, 1, None)
+            return 1
+
+    def actualizar(self, recurso_id, conocimiento_id, nivel):
+        """Escribe una celda (nivel 0 = eliminar). Si la fila o columna es nueva, recarga todo."""
+        version_previa = cache.get(CLAVE_VERSION)
+        with self._lock:
+            nueva = self._marcar_cambio()
+            if self._niveles is None:
+                return
+            fila = self._fila.get(recurso_id)
+            columna = self._columna.get(conocimiento_id)
+            if fila is None or columna is None:
+                self._niveles = None
+                return
+            self._niveles[fila, columna] = nivel
+            if self._version == version_previa:
+                self._version = nueva
+
+    def invalidar(self):
+        """Fuerza una recarga completa (altas/bajas de Recurso o Conocimiento)"""
+        with self._lock:
+            self._niveles = None
+            self._marcar_cambio()
+
+    # --- CONSULTAS VECTORIZADAS ---
+
+    def _columnas(self, conocimientos_ids):
+        # Un conocimiento que nadie tiene cargado todavía no tiene columna: cuenta como nivel 0
+        return [self._columna.get(cid, -1) for cid in conocimientos_ids]
+
+    def _submatriz(self, filas, conocimientos_ids):
+        columnas = self._columnas(conocimientos_ids)
+        sub = np.zeros((len(filas), len(columnas)), dtype=np.int8)
+        for j, columna in enumerate(columnas):
+            if columna >= 0:
+                sub[:, j] = self._niveles[filas, columna]
+        return sub
+
+    def _filas(self, recursos_ids=None, solo_activos=False):
+        if recursos_ids is None:
+            filas = np.arange(len(self.recursos_ids))
+        else:
+            filas = np.array([self._fila[rid] for rid in recursos_ids if rid in self._fila], dtype=np.int64)
+        if solo_activos:
+            filas = filas[self.activos[filas]]
+        return filas
+
+    def niveles(self, recursos_ids, conocimientos_ids):
+        """Submatriz de niveles (recursos x conocimientos) en el orden pedido"""
+        with self._lock:
+            self._asegurar()
+            filas = np.array([self._fila.get(rid, -1) for rid in recursos_ids], dtype=np.int64)
+            sub = self._submatriz(np.where(filas >= 0, filas, 0), conocimientos_ids)
+            sub[filas < 0] = 0
+            return sub
+
+    @staticmethod
+    def puntaje(niveles):
+        """
+        Match técnico (0-100) por fila: promedio de (nivel / 5) * 100 sobre los requisitos.
+        Se acumula columna a columna para dar exactamente el mismo redondeo que el cálculo original.
+        """
+        cantidad = niveles.shape[1]
+        if cantidad == 0:
+            return np.full(niveles.shape[0], 100, dtype=np.int64)
+        puntos = (niveles / 5) * 100
+        total = np.zeros(niveles.shape[0])
+        for j in range(cantidad):
+            total += puntos[:, j]
+        return np.round(total / cantidad).astype(np.int64)
+
+    def puntajes(self, conocimientos_ids, recursos_ids=None, solo_activos=True):
+        """Devuelve (ids de recurso, match) para todos los recursos contra un set de requisitos"""
+        with self._lock:
+            self._asegurar()
+            filas = self._filas(recursos_ids, solo_activos)
+            return self.recursos_ids[filas], self.puntaje(self._submatriz(filas, conocimientos_ids))
+
+    def top_k(self, conocimientos_ids, k=10, recursos_ids=None, solo_activos=True):
+        """
+        Los K recursos con mejor match, de mayor a menor: lista de (recurso_id, match).
+        A igual match gana el id menor, así el resultado es el mismo en cada llamada y en cada proceso.
+        """
+        ids, puntajes = self.puntajes(conocimientos_ids, recursos_ids, solo_activos)
+        orden = np.lexsort((ids, -puntajes))[:k]
+        return list(zip(ids[orden].tolist(), puntajes[orden].tolist()))
+
+    def cubren(self, conocimientos_ids, nivel_minimo=3, recursos_ids=None, solo_activos=True):
+        """Ids de los recursos que tienen TODOS los conocimientos con nivel >= nivel_minimo"""
+        with self._lock:
+            self._asegurar()
+            filas = self._filas(recursos_ids, solo_activos)
+            sub = self._submatriz(filas, conocimientos_ids)
+            return self.recursos_ids[filas][(sub >= nivel_minimo).all(axis=1)].tolist()
+
+
+# Instancia única por proceso
+matriz = MatrizHabilidades()
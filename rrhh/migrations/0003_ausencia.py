@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rrhh', '0002_conocimiento_habilidad'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ausencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('desde', models.DateField()),
+                ('hasta', models.DateField()),
+                ('motivo', models.CharField(choices=[('VACACIONES', 'Vacaciones'), ('LICENCIA', 'Licencia médica'), ('PERMISO', 'Permiso'), ('CAPACITACION', 'Capacitación')], default='VACACIONES', max_length=20)),
+                ('recurso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ausencias', to='rrhh.recurso')),
+            ],
+            options={
+                'verbose_name': 'Ausencia',
+                'verbose_name_plural': 'Ausencias',
+                'indexes': [models.Index(fields=['recurso', 'hasta', 'desde'], name='ausencia_recurso_fechas_idx')],
+            },
+        ),
+    ]
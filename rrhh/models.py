@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 
 class Perfil(models.Model):
@@ -46,3 +47,32 @@ class Habilidad(models.Model):
 
     def __str__(self):
         return f"{self.recurso} sabe {self.conocimiento} (Nivel {self.nivel})"
+
+class Ausencia(models.Model):
+    # Días en que el recurso no está disponible: cuentan como ocupados en la búsqueda de huecos y en la capacidad
+    MOTIVOS = [
+        ('VACACIONES', 'Vacaciones'),
+        ('LICENCIA', 'Licencia médica'),
+        ('PERMISO', 'Permiso'),
+        ('CAPACITACION', 'Capacitación'),
+    ]
+
+    recurso = models.ForeignKey(Recurso, on_delete=models.CASCADE, related_name='ausencias')
+    desde = models.DateField()
+    hasta = models.DateField()
+    motivo = models.CharField(max_length=20, choices=MOTIVOS, default='VACACIONES')
+
+    class Meta:
+        verbose_name = "Ausencia"
+        verbose_name_plural = "Ausencias"
+        indexes = [
+            # Ausencias de un grupo de recursos que se cruzan con una ventana de fechas
+            models.Index(fields=['recurso', 'hasta', 'desde'], name='ausencia_recurso_fechas_idx'),
+        ]
+
+    def clean(self):
+        if self.desde and self.hasta and self.hasta < self.desde:
+            raise ValidationError({'hasta': "La ausencia termina antes de empezar."})
+
+    def __str__(self):
+        return f"{self.recurso.nombre}: {self.get_motivo_display()} ({self.desde:%d/%m/%Y} - {self.hasta:%d/%m/%Y})"
@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Recurso, Conocimiento, Habilidad
+from .matriz import matriz
+
+
+# --- MATRIZ DE HABILIDADES EN MEMORIA ---
+# Se actualiza recién cuando la transacción se confirma, para no reflejar cambios que se deshacen
+
+@receiver(post_save, sender=Habilidad)
+def habilidad_guardada(sender, instance, created, **kwargs):
+    if created:
+        celda = (instance.recurso_id, instance.conocimiento_id, instance.nivel)
+        transaction.on_commit(lambda: matriz.actualizar(*celda))
+    else:
+        # Una edición puede mover la habilidad a otro recurso/conocimiento: recargamos
+        transaction.on_commit(matriz.invalidar)
+
+
+@receiver(post_delete, sender=Habilidad)
+def habilidad_eliminada(sender, instance, **kwargs):
+    celda = (instance.recurso_id, instance.conocimiento_id, 0)
+    transaction.on_commit(lambda: matriz.actualizar(*celda))
+
+
+@receiver(post_save, sender=Recurso)
+@receiver(post_delete, sender=Recurso)
+@receiver(post_save, sender=Conocimiento)
+@receiver(post_delete, sender=Conocimiento)
+def catalogo_modificado(sender, **kwargs):
+    # Altas, bajas o cambios de 'activo' cambian filas/columnas de la matriz
+    transaction.on_commit(matriz.invalidar)
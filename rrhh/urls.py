@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('habilidades/importar/', views.importar_habilidades, name='importar_habilidades'),
+]
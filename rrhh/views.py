@@ -1,3 +1,86 @@
-from django.shortcuts import render
+import os
+import tempfile
 
-# Create your views here.
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import render, redirect
+
+from .importacion import ErrorImportacion, importar
+
+# Cambios que se muestran en la vista previa (el resumen cuenta todos)
+CAMBIOS_EN_VISTA_PREVIA = 300
+
+CLAVE_SESION = 'importacion_habilidades'
+
+
+def _descartar_pendiente(request):
+    pendiente = request.session.pop(CLAVE_SESION, None)
+    if pendiente and os.path.exists(pendiente['ruta']):
+        os.remove(pendiente['ruta'])
+
+
+@staff_member_required
+def importar_habilidades(request):
+    """
+    Carga masiva de la Matriz de Habilidades en dos pasos: al subir el archivo se muestra la
+    diferencia (simulación); el archivo queda en un temporal hasta que se confirma o se descarta.
+    """
+    contexto = {}
+
+    if request.method == 'POST' and 'confirmar' in request.POST:
+        pendiente = request.session.get(CLAVE_SESION)
+        if not pendiente or not os.path.exists(pendiente['ruta']):
+            messages.error(request, "No hay una importación pendiente: vuelva a subir el archivo.")
+            return redirect('importar_habilidades')
+        try:
+            with open(pendiente['ruta'], 'rb') as archivo:
+                resultado = importar(archivo, pendiente['nombre'], hoja=pendiente['hoja'])
+        except ErrorImportacion as e:
+            messages.error(request, str(e))
+        else:
+            messages.success(
+                request,
+                f"Matriz actualizada: {len(resultado.nuevas)} habilidades nuevas, {len(resultado.cambiadas)} "
+                f"cambiadas y {len(resultado.eliminadas)} quitadas."
+            )
+        _descartar_pendiente(request)
+        return redirect('importar_habilidades')
+
+    if request.method == 'POST' and 'descartar' in request.POST:
+        _descartar_pendiente(request)
+        return redirect('importar_habilidades')
+
+    if request.method == 'POST':
+        subido = request.FILES.get('archivo')
+        if not subido:
+            messages.error(request, "Seleccione un archivo .xlsx o .csv.")
+            return redirect('importar_habilidades')
+
+        _descartar_pendiente(request)
+        extension = os.path.splitext(subido.name)[1].lower()
+        with tempfile.NamedTemporaryFile(prefix='habilidades_', suffix=extension, delete=False) as temporal:
+            for trozo in subido.chunks():
+                temporal.write(trozo)
+        hoja = request.POST.get('hoja', '').strip() or None
+
+        try:
+            with open(temporal.name, 'rb') as archivo:
+                resultado = importar(archivo, subido.name, hoja=hoja, simular=True)
+        except ErrorImportacion as e:
+            os.remove(temporal.name)
+            messages.error(request, str(e))
+            return redirect('importar_habilidades')
+
+        if resultado.hay_cambios:
+            request.session[CLAVE_SESION] = {'ruta': temporal.name, 'nombre': subido.name, 'hoja': hoja}
+        else:
+            os.remove(temporal.name)
+
+        contexto.update({
+            'resultado': resultado,
+            'archivo': subido.name,
+            'cambios': list(resultado.detalle(CAMBIOS_EN_VISTA_PREVIA)),
+            'total_cambios': len(resultado.nuevas) + len(resultado.cambiadas) + len(resultado.eliminadas),
+        })
+
+    return render(request, 'rrhh/importar_habilidades.html', contexto)
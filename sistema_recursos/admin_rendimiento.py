@@ -0,0 +1,80 @@
+"""
+Piezas del admin para tablas grandes (Tarea, Recurso): paginador con conteo estimado
+y filtros de texto en vez de listas con todas las opciones.
+"""
+import json
+
+from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Bajo esta cantidad (estimada) de filas se cuenta exacto: el COUNT es barato y el número queda bien
+UMBRAL_CONTEO_EXACTO = 10000
+
+
+def estimar_filas(queryset):
+    """
+    Filas aproximadas de un queryset sin recorrer la tabla (sólo PostgreSQL, si no devuelve None):
+    sin filtros, pg_class.reltuples (lo mantiene ANALYZE/autovacuum); con filtros, la estimación
+    del planificador (EXPLAIN).
+    """
+    conexion = connections[queryset.db]
+    if conexion.vendor != 'postgresql':
+        return None
+    queryset = queryset.order_by()
+    with conexion.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                           [queryset.model._meta.db_table])
+            fila = cursor.fetchone()
+            # -1: la tabla nunca se analizó
+            return fila[0] if fila and fila[0] >= 0 else None
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class PaginadorEstimado(Paginator):
+    """Paginator cuyo count es la estimación de PostgreSQL cuando la tabla es grande (COUNT(*) exacto si no)"""
+
+    @cached_property
+    def count(self):
+        estimado = estimar_filas(self.object_list)
+        if estimado is None or estimado < UMBRAL_CONTEO_EXACTO:
+            return super().count
+        return estimado
+
+
+class FiltroTexto(admin.SimpleListFilter):
+    """
+    Filtro lateral con un cuadro de texto (para FKs con miles de opciones, que list_filter
+    listaría completas). Las subclases definen title, parameter_name y filtrar().
+    """
+    template = 'admin/filtro_texto.html'
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def filtrar(self, queryset, valor):
+        raise NotImplementedError
+
+    def queryset(self, request, queryset):
+        valor = (self.value() or '').strip()
+        return self.filtrar(queryset, valor) if valor else queryset
+
+    def choices(self, changelist):
+        # Un solo "choice" con lo que necesita el formulario: el valor actual y los demás parámetros
+        yield {
+            'parametro': self.parameter_name,
+            'valor': self.value() or '',
+            'otros': [(k, v) for k, v in changelist.params.items() if k not in (self.parameter_name, PAGE_VAR)],
+            'quitar': changelist.get_query_string(remove=[self.parameter_name]),
+        }
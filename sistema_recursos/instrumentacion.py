@@ -0,0 +1,263 @@
+"""
+Medición por petición: tiempo total, cantidad de consultas SQL, tiempo en SQL y consultas
+repetidas (el mismo SQL con distintos parámetros = sospecha de N+1).
+
+Las muestras se guardan en memoria, por proceso y por vista, en ventanas móviles
+(las últimas MUESTRAS peticiones de cada vista), y se consultan en /estadisticas/ (sólo staff).
+Configuración en settings.INSTRUMENTACION.
+
+En las vistas async (ASGI) las consultas corren en otros hilos, con otras conexiones: se miden
+envolviendo cada función con medido() (ver proyectos/vistas_asincronas.py).
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION = {
+    'ACTIVA': True,
+    'PRESUPUESTO_CONSULTAS': 30,   # advertencia si una vista hace más consultas que esto
+    'PRESUPUESTOS': {},            # por vista: {'reporte_recurso': 5, ...}
+    'UMBRAL_REPETIDAS': 5,         # advertencia si el mismo SQL se repite esta cantidad de veces
+    'MUESTRAS': 1000,              # tamaño de la ventana móvil por vista
+}
+
+# Límites (ms) de los tramos del histograma de latencia
+TRAMOS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+MAX_HUELLAS = 50
+
+
+# Medidor de la petición en curso (para las funciones que la vista async manda a otros hilos)
+_medidor_actual = ContextVar('medidor_actual', default=None)
+
+
+def configuracion():
+    return {**CONFIGURACION, **getattr(settings, 'INSTRUMENTACION', {})}
+
+
+def _conexiones():
+    return connections.all(initialized_only=True) or [connections['default']]
+
+
+class _Medidor:
+    """execute_wrapper de Django: se llama una vez por consulta, así que hace lo mínimo"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_sql = 0.0
+        self.huellas = Counter()
+        # Una vista async puede consultar desde varios hilos a la vez
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            with self._lock:
+                self.tiempo_sql += duracion
+                self.consultas += 1
+                # El SQL ya viene parametrizado (%s): el mismo texto = la misma consulta con otros valores
+                self.huellas[sql] += 1
+
+
+def medido(funcion):
+    """
+    Envuelve una función que se va a ejecutar en otro hilo (sync_to_async) para que sus consultas
+    se cuenten en la petición en curso. Sin petición medida, devuelve la función tal cual.
+    """
+    medidor = _medidor_actual.get()
+    if medidor is None:
+        return funcion
+
+    @wraps(funcion)
+    def envuelta(*args, **kwargs):
+        with ExitStack() as pila:
+            for conexion in _conexiones():
+                # En el hilo de una petición síncrona la conexión ya está envuelta por el middleware
+                if medidor not in conexion.execute_wrappers:
+                    pila.enter_context(conexion.execute_wrapper(medidor))
+            return funcion(*args, **kwargs)
+    return envuelta
+
+
+class _EstadisticasVista:
+    def __init__(self, muestras):
+        self.tiempos = deque(maxlen=muestras)
+        self.consultas = deque(maxlen=muestras)
+        self.tiempos_sql = deque(maxlen=muestras)
+        self.repetidas = Counter()
+        self.excedidas = 0
+        self.total = 0
+
+    def registrar(self, tiempo_ms, medidor, repetidas, excedida):
+        self.tiempos.append(tiempo_ms)
+        self.consultas.append(medidor.consultas)
+        self.tiempos_sql.append(medidor.tiempo_sql * 1000)
+        self.total += 1
+        self.excedidas += excedida
+        for sql, veces in repetidas:
+            self.repetidas[sql[:300]] += veces
+        # Acotamos la memoria: nos quedamos con las huellas más frecuentes
+        if len(self.repetidas) > MAX_HUELLAS * 2:
+            self.repetidas = Counter(dict(self.repetidas.most_common(MAX_HUELLAS)))
+
+    def resumen(self):
+        tiempos = sorted(self.tiempos)
+        histograma = Counter()
+        for t in tiempos:
+            tramo = next((f"<{limite}ms" for limite in TRAMOS_MS if t < limite), f">={TRAMOS_MS[-1]}ms")
+            histograma[tramo] += 1
+        return {
+            'peticiones': self.total,
+            'ventana': len(tiempos),
+            'excedieron_presupuesto': self.excedidas,
+            'latencia_ms': {
+                'p50': _percentil(tiempos, 50), 'p95': _percentil(tiempos, 95),
+                'p99': _percentil(tiempos, 99), 'max': round(tiempos[-1], 2) if tiempos else None,
+            },
+            'histograma_ms': {tramo: histograma[tramo] for tramo in
+                              [f"<{limite}ms" for limite in TRAMOS_MS] + [f">={TRAMOS_MS[-1]}ms"] if histograma[tramo]},
+            'consultas': {'p50': _percentil(sorted(self.consultas), 50), 'max': max(self.consultas, default=None)},
+            'sql_ms': {'p50': _percentil(sorted(self.tiempos_sql), 50), 'p95': _percentil(sorted(self.tiempos_sql), 95)},
+            'repetidas': [{'sql': sql, 'veces': veces} for sql, veces in self.repetidas.most_common(10)],
+        }
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return None
+    return round(ordenados[min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))], 2)
+
+
+class Registro:
+    """Estadísticas de todas las vistas de este proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vistas = {}
+        self.desde = time.time()
+
+    def vista(self, nombre, muestras):
+        estadisticas = self._vistas.get(nombre)
+        if estadisticas is None:
+            with self._lock:
+                estadisticas = self._vistas.setdefault(nombre, _EstadisticasVista(muestras))
+        return estadisticas
+
+    def resumen(self):
+        with self._lock:
+            vistas = dict(self._vistas)
+        return {nombre: vistas[nombre].resumen() for nombre in sorted(vistas)}
+
+    def reiniciar(self):
+        with self._lock:
+            self._vistas = {}
+            self.desde = time.time()
+
+
+registro = Registro()
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide cada petición envolviendo las consultas de todas las conexiones con execute_wrapper.
+    Funciona en WSGI y en ASGI (para no obligar a Django a pasar las vistas async a síncronas).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+
+        config = configuracion()
+        if not config['ACTIVA']:
+            return self.get_response(request)
+
+        medidor = _Medidor()
+        token = _medidor_actual.set(medidor)
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as pila:
+                for conexion in _conexiones():
+                    pila.enter_context(conexion.execute_wrapper(medidor))
+                response = self.get_response(request)
+        finally:
+            _medidor_actual.reset(token)
+        self._registrar(config, self._nombre(request), request, (time.perf_counter() - inicio) * 1000, medidor)
+        return response
+
+    async def __acall__(self, request):
+        config = configuracion()
+        if not config['ACTIVA']:
+            return await self.get_response(request)
+
+        # Las conexiones de este hilo no son las que usan las consultas: cuentan las envueltas con medido()
+        medidor = _Medidor()
+        token = _medidor_actual.set(medidor)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medidor_actual.reset(token)
+        self._registrar(config, self._nombre(request), request, (time.perf_counter() - inicio) * 1000, medidor)
+        return response
+
+    @staticmethod
+    def _nombre(request):
+        coincidencia = getattr(request, 'resolver_match', None)
+        return coincidencia.view_name if coincidencia else 'sin_ruta'
+
+    def _registrar(self, config, nombre, request, tiempo_ms, medidor):
+        presupuesto = config['PRESUPUESTOS'].get(nombre, config['PRESUPUESTO_CONSULTAS'])
+        excedida = medidor.consultas > presupuesto
+        repetidas = [(sql, veces) for sql, veces in medidor.huellas.items() if veces >= config['UMBRAL_REPETIDAS']]
+
+        registro.vista(nombre, config['MUESTRAS']).registrar(tiempo_ms, medidor, repetidas, excedida)
+
+        if excedida:
+            logger.warning(
+                "%s (%s) hizo %d consultas (presupuesto %d) en %.0f ms, %.0f ms en SQL",
+                nombre, request.path, medidor.consultas, presupuesto, tiempo_ms, medidor.tiempo_sql * 1000,
+            )
+        for sql, veces in repetidas:
+            logger.warning("%s (%s) repitió %d veces la misma consulta (posible N+1): %s",
+                           nombre, request.path, veces, sql[:300])
+
+
+@staff_member_required
+@require_http_methods(['GET', 'POST'])
+def estadisticas_api(request):
+    """
+    Histogramas móviles por vista de ESTE proceso. Un POST (con token CSRF) los vacía y devuelve
+    el registro recién reiniciado: un GET nunca borra nada (prefetch del navegador, crawlers).
+    """
+    if request.method == 'POST':
+        registro.reiniciar()
+    return JsonResponse({
+        'proceso': os.getpid(),
+        'desde': registro.desde,
+        'configuracion': {k: v for k, v in configuracion().items() if k != 'PRESUPUESTOS'},
+        'vistas': registro.resumen(),
+    }, json_dumps_params={'ensure_ascii': False})
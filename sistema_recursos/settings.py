@@ -47,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero, para que el tiempo medido incluya a todos los demás
+    'sistema_recursos.instrumentacion.InstrumentacionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,7 +63,7 @@ ROOT_URLCONF = 'sistema_recursos.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -90,12 +92,15 @@ DATABASES = {
     }
 }
 
-#DATABASES = {
-#    'default': {
-#        'ENGINE': 'django.db.backends.sqlite3',
-#        'NAME': BASE_DIR / 'db.sqlite3',
-#    }
-#}
+# DB_ENGINE=sqlite en el .env: base local en un archivo, para trabajar sin PostgreSQL
+# (tests, generar_datos y benchmark funcionan igual)
+if os.getenv('DB_ENGINE') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME') or BASE_DIR / 'db.sqlite3',
+        }
+    }
 
 
 # Password validation
@@ -136,4 +141,74 @@ STATIC_URL = 'static/'
 
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
-]
\ No newline at end of file
+]
+
+# Archivos generados (reportes en segundo plano)
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Planificación
+# Cache COMPARTIDO entre procesos. Los índices en memoria (ocupación, matriz de habilidades,
+# autocompletar, calendario) se invalidan subiendo una versión guardada aquí, y aquí quedan el
+# tablero y la ruta crítica: los workers web, los comandos (importar_*, cargar_feriados,
+# generar_datos...) y procesar_reportes tienen que ver el mismo cache, o cada uno sigue con sus
+# datos viejos hasta reiniciarse. Con REDIS_URL se usa Redis; si no, una tabla de la base de datos
+# (crearla una vez con: python manage.py createcachetable).
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cache_sistema',
+        }
+    }
+
+# Antes de asignar o mover una tarea se revisa que el responsable no quede con tareas cruzadas
+# (el usuario puede forzar el cambio). En False se guarda sin revisar.
+VERIFICAR_CONFLICTOS = True
+
+# Versiones async de las pantallas con varias consultas independientes (proyectos/vistas_asincronas.py).
+# Sólo tiene sentido sirviendo con ASGI: uvicorn sistema_recursos.asgi:application
+VISTAS_ASINCRONAS = os.getenv('VISTAS_ASINCRONAS') == '1'
+
+# Calendario laboral (proyectos/calendario.py): días hábiles de la semana, de lunes a domingo
+# (weekmask de NumPy). Los feriados se cargan en la tabla Feriado: python manage.py cargar_feriados
+CALENDARIO = {
+    'SEMANA_LABORAL': '1111100',
+}
+
+# Reportes en segundo plano (proyectos/reportes.py, comando procesar_reportes): cuánto se reutiliza
+# un archivo generado, cuántos recursos por parte y cuántos procesos las generan
+REPORTES = {
+    'VIGENCIA': 60 * 60,
+    'RECURSOS_POR_PARTE': 200,
+    'PROCESOS': None,
+}
+
+# Instrumentación (sistema_recursos/instrumentacion.py): tiempo y consultas SQL por vista,
+# visibles para staff en /estadisticas/. Se advierte en el log cuando una vista supera su
+# presupuesto de consultas o repite la misma consulta UMBRAL_REPETIDAS veces (posible N+1).
+INSTRUMENTACION = {
+    'ACTIVA': True,
+    'PRESUPUESTO_CONSULTAS': 30,
+    'PRESUPUESTOS': {},
+    'UMBRAL_REPETIDAS': 5,
+    'MUESTRAS': 1000,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'consola': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'sistema_recursos.instrumentacion': {'handlers': ['consola'], 'level': 'WARNING', 'propagate': False},
+        'proyectos.reportes': {'handlers': ['consola'], 'level': 'WARNING', 'propagate': False},
+    },
+}
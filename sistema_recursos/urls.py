@@ -4,8 +4,16 @@ URL configuration for sistema_recursos project.
 from django.contrib import admin
 from django.urls import path, include 
 
+from . import instrumentacion
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+
+    # Tiempos y consultas por vista (sólo staff)
+    path('estadisticas/', instrumentacion.estadisticas_api, name='estadisticas'),
+
+    # Carga masiva de RRHH (sólo staff)
+    path('rrhh/', include('rrhh.urls')),
     
     # Esta es la ÚNICA línea necesaria para tu app.
     # Dice: "Cualquier cosa que llegue (incluso vacía), mándala a proyectos.urls"
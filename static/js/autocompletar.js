@@ -0,0 +1,132 @@
+/*
+ * Buscador con autocompletar para los filtros (reemplaza a los <select> con cientos de opciones).
+ *
+ * <div class="autocompletar" data-tipo="recurso" data-enviar="1">
+ *     <input type="hidden" name="recurso" value="{{ id }}">
+ *     <input type="search" class="form-control" value="{{ nombre }}" placeholder="...">
+ * </div>
+ *
+ * data-tipo: recurso | proyecto | conocimiento (ver /api/autocompletar/<tipo>/)
+ * data-enviar: envía el formulario al elegir o al vaciar el buscador
+ * data-parametros: parámetros extra para la API, por ejemplo "activos=1"
+ */
+(function () {
+    const ESPERA_MS = 150;
+    const URL_BASE = '/api/autocompletar/';
+
+    function iniciar(contenedor) {
+        const oculto = contenedor.querySelector('input[type=hidden]');
+        const texto = contenedor.querySelector('input:not([type=hidden])');
+        const enviar = contenedor.dataset.enviar === '1';
+        const extra = contenedor.dataset.parametros || '';
+
+        contenedor.classList.add('position-relative');
+        texto.setAttribute('autocomplete', 'off');
+        const lista = document.createElement('div');
+        lista.className = 'list-group position-absolute w-100 shadow-sm d-none';
+        lista.style.zIndex = 1050;
+        lista.style.maxHeight = '320px';
+        lista.style.overflowY = 'auto';
+        contenedor.appendChild(lista);
+
+        let temporizador = null;
+        let peticion = null;
+        let activo = -1;
+        let elegido = texto.value;
+
+        function cerrar() {
+            lista.classList.add('d-none');
+            activo = -1;
+        }
+
+        function elegir(entrada) {
+            oculto.value = entrada ? entrada.id : '';
+            texto.value = entrada ? entrada.nombre : '';
+            elegido = texto.value;
+            cerrar();
+            if (enviar && texto.form) texto.form.submit();
+        }
+
+        function marcar(indice) {
+            const opciones = lista.querySelectorAll('.list-group-item');
+            if (!opciones.length) return;
+            activo = (indice + opciones.length) % opciones.length;
+            opciones.forEach((o, i) => o.classList.toggle('active', i === activo));
+            opciones[activo].scrollIntoView({block: 'nearest'});
+        }
+
+        function mostrar(resultados) {
+            lista.innerHTML = '';
+            if (!resultados.length) {
+                lista.innerHTML = '<div class="list-group-item small text-muted">Sin coincidencias</div>';
+            }
+            resultados.forEach(entrada => {
+                const opcion = document.createElement('button');
+                opcion.type = 'button';
+                opcion.className = 'list-group-item list-group-item-action py-1 small';
+                opcion.textContent = entrada.nombre;
+                if (entrada.detalle) {
+                    const detalle = document.createElement('span');
+                    detalle.className = 'text-muted ms-2';
+                    detalle.textContent = entrada.detalle;
+                    opcion.appendChild(detalle);
+                }
+                // mousedown (no click) para ganarle al blur del buscador
+                opcion.addEventListener('mousedown', e => { e.preventDefault(); elegir(entrada); });
+                lista.appendChild(opcion);
+            });
+            lista.classList.remove('d-none');
+            activo = -1;
+        }
+
+        function buscar() {
+            const consulta = texto.value.trim();
+            if (!consulta) { cerrar(); return; }
+            if (peticion) peticion.abort();
+            peticion = new AbortController();
+            const params = new URLSearchParams(extra);
+            params.set('q', consulta);
+            fetch(`${URL_BASE}${contenedor.dataset.tipo}/?${params}`, {signal: peticion.signal})
+                .then(r => r.json())
+                .then(datos => { if (datos.status === 'ok') mostrar(datos.resultados); })
+                .catch(error => { if (error.name !== 'AbortError') console.error(error); });
+        }
+
+        texto.addEventListener('input', () => {
+            clearTimeout(temporizador);
+            // Vaciar el buscador quita el filtro
+            if (!texto.value.trim()) {
+                cerrar();
+                if (oculto.value) elegir(null);
+                return;
+            }
+            temporizador = setTimeout(buscar, ESPERA_MS);
+        });
+
+        texto.addEventListener('keydown', e => {
+            const abierta = !lista.classList.contains('d-none');
+            if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+                e.preventDefault();
+                if (!abierta) { buscar(); return; }
+                marcar(activo + (e.key === 'ArrowDown' ? 1 : -1));
+            } else if (e.key === 'Enter' && abierta) {
+                // Enter elige la opción marcada (o la primera) en vez de enviar el formulario
+                e.preventDefault();
+                const opciones = lista.querySelectorAll('.list-group-item-action');
+                if (opciones.length) opciones[Math.max(activo, 0)].dispatchEvent(new Event('mousedown'));
+            } else if (e.key === 'Escape') {
+                cerrar();
+            }
+        });
+
+        // Al salir sin elegir, se vuelve a mostrar lo que estaba seleccionado
+        texto.addEventListener('blur', () => {
+            cerrar();
+            if (texto.value.trim()) texto.value = elegido;
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        document.querySelectorAll('.autocompletar').forEach(iniciar);
+    });
+})();